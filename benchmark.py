@@ -0,0 +1,437 @@
+"""This module benchmarks every analyzer and the end-to-end pipeline on a fixed list of words,
+so that changes in speed and memory can be measured and caught.
+
+Each target runs in a fresh process, over the whole word list: the first pass is the cold
+timing, which includes loading WordNet, the indexes and the template, and the median of the
+passes that follow is the warm timing. The peak memory of a cold pass gets measured in yet
+another fresh process, since tracing allocations slows the code down.
+
+The benchmark keeps its own data directory, where the indexes get built once before anything
+is measured, and serves etymologies from a local stub of etymonline, so that runs are
+deterministic and don't depend on the network. Results can be saved as a baseline, and later
+runs compared against it:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+
+Functions:
+start_etymology_stub()
+prepare_data_directory(directory)
+measure_target(benchmark, words, repeat, track_memory)
+run_benchmarks(names, words, repeat, track_memory)
+compare_to_baseline(results, baseline, threshold)
+format_results(results)
+main()
+
+Classes:
+Benchmark
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from urllib.parse import unquote
+
+from etymology_fetcher import (
+    ETYMOLOGY_CACHE_FILENAME,
+    ETYMOLOGY_RATE_ENV_VAR,
+    ETYMOLOGY_SECTION_CLASS,
+    ETYMOLOGY_URL_ENV_VAR,
+)
+from index_storage import DATA_DIRECTORY_ENV_VAR, get_data_directory
+from instrumentation import Instrumentation
+
+BENCHMARK_FORMAT_VERSION = 1
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+
+# Differences below these are noise, whatever their ratio
+NOISE_FLOOR_SECONDS = 0.005
+NOISE_FLOOR_BYTES = 1024 * 1024
+
+BENCHMARK_WORDS = {
+    "common": ["house", "good", "water", "time"],
+    "rare": ["obsequious", "perspicacious", "quixotic"],
+    "polysemous": ["run", "set", "break", "light"],
+    "misspelled": ["recieve", "definately", "seperate"],
+}
+WORDS = [word for words in BENCHMARK_WORDS.values() for word in words]
+
+# The files of the data directory that each run starts without, so that cold runs are cold
+VOLATILE_DATA = (ETYMOLOGY_CACHE_FILENAME, "template_bytecode")
+
+Benchmark = namedtuple("Benchmark", ["name", "module", "function", "arguments"])
+Benchmark.__doc__ = """A function to benchmark. Its arguments are built for each word as
+'word' (the word alone), 'word_list' (the word and its synonyms) or 'analysis' (the word
+and its analysis results, which get computed before the timings start)."""
+
+BENCHMARKS = [
+    Benchmark(function, "wordnet_utils", function, "word")
+    for function in (
+        "get_pos_and_transitivity",
+        "get_phrasal_verbs",
+        "get_idiomatic_expressions",
+        "get_meanings",
+        "get_synonyms_antonyms",
+        "get_alternative_words",
+        "get_domain_words",
+        "get_associated_nouns_verbs",
+        "get_related_phrases_and_expressions",
+    )
+] + [
+    Benchmark(
+        "get_semantic_fields", "semantic_relations", "get_semantic_fields", "word"
+    ),
+    Benchmark(
+        "get_semantic_relations", "semantic_relations", "get_semantic_relations", "word"
+    ),
+    Benchmark(
+        "get_word_frequencies", "nltk_helpers", "get_word_frequencies", "word_list"
+    ),
+    Benchmark("get_collocations", "nltk_helpers", "get_collocations", "word_list"),
+    Benchmark(
+        "get_morphological_variations",
+        "nltk_helpers",
+        "get_morphological_variations",
+        "word",
+    ),
+    Benchmark("get_closest_words", "utils", "get_closest_words", "word"),
+    Benchmark("analyze_word", "word_analysis", "analyze_word", "word"),
+    Benchmark("prepare_html_content", "cli", "prepare_html_content", "analysis"),
+]
+BENCHMARKS_BY_NAME = {benchmark.name: benchmark for benchmark in BENCHMARKS}
+
+
+class StubEtymonlineHandler(BaseHTTPRequestHandler):
+    """Answers every word with a small page in the layout of etymonline."""
+
+    def do_GET(self):
+        word = unquote(self.path.rsplit("/", 1)[-1])
+        body = (
+            f'<html><body><section class="{ETYMOLOGY_SECTION_CLASS}">'
+            f"<p>The stub etymology of {word}.</p></section></body></html>"
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_etymology_stub():
+    """Starts serving the stub of etymonline on a free local port, in a daemon thread.
+    Returns:
+        ThreadingHTTPServer: The server, whose shutdown() stops it
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEtymonlineHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def prepare_data_directory(directory):
+    """Builds the indexes in the benchmark's data directory if they're missing, and removes
+    the caches left by the previous run. It runs in its own process, like the benchmarks.
+    """
+
+    for name in VOLATILE_DATA:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    from corpus_index import get_reuters_index
+    from fuzzy_index import get_lemma_index
+    from sentence_index import get_webtext_index
+    from wordnet_snapshot import get_wordnet_snapshot
+
+    get_wordnet_snapshot()
+    get_reuters_index()
+    get_lemma_index()
+    get_webtext_index()
+
+
+def build_arguments(benchmark, words):
+    if benchmark.arguments == "word":
+        return [(word,) for word in words]
+
+    if benchmark.arguments == "word_list":
+        from wordnet_traversal import traverse_word
+
+        return [
+            ([word] + sorted(traverse_word(word, ("synonyms",))["synonyms"] - {word}),)
+            for word in words
+        ]
+
+    from word_analysis import WordAnalysisError, analyze_word
+
+    arguments = []
+    for word in words:
+        try:
+            arguments.append((word, analyze_word(word)))
+        except WordAnalysisError:
+            continue
+
+    return arguments
+
+
+def run_pass(function, arguments):
+    """Calls the function with each set of arguments.
+    Returns:
+        tuple: How long the pass took, in seconds, and how many calls raised
+    """
+
+    errors = 0
+    started = time.perf_counter()
+
+    for call_arguments in arguments:
+        try:
+            function(*call_arguments)
+        except Exception:  # pylint: disable=broad-except
+            errors += 1
+
+    return time.perf_counter() - started, errors
+
+
+def measure_target(benchmark, words, repeat=DEFAULT_REPEAT, track_memory=False):
+    """Measures a benchmark in the current process, which should be fresh for cold timings.
+    Args:
+        benchmark (Benchmark): What to measure
+        words (list): The words to run it on
+        repeat (int): The number of warm passes
+        track_memory (bool): Whether to measure the peak memory of a cold pass instead of
+        the timings
+    Returns:
+        dict: The measurements
+    """
+
+    module = importlib.import_module(benchmark.module)
+    function = getattr(module, benchmark.function)
+    arguments = build_arguments(benchmark, words)
+
+    if track_memory:
+        tracemalloc.start()
+        collector = Instrumentation(track_memory=True)
+        collector.call(benchmark.name, run_pass, function, arguments)
+        tracemalloc.stop()
+        return {
+            "peak_memory_bytes": collector.stats()[benchmark.name]["peak_memory_bytes"]
+        }
+
+    cold_seconds, errors = run_pass(function, arguments)
+    warm_seconds = [run_pass(function, arguments)[0] for _ in range(repeat)]
+
+    return {
+        "calls": len(arguments),
+        "errors": errors,
+        "cold_seconds": cold_seconds,
+        "warm_seconds": statistics.median(warm_seconds) if warm_seconds else None,
+        "warm_min_seconds": min(warm_seconds) if warm_seconds else None,
+    }
+
+
+def run_in_fresh_process(function, *args):
+    # Spawned rather than forked, so that nothing the harness loaded leaks into the measurement
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context("spawn")
+    ) as executor:
+        return executor.submit(function, *args).result()
+
+
+def run_benchmarks(names, words=WORDS, repeat=DEFAULT_REPEAT, track_memory=True):
+    """Runs benchmarks, each in fresh processes.
+    Args:
+        names (list): The names of the benchmarks to run
+        words (list): The words to run them on
+        repeat (int): The number of warm passes
+        track_memory (bool): Whether to also measure the peak memory of a cold pass
+    Returns:
+        dict: The measurements of each benchmark, by name
+    """
+
+    results = {}
+
+    for name in names:
+        benchmark = BENCHMARKS_BY_NAME[name]
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run_in_fresh_process(measure_target, benchmark, words, repeat)
+
+        if track_memory:
+            results[name].update(
+                run_in_fresh_process(measure_target, benchmark, words, 0, True)
+            )
+
+    return results
+
+
+def get_metadata(words, repeat):
+    import nltk
+
+    return {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "nltk": nltk.__version__,
+        "words": words,
+        "repeat": repeat,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compares measurements to those of a baseline.
+    Args:
+        results (dict): The measurements of each benchmark, by name
+        baseline (dict): The measurements of the baseline, by name
+        threshold (float): How much slower, or bigger, a measurement can get before it counts
+        as a regression, as a fraction of the baseline
+    Returns:
+        list: A description of each regression
+    """
+
+    regressions = []
+
+    for name, measurements in results.items():
+        if name not in baseline:
+            continue
+
+        for field, noise_floor in [
+            ("cold_seconds", NOISE_FLOOR_SECONDS),
+            ("warm_seconds", NOISE_FLOOR_SECONDS),
+            ("peak_memory_bytes", NOISE_FLOOR_BYTES),
+        ]:
+            current, previous = measurements.get(field), baseline[name].get(field)
+            if current is None or previous is None:
+                continue
+
+            if (
+                current > previous * (1 + threshold)
+                and current - previous > noise_floor
+            ):
+                regressions.append(
+                    f"{name}: {field} went from {previous:.4g} to {current:.4g}"
+                    f" ({(current / previous - 1) * 100 if previous else float('inf'):+.0f}%)"
+                )
+
+    return regressions
+
+
+def format_results(results):
+    """Formats measurements as a table."""
+
+    lines = [
+        f"{'benchmark':<38} {'calls':>5} {'errors':>6} {'cold ms':>10} {'warm ms':>10}"
+        f" {'peak KiB':>10}"
+    ]
+
+    for name, measurements in results.items():
+        warm = measurements.get("warm_seconds")
+        peak = measurements.get("peak_memory_bytes")
+        lines.append(
+            f"{name:<38} {measurements['calls']:>5} {measurements['errors']:>6}"
+            f" {measurements['cold_seconds'] * 1000:>10.1f}"
+            f" {'-' if warm is None else f'{warm * 1000:.1f}':>10}"
+            f" {'-' if peak is None else f'{peak / 1024:.0f}':>10}"
+        )
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the analyzers and the pipeline on a fixed list of words."
+    )
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        metavar="benchmark",
+        help=f"The benchmarks to run, of {', '.join(BENCHMARKS_BY_NAME)}."
+        " Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="The number of warm passes."
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip measuring the peak memory of each benchmark.",
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument(
+        "--baseline", help="Compare the results to the ones saved in this JSON file."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="How much slower than the baseline counts as a regression, as a fraction.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(get_data_directory(), "benchmark"),
+        help="The data directory of the benchmark, where its indexes are kept between runs.",
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS_BY_NAME]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    # Every process of the benchmark inherits these
+    os.environ[DATA_DIRECTORY_ENV_VAR] = os.path.abspath(args.data_dir)
+    stub = start_etymology_stub()
+    os.environ[ETYMOLOGY_URL_ENV_VAR] = f"http://127.0.0.1:{stub.server_port}/word/"
+    os.environ[ETYMOLOGY_RATE_ENV_VAR] = "0"
+
+    try:
+        print("Preparing the data directory...", file=sys.stderr)
+        run_in_fresh_process(prepare_data_directory, os.environ[DATA_DIRECTORY_ENV_VAR])
+        results = run_benchmarks(
+            args.benchmarks or list(BENCHMARKS_BY_NAME),
+            WORDS,
+            args.repeat,
+            not args.no_memory,
+        )
+    finally:
+        stub.shutdown()
+
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(
+                {"metadata": get_metadata(WORDS, args.repeat), "results": results},
+                file,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        regressions = compare_to_baseline(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""This module lets a words file be regenerated incrementally: only the pages whose inputs
+changed since they were last written get generated again.
+
+A build manifest in the output directory records, for every page, the word and a
+fingerprint of what the page was generated from: the analysis version (the analyzers'
+version and the versions of NLTK, WordNet and the corpus indexes), the version of the page
+sections, and the hashes of the template and of the stylesheet. A page is up to date when it
+is still there and its fingerprint matches the current one.
+
+The analyses of the pages are kept next to them, in a result cache that never evicts, so
+that when only the template or the stylesheet changed, the pages are rendered again from
+the stored analyses without analyzing the words again.
+
+    python main.py --words-file words.txt --incremental
+
+Functions:
+hash_file(path)
+get_page_inputs(analysis_key, stylesheet_href)
+
+Classes:
+BuildManifest
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from output_writer import (
+    ARCHIVE_EXTENSIONS,
+    OUTPUT_DIRECTORY,
+    STYLESHEET_FILENAME,
+    TEMPLATE_FILENAME,
+)
+from result_cache import ResultCache
+from result_serialization import canonical_json
+
+BUILD_MANIFEST_FILENAME = ".build_manifest.sqlite3"
+BUILD_ANALYSES_FILENAME = ".build_analyses.sqlite3"
+
+# How much of a file gets read at a time while hashing it
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Bump whenever get_template_sections changes what the pages show
+PAGE_SECTIONS_VERSION = 1
+
+# How many written pages get recorded between two commits, so that an interrupted build
+# keeps most of what it did
+RECORDS_PER_COMMIT = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    path TEXT PRIMARY KEY,
+    word TEXT NOT NULL,
+    inputs TEXT NOT NULL
+);
+"""
+
+
+def hash_file(path):
+    """Returns the SHA-256 of a file, or None if it doesn't exist."""
+
+    try:
+        with open(path, "rb") as file:
+            digest = hashlib.sha256()
+            for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+
+    return digest.hexdigest()
+
+
+def get_page_inputs(analysis_key, stylesheet_href):
+    """Returns what every page gets generated from, besides its word.
+    Args:
+        analysis_key (str): The hash of the analysis version of the results
+        stylesheet_href (str): The link to the stylesheet from the pages
+    """
+
+    return {
+        "analysis": analysis_key,
+        "sections": PAGE_SECTIONS_VERSION,
+        "template": hash_file(TEMPLATE_FILENAME),
+        "stylesheet": hash_file(os.path.join(OUTPUT_DIRECTORY, STYLESHEET_FILENAME)),
+        "stylesheet_href": stylesheet_href,
+    }
+
+
+class BuildManifest:
+    """The record of the pages written to an output directory and of what they were
+    generated from. Pages can be recorded from several threads."""
+
+    def __init__(self, writer):
+        """Creates the manifest of a writer's output directory, without touching it until
+        it gets used.
+        Args:
+            writer (PageWriter): Where the pages get written
+        Raises:
+            ValueError: If the writer packs the pages into an archive, which gets written
+            whole every time
+        """
+
+        if writer.layout in ARCHIVE_EXTENSIONS:
+            raise ValueError(
+                "Only the flat and sharded layouts can be built incrementally."
+            )
+
+        self.writer = writer
+        self.path = os.path.join(writer.path, BUILD_MANIFEST_FILENAME)
+        self.analyses = ResultCache(
+            os.path.join(writer.path, BUILD_ANALYSES_FILENAME), max_bytes=None
+        )
+        self.up_to_date = 0
+        self._inputs = None
+        self._connection = None
+        self._lock = threading.Lock()
+        self._uncommitted_records = 0
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.executescript(SCHEMA)
+
+        return self._connection
+
+    @property
+    def inputs(self):
+        """The current fingerprint of the pages, as canonical JSON."""
+
+        if self._inputs is None:
+            self._inputs = canonical_json(
+                get_page_inputs(self.analyses.version_key, self.writer.stylesheet_href)
+            )
+
+        return self._inputs
+
+    def is_up_to_date(self, word):
+        """Tells whether the page of a word is there and was generated from the current
+        inputs."""
+
+        path = self.writer.get_page_path(word)
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT word, inputs FROM pages WHERE path = ?", (path,))
+                .fetchone()
+            )
+
+        return row == (word, self.inputs) and os.path.exists(path)
+
+    def select_stale_words(self, words):
+        """Yields the words whose page isn't up to date, counting the others in
+        'up_to_date'.
+        Args:
+            words (iterable): The words of the build. They get consumed lazily.
+        """
+
+        for word in words:
+            if self.is_up_to_date(word):
+                self.up_to_date += 1
+            else:
+                yield word
+
+    def record(self, word, path):
+        """Records that the page of a word was written from the current inputs. It can be
+        passed to PageWriter.write as the callback of written pages."""
+
+        inputs = self.inputs
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", (path, word, inputs)
+            )
+            self._uncommitted_records += 1
+            if self._uncommitted_records >= RECORDS_PER_COMMIT:
+                connection.commit()
+                self._uncommitted_records = 0
+
+    def close(self):
+        """Commits the pages recorded so far, and drops the stored analyses of older
+        analysis versions, which no page can be rendered from anymore."""
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+        self.analyses.remove_other_versions()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
@@ -2,52 +2,105 @@
 
 Functions:
 get_word_info(word)
+get_words_info(words)
+get_words_records(words)
+read_words(lines)
+import_etymologies(source)
+install_data(source)
+materialize(workers, chunk_size, fetch_etymologies)
+ingest_corpus(name, sources, workers, memory_limit_mb)
 main()
 """
 
 import argparse
+import contextlib
+import functools
 import os
 import logging
+import sys
 import webbrowser
 
-from jinja2 import Environment, FileSystemLoader
-
-from nltk_helpers import (
-    download_nltk_datasets,
+import instrumentation
+from etymology_scraper import OFFLINE_ENV_VAR
+from etymology_store import import_etymology_pages
+from index_storage import get_index_directory, write_atomically
+from output_writer import (
+    ARCHIVE_EXTENSIONS,
+    LAYOUTS,
+    OUTPUT_DIRECTORY,
+    STYLESHEET_FILENAME,
+    TEMPLATE_FILENAME,
+    PageWriter,
+    get_page_filename,
+    is_interactive,
+)
+from record_stream import RECORD_FORMATS, STANDARD_OUTPUT, RecordWriter
+from result_cache import ResultCache, analyze_word_with_cache
+from word_analysis import format_analyzer_timings, is_complete, WordAnalysisError
+from worker_pool import (
+    DEFAULT_CHUNK_SIZE,
+    analyze_word_safely,
+    analyze_words_in_parallel,
 )
-from word_analysis import analyze_word, WordAnalysisError
+
+TEMPLATE_BYTECODE_DIRECTORY = "template_bytecode"
 
 
-def save_html_to_file(word, html_content):
+def save_html_to_file(word, html_content, open_browser=None):
     """Saves to a file the html content provided. A file gets created inside the 'output' folder
     of the working directory.
     Args:
         word (str): The word to analyze
-        html_content (str): The markup in HTML that will get saved to a file
+        html_content (str or iterable): The markup in HTML that will get saved to a file, either
+        whole or as the pieces yielded by generate_html_content, which get written as they come
+        open_browser (bool): Whether to open the saved file in the default web browser. By
+        default, it only gets opened when the program runs interactively.
 
     """
 
-    # Create the output directory if it doesn't exist
-    output_directory = "output"
-    os.makedirs(output_directory, exist_ok=True)
+    # Save the generated HTML content to the output file, creating the output directory if needed
+    output_filepath = os.path.join(OUTPUT_DIRECTORY, get_page_filename(word))
 
-    # Save the generated HTML content to the output file
-    html_filename = f"{word}_info.html"
-    output_filepath = os.path.join(output_directory, html_filename)
-
-    with open(output_filepath, "w", encoding="utf-8") as file:
-        file.write(html_content)
+    if isinstance(html_content, str):
+        html_content = [html_content]
+    write_atomically(
+        output_filepath, "w", lambda file: file.writelines(html_content), "utf-8"
+    )
 
     print(f"Information about {word} has been saved to {output_filepath}")
 
     # Open the file in the default web browser
-    webbrowser.open("file://" + os.path.realpath(output_filepath))
+    if open_browser is None:
+        open_browser = is_interactive()
 
+    if open_browser:
+        webbrowser.open("file://" + os.path.realpath(output_filepath))
 
-def prepare_html_content(word, analysis_results):
+
+@functools.lru_cache(maxsize=None)
+def get_template(use_bytecode_cache=True):
+    """Returns the page template, which gets loaded and compiled only once per process.
+    Args:
+        use_bytecode_cache (bool): Whether to keep the compiled template in the data directory,
+        so that later processes skip compiling it as long as the template file doesn't change
+    """
+
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    bytecode_cache = None
+    if use_bytecode_cache:
+        bytecode_directory = get_index_directory(TEMPLATE_BYTECODE_DIRECTORY)
+        os.makedirs(bytecode_directory, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_directory)
+
+    env = Environment(loader=FileSystemLoader("."), bytecode_cache=bytecode_cache)
+    return env.get_template(TEMPLATE_FILENAME)
+
+
+def get_template_sections(word, analysis_results):
     """Given a word and the useful information already gathered regarding
-    that word, this function prepares the HTML content that will eventually
-    get saved to a file, then returns the HTML content.
+    that word, this function prepares the sections of its page, as (title, items,
+    whether the items are shown inline) tuples.
     Args:
         word (str): The word to analyze
         analysis_results (dict): A large dictionary with plenty of entries for each
@@ -64,10 +117,6 @@ def prepare_html_content(word, analysis_results):
 
     analysis_results["synonyms"].add(word)
 
-    # Configure Jinja2 environment and load the template
-    env = Environment(loader=FileSystemLoader("."))
-    template = env.get_template("word_info_template.html")
-
     # Prepare data for the template
     sections = []
 
@@ -212,14 +261,39 @@ def prepare_html_content(word, analysis_results):
             )
         )
 
-    # Render the HTML content using Jinja2
-    return template.render(word=word, sections=sections)
+    return sections
 
 
-def get_word_info(word):
+def prepare_html_content(word, analysis_results):
+    """Given a word and the useful information already gathered regarding
+    that word, this function prepares the HTML content that will eventually
+    get saved to a file, then returns the HTML content.
+    Args:
+        word (str): The word to analyze
+        analysis_results (dict): A large dictionary with plenty of entries for each
+        category of analysis
+    """
+
+    sections = get_template_sections(word, analysis_results)
+    return get_template().render(word=word, sections=sections)
+
+
+def generate_html_content(word, analysis_results, stylesheet=STYLESHEET_FILENAME):
+    """Like prepare_html_content, but yields the HTML content in pieces as the template gets
+    rendered, so that it can be written out without building the whole page in memory.
+    The stylesheet is the link to it from where the page gets saved.
+    """
+
+    sections = get_template_sections(word, analysis_results)
+    return get_template().generate(word=word, sections=sections, stylesheet=stylesheet)
+
+
+def get_word_info(word, show_timings=False, cache=None):
     """Generates detailed information about the given word and saves it in an HTML file in the output directory.
     Args:
         word (str): The word to analyze.
+        show_timings (bool): Whether to print how long each analyzer took to the standard error.
+        cache (ResultCache): If passed, the analysis results get read from and stored in this cache.
 
     Raises:
         ValueError: If the word is empty or None.
@@ -228,9 +302,311 @@ def get_word_info(word):
     if not word:
         raise ValueError("Word cannot be empty or None")
 
-    download_nltk_datasets()
+    # Imported only once the arguments are known to be valid, as it loads NLTK
+    from data_bundle import ensure_data_packages
+
+    ensure_data_packages()
+
+    timings = {}
+    analysis_results = analyze_word_with_cache(word, cache, timings)
+
+    if show_timings:
+        print(
+            format_analyzer_timings(timings) or "The results came from the cache.",
+            file=sys.stderr,
+        )
+
+    save_html_to_file(word, generate_html_content(word, analysis_results))
+
+
+def get_words_info(
+    words,
+    workers=1,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    cache=None,
+    writer=None,
+    incremental=False,
+):
+    """Generates the HTML page of every word passed in a single run, so that the corpora and
+    the template only get loaded once. A word that can't be analyzed gets reported without
+    stopping the rest of the batch.
+    Args:
+        words (iterable): The words to analyze. They get consumed lazily.
+        workers (int): The number of processes that analyze words in parallel. With 1 the
+        words get analyzed in this process; with 0, every available core gets used.
+        chunk_size (int): How many words get sent to a worker process at a time
+        cache (ResultCache): If passed, the analysis results get read from and stored in this cache.
+        writer (PageWriter): Where the pages get written. Defaults to the output directory.
+        incremental (bool): Whether to only generate the pages whose inputs changed since
+        they were last written, according to the build manifest of the output directory.
+        The analyses then get read from and stored in the build's own cache instead.
+
+    Returns:
+        tuple: The number of words whose page was generated, and the number of words that failed.
+
+    Raises:
+        ValueError: If an incremental build is asked of a writer that packs pages into an archive.
+    """
+
+    # Imported only once the arguments are known to be valid, as it loads NLTK
+    from data_bundle import ensure_data_packages
+
+    ensure_data_packages()
+
+    writer = writer or PageWriter()
+    build = contextlib.nullcontext()
+    on_written = None
+    if incremental:
+        from build_manifest import BuildManifest
+
+        build = BuildManifest(writer)
+        words = build.select_stale_words(words)
+        cache = build.analyses
+        on_written = build.record
+
+    if workers == 1:
+        outcomes = (analyze_word_safely(word, cache) for word in words)
+    else:
+        outcomes = analyze_words_in_parallel(words, workers or None, chunk_size, cache)
+
+    succeeded, failed = 0, 0
+
+    # The writer is left first, so that every written page gets recorded in the build
+    with build, writer:
+        for outcome in outcomes:
+            if outcome.error_type is not None:
+                failed += 1
+                print(outcome.error_message, file=sys.stderr)
+                logging.error(
+                    f"An error occurred during word analysis: {outcome.error_message}"
+                )
+                continue
+
+            # Pages that miss data that was temporarily out of reach aren't recorded, so
+            # that the next incremental build generates them again
+            writer.write(
+                outcome.word,
+                generate_html_content(
+                    outcome.word, outcome.results, writer.stylesheet_href
+                ),
+                on_written if is_complete(outcome.results) else None,
+            )
+            succeeded += 1
+
+    report = writer.report()
+    print(
+        f"Generated {succeeded} page(s) in {writer.path}. {failed} word(s) could not be analyzed."
+    )
+    print(
+        f"Wrote {report.bytes / 1e6:.1f} MB in {report.seconds:.1f}s "
+        f"({report.pages_per_second:.0f} pages/s)."
+    )
+    if incremental:
+        print(f"{build.up_to_date} page(s) were already up to date.")
+
+    return succeeded, failed
+
+
+def get_words_records(
+    words, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, cache=None, writer=None
+):
+    """Writes the analysis results of every word passed as machine-readable records, one per
+    word as soon as it is analyzed, without rendering any page. A word that can't be analyzed
+    gets a record of its error. The summary goes to the standard error, since the records
+    may go to the standard output.
+    Args:
+        words (iterable): The words to analyze. They get consumed lazily.
+        workers (int): The number of processes that analyze words in parallel. With 1 the
+        words get analyzed in this process; with 0, every available core gets used.
+        chunk_size (int): How many words get sent to a worker process at a time
+        cache (ResultCache): If passed, the analysis results get read from and stored in this cache.
+        writer (RecordWriter): Where the records get written. Defaults to JSON Lines on the
+        standard output.
+
+    Returns:
+        tuple: The number of words that were analyzed, and the number of words that failed.
+    """
+
+    # Imported only once the arguments are known to be valid, as it loads NLTK
+    from data_bundle import ensure_data_packages
+
+    ensure_data_packages()
+
+    if workers == 1:
+        outcomes = (analyze_word_safely(word, cache) for word in words)
+    else:
+        outcomes = analyze_words_in_parallel(words, workers or None, chunk_size, cache)
+
+    succeeded, failed = 0, 0
+
+    with writer or RecordWriter() as writer:
+        for outcome in outcomes:
+            writer.write(outcome)
+            if outcome.error_type is None:
+                succeeded += 1
+            else:
+                failed += 1
+                logging.error(
+                    f"An error occurred during word analysis: {outcome.error_message}"
+                )
+
+    print(
+        f"Wrote {writer.records} record(s), {writer.bytes / 1e6:.1f} MB, to {writer.path}. "
+        f"{failed} word(s) could not be analyzed.",
+        file=sys.stderr,
+    )
+
+    return succeeded, failed
+
+
+def read_words(lines):
+    """Yields the words listed one per line, skipping blank lines and lines that start with '#'.
+    Args:
+        lines (iterable): The lines of a words file
+    """
+
+    for line in lines:
+        word = line.strip()
+        if word and not word.startswith("#"):
+            yield word
+
+
+def open_words_file(path):
+    """Opens the words file passed on the command line. A path of '-' stands for the standard input."""
+
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+
+    return open(path, "r", encoding="utf-8")
+
+
+def import_etymologies(source):
+    """Imports the etymonline pages saved in a directory or archive into the offline etymology
+    store, and prints how fast they were processed.
+    Args:
+        source (str): A directory, or a zip or tar archive, of pages named after their words
+    """
+
+    report = import_etymology_pages(source)
+    print(
+        f"Imported {report.pages} page(s), {report.etymologies} with an etymology, "
+        f"in {report.seconds:.1f}s ({report.pages_per_second:.0f} pages/s)."
+    )
+
+
+def install_data(source):
+    """Installs the NLTK data packages that the analyzers need from a source, replacing the
+    installed ones, and prints where they went.
+    Args:
+        source (str): 'nltk' for NLTK's download server, or a mirror directory or tarball
+        with a SHA256SUMS file
+    """
+
+    from data_bundle import (
+        get_nltk_data_directory,
+        get_required_packages,
+        install_packages,
+    )
+
+    packages = get_required_packages()
+    directory = get_nltk_data_directory()
+    install_packages(packages, source, directory)
+    print(
+        f"Installed {', '.join(package.id for package in packages)} "
+        f"from {source} into {directory}."
+    )
+
+
+def materialize(workers=0, chunk_size=DEFAULT_CHUNK_SIZE, fetch_etymologies=False):
+    """Analyzes the whole WordNet vocabulary into the materialized store, reporting the
+    progress on the standard error, and prints how fast it went.
+    Args:
+        workers (int): The number of processes that analyze the words. 0 uses every core.
+        chunk_size (int): How many words get sent to a worker process at a time
+        fetch_etymologies (bool): Whether the etymologies that the offline store lacks may be
+        fetched from etymonline
+    """
+
+    # Imported only once the arguments are known to be valid, as it loads NLTK
+    from data_bundle import ensure_data_packages
+    from materialized_store import materialize as materialize_store
+
+    ensure_data_packages()
+
+    report = materialize_store(
+        workers=workers or None,
+        chunk_size=chunk_size,
+        fetch_etymologies=fetch_etymologies,
+    )
+    print(
+        f"The store holds {report.words - report.failed} of {report.words} words: "
+        f"{report.analyzed} analyzed in {report.seconds:.1f}s "
+        f"({report.words_per_second:.0f} words/s), {report.resumed} from an earlier run."
+    )
+    if report.failed:
+        print(
+            f"{report.failed} word(s) could not be analyzed, and will be analyzed when "
+            f"they're asked for."
+        )
+
+
+def ingest_corpus(name, sources, workers=1, memory_limit_mb=None):
+    """Ingests text files into a corpus that frequencies and collocations can come from, and
+    prints how fast they were processed.
+    Args:
+        name (str): The name of the corpus
+        sources (list): The files and directories of the corpus, plain or gzipped
+        workers (int): The number of processes that count the text. 0 uses every core.
+        memory_limit_mb (int): If passed, the rarest counts get pruned to keep the counts at
+        about this many megabytes
+    """
 
-    save_html_to_file(word, prepare_html_content(word, analyze_word(word)))
+    from corpus_ingestion import ingest_corpus as ingest
+
+    report = ingest(
+        name,
+        sources,
+        workers or os.cpu_count(),
+        memory_limit_mb * 1024 * 1024 if memory_limit_mb else None,
+    )
+    print(
+        f"Ingested {report.files} file(s) into the corpus '{name}': {report.tokens} tokens, "
+        f"{report.vocabulary} distinct words and {report.bigrams} distinct bigrams, "
+        f"in {report.seconds:.1f}s ({report.megabytes_per_second:.1f} MB/s)."
+    )
+    if report.count_error_bound:
+        print(
+            f"Rare counts were pruned to stay under the memory limit: counts may be up to "
+            f"{report.count_error_bound} too low."
+        )
+
+
+def get_output_path(args):
+    """Returns the output directory or archive chosen on the command line."""
+
+    if args.output:
+        return args.output
+
+    if args.output_layout in ARCHIVE_EXTENSIONS:
+        return os.path.join(
+            OUTPUT_DIRECTORY, "pages" + ARCHIVE_EXTENSIONS[args.output_layout]
+        )
+
+    return OUTPUT_DIRECTORY
+
+
+def report_instrumentation(collector, json_path=None):
+    """Reports the statistics of the analyzers: as a summary on the standard error, or as JSON
+    if a path is passed. Profiles get written to the profile directory, if there is one.
+    """
+
+    if json_path:
+        collector.write_json(json_path)
+    else:
+        print(instrumentation.format_summary(collector.stats()), file=sys.stderr)
+
+    for path in collector.write_profiles():
+        logging.info(f"Profile written to {path}")
 
 
 def main():
@@ -245,11 +621,235 @@ def main():
     parser = argparse.ArgumentParser(
         description="Get detailed information about a given word."
     )
-    parser.add_argument("word", help="The word to analyze.")
+    words_source = parser.add_mutually_exclusive_group(required=True)
+    words_source.add_argument("word", nargs="?", help="The word to analyze.")
+    words_source.add_argument(
+        "--words-file",
+        help="A file with one word per line to analyze in a single run, or '-' to read them from the standard input.",
+    )
+    words_source.add_argument(
+        "--import-etymologies",
+        metavar="SOURCE",
+        help="Import the etymonline pages saved in a directory or a zip or tar archive into the offline etymology store, and exit.",
+    )
+    words_source.add_argument(
+        "--ingest-corpus",
+        nargs="+",
+        metavar="SOURCE",
+        help="Count the text files, plain or gzipped, and directories of files into the corpus named by --corpus, and exit.",
+    )
+    words_source.add_argument(
+        "--install-data",
+        metavar="SOURCE",
+        help="Install the NLTK data that the analyzers need from 'nltk', or from a mirror directory or tarball with a SHA256SUMS file, and exit.",
+    )
+    words_source.add_argument(
+        "--materialize",
+        action="store_true",
+        help="Analyze every lemma name of WordNet into a read-only store that later analyses get read from, resuming an interrupted run, and exit. It uses every core unless --workers says otherwise.",
+    )
+    words_source.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep everything loaded and serve the analyses and pages over a local HTTP API until interrupted.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only take etymologies from the offline store, without reaching etymonline.",
+    )
+    parser.add_argument(
+        "--fetch-etymologies",
+        action="store_true",
+        help="Let --materialize fetch the etymologies that the offline store lacks from etymonline, within the rate limit, instead of refusing to.",
+    )
+    parser.add_argument(
+        "--corpus",
+        metavar="NAME",
+        help="The ingested corpus that word frequencies and collocations come from. Defaults to Reuters.",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        metavar="MB",
+        help="About how many megabytes the counts of --ingest-corpus may take before the rarest ones get pruned.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["html"] + list(RECORD_FORMATS),
+        default="html",
+        help="What gets generated for each word: an HTML page, or a record of the analysis results, as JSON Lines or MessagePack, streamed to --output or to the standard output.",
+    )
+    parser.add_argument(
+        "--output-layout",
+        choices=LAYOUTS,
+        default="flat",
+        help="How the pages of a words file get laid out: in one directory, in sharded subdirectories, or packed into a zip or tar archive.",
+    )
+    parser.add_argument(
+        "--output",
+        help=f"The directory, or archive, that the pages of a words file get written to. Defaults to '{OUTPUT_DIRECTORY}', or an archive in it.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only generate the pages of a words file whose word, analysis, template or stylesheet changed since they were last generated. The analyses of the pages are kept in the output directory, so a template change doesn't analyze the words again.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of processes that analyze the words of a words file, or of --materialize, in parallel. 0 uses every available core. Defaults to 1, or to 0 with --materialize.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="How many words get sent to a worker process at a time.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long each analyzer took, marking the ones on the critical path.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Analyze the words again instead of reusing and storing cached results.",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove every cached analysis result before running.",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the calls, wall and CPU time of each analyzer to the standard error at the end of the run.",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="PATH",
+        help="Write the statistics of each analyzer to a JSON file at the end of the run.",
+    )
+    parser.add_argument(
+        "--stats-memory",
+        action="store_true",
+        help="Also record the peak memory that each analyzer allocates. This slows the run down, as the analyzers of a word then run one at a time.",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIRECTORY",
+        help="Profile each analyzer with cProfile, writing one file of statistics per analyzer and process to this directory.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="The address that --serve listens on.",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8080, help="The port that --serve listens on."
+    )
+    parser.add_argument(
+        "--serve-threads",
+        type=int,
+        default=4,
+        help="How many words --serve analyzes or renders at the same time.",
+    )
     args = parser.parse_args()
 
+    if args.workers is None:
+        args.workers = 0 if args.materialize else 1
+
+    if args.workers < 0 or args.chunk_size < 1:
+        parser.error("--workers can't be negative and --chunk-size must be positive.")
+
+    if args.serve_threads < 1:
+        parser.error("--serve-threads must be positive.")
+
+    if args.incremental and (
+        not args.words_file
+        or args.output_layout in ARCHIVE_EXTENSIONS
+        or args.format != "html"
+    ):
+        parser.error(
+            "--incremental needs a words file, HTML pages and the flat or sharded output layout."
+        )
+
+    if args.ingest_corpus and not args.corpus:
+        parser.error("--ingest-corpus needs --corpus to name the corpus.")
+
+    if args.memory_limit is not None and args.memory_limit < 1:
+        parser.error("--memory-limit must be positive.")
+
+    if args.corpus and not args.ingest_corpus:
+        from corpus_index import CORPUS_ENV_VAR
+
+        # Set in the environment so that worker processes inherit it
+        os.environ[CORPUS_ENV_VAR] = args.corpus
+
+    if args.offline:
+        # Set in the environment so that worker processes inherit it
+        os.environ[OFFLINE_ENV_VAR] = "1"
+
+    collector = None
+    if args.stats or args.stats_json or args.stats_memory or args.profile_dir:
+        collector = instrumentation.enable(args.stats_memory, args.profile_dir)
+
     try:
-        get_word_info(args.word)
+        if args.import_etymologies:
+            import_etymologies(args.import_etymologies)
+            return
+
+        if args.install_data:
+            install_data(args.install_data)
+            return
+
+        if args.materialize:
+            materialize(args.workers, args.chunk_size, args.fetch_etymologies)
+            return
+
+        if args.ingest_corpus:
+            ingest_corpus(
+                args.corpus, args.ingest_corpus, args.workers, args.memory_limit
+            )
+            return
+
+        if args.clear_cache:
+            ResultCache().clear()
+
+        cache = None if args.no_cache else ResultCache()
+
+        if args.serve:
+            from http_service import serve
+
+            serve(args.host, args.port, cache, args.serve_threads)
+        elif args.format != "html":
+            writer = RecordWriter(args.output or STANDARD_OUTPUT, args.format)
+            if args.words_file:
+                with open_words_file(args.words_file) as words_file:
+                    get_words_records(
+                        read_words(words_file),
+                        args.workers,
+                        args.chunk_size,
+                        cache,
+                        writer,
+                    )
+            elif not args.word:
+                raise ValueError("Word cannot be empty or None")
+            else:
+                get_words_records([args.word], cache=cache, writer=writer)
+        elif args.words_file:
+            with open_words_file(args.words_file) as words_file:
+                get_words_info(
+                    read_words(words_file),
+                    args.workers,
+                    args.chunk_size,
+                    cache,
+                    PageWriter(get_output_path(args), args.output_layout),
+                    args.incremental,
+                )
+        else:
+            get_word_info(args.word, args.timings, cache)
     except WordAnalysisError as exception:
         print(exception)
         logging.error(
@@ -260,6 +860,15 @@ def main():
         logging.error(
             f"An error occurred during value processing: {exception}", exc_info=True
         )
+    except OSError as exception:
+        print(exception)
+        logging.error(
+            f"An error occurred while reading or writing a file: {exception}",
+            exc_info=True,
+        )
+
+    if collector is not None:
+        report_instrumentation(collector, args.stats_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""This module provides a persistent unigram and bigram count index over a corpus, so
+that word frequencies and collocations can be answered with lookups instead of
+re-reading and re-counting the whole corpus for every analyzed word.
+
+The index is stored as a sorted vocabulary plus packed arrays of counts, and the
+arrays are memory-mapped when loaded.
+
+Functions:
+normalize_corpus_words(words)
+count_unigrams_and_bigrams(tokens)
+write_corpus_index(directory, unigram_counts, bigram_counts, source)
+load_corpus_index(name, source, get_words)
+get_reuters_index()
+get_corpus_name()
+get_corpus_index(name)
+get_corpus_version(name)
+
+Classes:
+CorpusCountIndex
+"""
+
+import functools
+import os
+from bisect import bisect_left
+from collections import Counter
+
+import nltk
+from nltk.corpus import reuters
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    read_strings,
+    write_array,
+    write_manifest,
+    write_strings,
+)
+
+CORPUS_INDEX_FORMAT_VERSION = 1
+CORPORA_DIRECTORY = "corpora"
+
+# The corpus that frequencies and collocations come from, unless another one was ingested
+# and named in this environment variable
+CORPUS_ENV_VAR = "WORD_INFO_CORPUS"
+DEFAULT_CORPUS = "reuters"
+
+VOCABULARY_FILENAME = "vocabulary.txt"
+UNIGRAM_COUNTS_FILENAME = "unigram_counts.bin"
+BIGRAM_KEYS_FILENAME = "bigram_keys.bin"
+BIGRAM_COUNTS_FILENAME = "bigram_counts.bin"
+
+# Bigram keys pack both token ids into a single unsigned 64-bit integer
+TOKEN_ID_BITS = 32
+
+
+def normalize_corpus_words(words):
+    """Lowercases the words of a corpus and drops the ones that aren't alphanumeric,
+    which is the token stream that frequencies and collocations are computed over."""
+
+    return (word.lower() for word in words if word.isalnum())
+
+
+def count_unigrams_and_bigrams(tokens):
+    """Counts the unigrams and the bigrams of a token stream in a single pass.
+    Args:
+        tokens (iterable): The already normalized tokens
+    Returns:
+        tuple: A Counter of unigrams and a Counter of (first, second) bigrams
+    """
+
+    unigram_counts = Counter()
+    bigram_counts = Counter()
+    previous = None
+
+    for token in tokens:
+        unigram_counts[token] += 1
+        if previous is not None:
+            bigram_counts[(previous, token)] += 1
+        previous = token
+
+    return unigram_counts, bigram_counts
+
+
+def write_corpus_index(directory, unigram_counts, bigram_counts, source, details=None):
+    """Writes a count index to 'directory'.
+    Args:
+        directory (str): The directory that will hold the index files
+        unigram_counts (Mapping): Counts of each token
+        bigram_counts (Mapping): Counts of each (first, second) token pair
+        source (dict): JSON-serializable description of where the counts came from
+        details (dict): Further JSON-serializable entries for the manifest, such as how
+        the counts were approximated
+    """
+
+    tokens = set(unigram_counts)
+    for bigram in bigram_counts:
+        tokens.update(bigram)
+
+    vocabulary = sorted(tokens)
+    token_ids = {token: token_id for token_id, token in enumerate(vocabulary)}
+
+    bigram_entries = sorted(
+        ((token_ids[first] << TOKEN_ID_BITS) | token_ids[second], count)
+        for (first, second), count in bigram_counts.items()
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    write_strings(os.path.join(directory, VOCABULARY_FILENAME), vocabulary)
+    write_array(
+        os.path.join(directory, UNIGRAM_COUNTS_FILENAME),
+        "Q",
+        (unigram_counts.get(token, 0) for token in vocabulary),
+    )
+    write_array(
+        os.path.join(directory, BIGRAM_KEYS_FILENAME),
+        "Q",
+        (key for key, _ in bigram_entries),
+    )
+    write_array(
+        os.path.join(directory, BIGRAM_COUNTS_FILENAME),
+        "Q",
+        (count for _, count in bigram_entries),
+    )
+    write_manifest(
+        directory,
+        {
+            "format_version": CORPUS_INDEX_FORMAT_VERSION,
+            "source": source,
+            "token_count": sum(unigram_counts.values()),
+            "vocabulary_size": len(vocabulary),
+            "bigram_count": len(bigram_entries),
+            **(details or {}),
+        },
+    )
+
+
+class CorpusCountIndex:
+    """Read-only view over a count index written by write_corpus_index."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.vocabulary = read_strings(os.path.join(directory, VOCABULARY_FILENAME))
+        self.token_ids = {token: index for index, token in enumerate(self.vocabulary)}
+        self.unigram_counts = map_array(
+            os.path.join(directory, UNIGRAM_COUNTS_FILENAME), "Q"
+        )
+        self.bigram_keys = map_array(os.path.join(directory, BIGRAM_KEYS_FILENAME), "Q")
+        self.bigram_counts = map_array(
+            os.path.join(directory, BIGRAM_COUNTS_FILENAME), "Q"
+        )
+
+    def frequency(self, token):
+        """Returns how many times 'token' occurs in the corpus."""
+
+        token_id = self.token_ids.get(token)
+        return 0 if token_id is None else self.unigram_counts[token_id]
+
+    def bigram_frequency(self, first, second):
+        """Returns how many times 'first' is immediately followed by 'second'."""
+
+        first_id = self.token_ids.get(first)
+        second_id = self.token_ids.get(second)
+        if first_id is None or second_id is None:
+            return 0
+
+        key = (first_id << TOKEN_ID_BITS) | second_id
+        position = bisect_left(self.bigram_keys, key)
+        if position < len(self.bigram_keys) and self.bigram_keys[position] == key:
+            return self.bigram_counts[position]
+
+        return 0
+
+    def bigrams_within(self, words):
+        """Returns every ((first, second), count) bigram of the corpus whose two
+        tokens both belong to 'words'."""
+
+        token_ids = sorted(
+            self.token_ids[word] for word in set(words) if word in self.token_ids
+        )
+        bigrams = []
+
+        for first_id in token_ids:
+            start = bisect_left(self.bigram_keys, first_id << TOKEN_ID_BITS)
+            end = bisect_left(self.bigram_keys, (first_id + 1) << TOKEN_ID_BITS, start)
+            if start == end:
+                continue
+
+            for second_id in token_ids:
+                key = (first_id << TOKEN_ID_BITS) | second_id
+                position = bisect_left(self.bigram_keys, key, start, end)
+                if position < end and self.bigram_keys[position] == key:
+                    bigrams.append(
+                        (
+                            (self.vocabulary[first_id], self.vocabulary[second_id]),
+                            self.bigram_counts[position],
+                        )
+                    )
+
+        return bigrams
+
+    def top_bigrams_within(self, words, limit):
+        """Returns the 'limit' most frequent bigrams made only of 'words', ordered
+        the way NLTK's collocation finder ranks them by raw frequency."""
+
+        bigrams = sorted(
+            self.bigrams_within(words), key=lambda item: (-item[1], item[0])
+        )
+        return bigrams[:limit]
+
+
+def load_corpus_index(name, source, get_words):
+    """Loads the count index called 'name', building and persisting it first if it
+    is missing or was built from a different source or index format.
+    Args:
+        name (str): The name under which the index is stored
+        source (dict): JSON-serializable description of the corpus and its version
+        get_words (callable): Returns the raw words of the corpus, only called when
+        the index has to be built
+    """
+
+    directory = get_index_directory(os.path.join(CORPORA_DIRECTORY, name))
+    expected = {"format_version": CORPUS_INDEX_FORMAT_VERSION, "source": source}
+
+    def build(build_directory):
+        unigram_counts, bigram_counts = count_unigrams_and_bigrams(
+            normalize_corpus_words(get_words())
+        )
+        write_corpus_index(build_directory, unigram_counts, bigram_counts, source)
+
+    ensure_index(directory, expected, build)
+
+    return CorpusCountIndex(directory)
+
+
+@functools.lru_cache(maxsize=None)
+def get_reuters_index():
+    """Returns the count index of the Reuters corpus, built on first use."""
+
+    source = {
+        "corpus": "reuters",
+        "nltk_version": nltk.__version__,
+        "fileids": len(reuters.fileids()),
+    }
+
+    return load_corpus_index("reuters", source, reuters.words)
+
+
+def get_corpus_name():
+    """Returns the name of the corpus that frequencies and collocations come from by default."""
+
+    return os.environ.get(CORPUS_ENV_VAR) or DEFAULT_CORPUS
+
+
+def get_corpus_index(name=None):
+    """Returns the count index of a corpus: Reuters, or a corpus ingested under that name.
+    Args:
+        name (str): The name of the corpus. Defaults to get_corpus_name().
+    Raises:
+        ValueError: If no corpus was ingested under that name.
+    """
+
+    return open_corpus_index(name or get_corpus_name())
+
+
+@functools.lru_cache(maxsize=None)
+def open_corpus_index(name):
+    if name == DEFAULT_CORPUS:
+        return get_reuters_index()
+
+    directory = get_index_directory(os.path.join(CORPORA_DIRECTORY, name))
+    if read_manifest(directory) is None:
+        raise ValueError(f"No corpus named '{name}' has been ingested.")
+
+    return CorpusCountIndex(directory)
+
+
+def get_corpus_version(name=None):
+    """Describes the corpus that frequencies and collocations come from, for the analysis
+    version: its name, and for an ingested corpus, the files and settings it was built from.
+    """
+
+    name = name or get_corpus_name()
+    if name == DEFAULT_CORPUS:
+        return {"name": name}
+
+    manifest = read_manifest(get_index_directory(os.path.join(CORPORA_DIRECTORY, name)))
+    return {"name": name, "source": None if manifest is None else manifest["source"]}
@@ -0,0 +1,363 @@
+"""This module ingests large text corpora of our own into count indexes, so that frequencies
+and collocations can come from them instead of the Reuters corpus.
+
+The files get streamed line by line, plain or gzipped, and cut into chunks of a fixed size
+that a pool of processes tokenizes and counts. The partial counts are merged in the order of
+the chunks, which restores the bigrams that straddle two chunks, so the counts are the same
+however the corpus gets cut and however many processes count it.
+
+The merged counts can be kept under a memory ceiling: whenever their estimated size exceeds
+it, the rarest unigrams and bigrams get pruned, as in lossy counting. Counts that survive a
+pruning may then be underestimated, by at most the sum of the pruning thresholds, which the
+manifest of the index records. Frequent words and bigrams, the ones that collocations are
+made of, are the least affected.
+
+    python main.py --ingest-corpus ~/corpora/news --corpus news --memory-limit 2048
+    python main.py white --corpus news
+
+Functions:
+list_corpus_files(sources)
+open_corpus_file(path)
+read_chunks(paths, chunk_bytes)
+tokenize_text(text)
+count_chunk(text)
+count_chunks(chunks, workers)
+get_corpus_source(paths, max_memory_bytes)
+ingest_corpus(name, sources, workers, max_memory_bytes, chunk_bytes)
+
+Classes:
+CountAccumulator
+IngestReport
+"""
+
+import gzip
+import os
+import re
+import time
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_index import (
+    CORPORA_DIRECTORY,
+    CORPUS_INDEX_FORMAT_VERSION,
+    DEFAULT_CORPUS,
+    open_corpus_index,
+    write_corpus_index,
+)
+from index_storage import ensure_index, get_index_directory, read_manifest
+
+# Bump whenever the tokenization changes the tokens it yields
+TOKENIZER_VERSION = 1
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Tokens are runs of letters and digits, as in the Reuters index, which keeps the NLTK
+# tokens that are alphanumeric
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Rough sizes of a counted unigram and bigram in memory: the dictionary entry, the key and
+# the count. They only need to be good enough to keep the counts near the ceiling.
+UNIGRAM_ENTRY_BYTES = 150
+BIGRAM_ENTRY_BYTES = 250
+
+# Pruning shrinks the counts to this fraction of the ceiling, so that it doesn't happen again
+# right away
+PRUNE_TARGET = 0.75
+
+# How many chunks per process can be waiting to be counted or merged
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+class IngestReport(
+    namedtuple(
+        "IngestReport",
+        [
+            "files",
+            "bytes",
+            "tokens",
+            "vocabulary",
+            "bigrams",
+            "count_error_bound",
+            "seconds",
+        ],
+    )
+):
+    """What ingesting a corpus read and produced, and how long it took. The count error bound
+    is how much pruning may have underestimated any count, 0 when nothing was pruned."""
+
+    __slots__ = ()
+
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def list_corpus_files(sources):
+    """Returns the files of a corpus in a stable order.
+    Args:
+        sources (list): Files, and directories whose files get read recursively, skipping
+        hidden ones
+    Raises:
+        ValueError: If a source doesn't exist.
+    """
+
+    paths = []
+
+    for source in sources:
+        if os.path.isfile(source):
+            paths.append(source)
+        elif os.path.isdir(source):
+            for directory, subdirectories, filenames in os.walk(source):
+                subdirectories[:] = sorted(
+                    name for name in subdirectories if not name.startswith(".")
+                )
+                paths.extend(
+                    os.path.join(directory, filename)
+                    for filename in sorted(filenames)
+                    if not filename.startswith(".")
+                )
+        else:
+            raise ValueError(f"The corpus source '{source}' doesn't exist.")
+
+    return paths
+
+
+def open_corpus_file(path):
+    """Opens a corpus file as text, decompressing it if its name ends with '.gz'."""
+
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def read_chunks(paths, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Yields the text of the files, one after the other, in chunks of about 'chunk_bytes'
+    characters that end at the end of a line."""
+
+    lines = []
+    size = 0
+
+    for path in paths:
+        with open_corpus_file(path) as file:
+            for line in file:
+                lines.append(line)
+                size += len(line)
+                if size >= chunk_bytes:
+                    yield "".join(lines)
+                    lines, size = [], 0
+
+        # Keeps the last word of a file apart from the first one of the next
+        lines.append("\n")
+
+    if size:
+        yield "".join(lines)
+
+
+def tokenize_text(text):
+    """Yields the lowercased alphanumeric tokens of a text."""
+
+    for match in TOKEN_PATTERN.finditer(text):
+        yield match.group().lower()
+
+
+def count_chunk(text):
+    """Counts the unigrams and bigrams of a chunk of text.
+    Returns:
+        tuple: A Counter of unigrams, a Counter of (first, second) bigrams, and the first and
+        last tokens of the chunk, which form a bigram with the neighbouring chunks
+    """
+
+    unigram_counts = Counter()
+    bigram_counts = Counter()
+    first = previous = None
+
+    for token in tokenize_text(text):
+        unigram_counts[token] += 1
+        if previous is None:
+            first = token
+        else:
+            bigram_counts[(previous, token)] += 1
+        previous = token
+
+    return unigram_counts, bigram_counts, first, previous
+
+
+def count_chunks(chunks, workers=1):
+    """Counts chunks of text, in as many processes as 'workers', and yields their counts in
+    the order of the chunks. Only a few chunks per process are read ahead, so memory stays
+    bounded however large the corpus is."""
+
+    if workers == 1:
+        yield from map(count_chunk, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(count_chunk, chunk))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+class CountAccumulator:
+    """Merges the counts of consecutive chunks, pruning the rarest entries whenever their
+    estimated size exceeds the memory ceiling."""
+
+    def __init__(self, max_memory_bytes=None):
+        self.max_memory_bytes = max_memory_bytes
+        self.unigram_counts = Counter()
+        self.bigram_counts = Counter()
+        self.last_token = None
+        self.tokens = 0
+        self.count_error_bound = 0
+
+    def estimate_bytes(self):
+        return (
+            len(self.unigram_counts) * UNIGRAM_ENTRY_BYTES
+            + len(self.bigram_counts) * BIGRAM_ENTRY_BYTES
+        )
+
+    def add(self, unigram_counts, bigram_counts, first, last):
+        """Adds the counts of the chunk that follows the ones added so far."""
+
+        if first is not None:
+            if self.last_token is not None:
+                bigram_counts[(self.last_token, first)] += 1
+            self.last_token = last
+
+        self.unigram_counts.update(unigram_counts)
+        self.bigram_counts.update(bigram_counts)
+        self.tokens += sum(unigram_counts.values())
+
+        if self.max_memory_bytes and self.estimate_bytes() > self.max_memory_bytes:
+            self.prune()
+
+    def get_prune_threshold(self):
+        # The bytes that the entries of each count take, to find the smallest count
+        # threshold that frees enough of them
+        histogram = Counter()
+        for counts, entry_bytes in [
+            (self.unigram_counts, UNIGRAM_ENTRY_BYTES),
+            (self.bigram_counts, BIGRAM_ENTRY_BYTES),
+        ]:
+            for count, entries in Counter(counts.values()).items():
+                histogram[count] += entries * entry_bytes
+
+        excess = self.estimate_bytes() - self.max_memory_bytes * PRUNE_TARGET
+        threshold = freed = 0
+        for count in sorted(histogram):
+            if freed >= excess:
+                break
+            threshold = count
+            freed += histogram[count]
+
+        return threshold
+
+    def prune(self):
+        """Drops the unigrams and bigrams counted the fewest times, until the counts fit
+        comfortably under the ceiling."""
+
+        threshold = self.get_prune_threshold()
+
+        # Rebuilt rather than deleted from, since dictionaries don't shrink on deletion
+        self.unigram_counts = Counter(
+            {
+                token: count
+                for token, count in self.unigram_counts.items()
+                if count > threshold
+            }
+        )
+        self.bigram_counts = Counter(
+            {
+                bigram: count
+                for bigram, count in self.bigram_counts.items()
+                if count > threshold
+            }
+        )
+        self.count_error_bound += threshold
+
+
+def get_corpus_source(paths, max_memory_bytes=None):
+    """Describes the files of a corpus and how they get counted, so that an unchanged corpus
+    isn't ingested again."""
+
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+
+    return {
+        "files": files,
+        "tokenizer_version": TOKENIZER_VERSION,
+        "max_memory_bytes": max_memory_bytes,
+    }
+
+
+def ingest_corpus(
+    name,
+    sources,
+    workers=1,
+    max_memory_bytes=None,
+    chunk_bytes=DEFAULT_CHUNK_BYTES,
+):
+    """Counts the unigrams and bigrams of a corpus into a count index named 'name', which
+    get_word_frequencies and get_collocations can then query. A corpus whose files didn't
+    change since it was last ingested is left as it is.
+    Args:
+        name (str): The name of the corpus
+        sources (list): The files and directories of the corpus
+        workers (int): The number of processes that count the chunks
+        max_memory_bytes (int): If passed, the rarest counts get pruned to keep the merged
+        counts at about this size
+        chunk_bytes (int): About how many characters each process counts at a time
+    Returns:
+        IngestReport: What was read and counted
+    Raises:
+        ValueError: If the name is reserved or not a plain name, or a source doesn't exist.
+    """
+
+    if name == DEFAULT_CORPUS or not name or name != os.path.basename(name):
+        raise ValueError(f"'{name}' can't be the name of an ingested corpus.")
+
+    started = time.perf_counter()
+    paths = list_corpus_files(sources)
+    source = get_corpus_source(paths, max_memory_bytes)
+    directory = get_index_directory(os.path.join(CORPORA_DIRECTORY, name))
+    accumulator = CountAccumulator(max_memory_bytes)
+
+    def build(build_directory):
+        for counts in count_chunks(read_chunks(paths, chunk_bytes), workers):
+            accumulator.add(*counts)
+
+        write_corpus_index(
+            build_directory,
+            accumulator.unigram_counts,
+            accumulator.bigram_counts,
+            source,
+            {
+                "ingested_tokens": accumulator.tokens,
+                "count_error_bound": accumulator.count_error_bound,
+            },
+        )
+
+    ensure_index(
+        directory,
+        {"format_version": CORPUS_INDEX_FORMAT_VERSION, "source": source},
+        build,
+    )
+    open_corpus_index.cache_clear()
+
+    manifest = read_manifest(directory)
+    return IngestReport(
+        files=len(paths),
+        bytes=sum(size for _, size, _ in source["files"]),
+        tokens=manifest["ingested_tokens"],
+        vocabulary=manifest["vocabulary_size"],
+        bigrams=manifest["bigram_count"],
+        count_error_bound=manifest["count_error_bound"],
+        seconds=time.perf_counter() - started,
+    )
@@ -0,0 +1,398 @@
+"""This module installs the NLTK data packages that the analyzers need, and only those. It
+records what it installed in a manifest in the NLTK data directory, so that later runs, from
+any working directory, check a few file sizes instead of reaching the network.
+
+Packages come from NLTK's download server, from a local mirror directory, or from a tarball,
+laid out like an NLTK data directory (such as 'corpora/wordnet.zip'). Mirrors and tarballs
+must list the SHA-256 of their packages in a SHA256SUMS file at their root, in the format of
+sha256sum; downloads are checked against the MD5 of NLTK's package index. A package that
+doesn't match is never put in place. Packages get installed in parallel, except from a
+tarball, which is read in one pass.
+
+Functions:
+get_required_packages(analyzer_names, corpus)
+get_nltk_data_directory()
+find_package_path(package)
+read_bundle_manifest(directory)
+install_packages(packages, source, directory)
+ensure_data_packages(packages, source, directory)
+
+Classes:
+DataBundleError
+DataPackage
+"""
+
+import hashlib
+import json
+import os
+import tarfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from index_storage import write_atomically
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_MANIFEST_FILENAME = "word_info_data.json"
+CHECKSUMS_FILENAME = "SHA256SUMS"
+
+# Where the packages get installed from when they're missing: 'nltk' for NLTK's download
+# server, or the path of a mirror directory or tarball
+DATA_SOURCE_ENV_VAR = "WORD_INFO_DATA_SOURCE"
+NLTK_SOURCE = "nltk"
+
+BLOCK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+DataPackage = namedtuple("DataPackage", ["id", "subdirectory"])
+DataPackage.__doc__ = (
+    """An NLTK data package, such as wordnet in the corpora subdirectory."""
+)
+
+PACKAGES = {
+    "wordnet": DataPackage("wordnet", "corpora"),
+    "reuters": DataPackage("reuters", "corpora"),
+    "webtext": DataPackage("webtext", "corpora"),
+    # The webtext reader splits sentences with the punkt tokenizer
+    "punkt": DataPackage("punkt", "tokenizers"),
+}
+
+# Every analysis first checks that WordNet knows the word
+BASE_PACKAGES = ("wordnet",)
+
+# The packages that each analyzer of word_analysis reads. Reuters is only needed while it is
+# the corpus that frequencies and collocations come from.
+ANALYZER_PACKAGES = {
+    "etymology": (),
+    "wordnet_traversal": ("wordnet",),
+    "word_frequencies": ("reuters",),
+    "collocations": ("reuters",),
+    "morphological_variations": ("wordnet",),
+    "related_phrases_and_expressions": ("webtext", "punkt"),
+}
+CORPUS_PACKAGES = {"reuters"}
+
+
+class DataBundleError(ValueError):
+    """Raised when a data package can't be found in its source or doesn't match its
+    checksum."""
+
+
+def get_package_path(package):
+    """Returns where a package goes, relative to an NLTK data directory or a mirror."""
+
+    return f"{package.subdirectory}/{package.id}.zip"
+
+
+def get_required_packages(analyzer_names=None, corpus=None):
+    """Returns the data packages that analyzers need.
+    Args:
+        analyzer_names (list): The names of the analyzers. Defaults to every analyzer.
+        corpus (str): The corpus that frequencies and collocations come from. Defaults to
+        the one selected in the environment.
+    """
+
+    from corpus_index import DEFAULT_CORPUS, get_corpus_name
+    from word_analysis import ANALYZERS
+
+    if analyzer_names is None:
+        analyzer_names = [analyzer.name for analyzer in ANALYZERS]
+    uses_default_corpus = (corpus or get_corpus_name()) == DEFAULT_CORPUS
+
+    package_ids = list(BASE_PACKAGES)
+    for name in analyzer_names:
+        for package_id in ANALYZER_PACKAGES[name]:
+            if package_id in CORPUS_PACKAGES and not uses_default_corpus:
+                continue
+            if package_id not in package_ids:
+                package_ids.append(package_id)
+
+    return [PACKAGES[package_id] for package_id in package_ids]
+
+
+def get_nltk_data_directory():
+    """Returns the NLTK data directory that packages get installed to, the same one that
+    NLTK's downloader would pick."""
+
+    from nltk.downloader import Downloader
+
+    return Downloader().default_download_dir()
+
+
+def find_package_path(package):
+    """Returns the path of a package that NLTK can already find, zipped or not, in any of
+    its data directories, or None. This doesn't reach the network."""
+
+    import nltk
+
+    try:
+        pointer = nltk.data.find(f"{package.subdirectory}/{package.id}")
+    except LookupError:
+        return None
+
+    if isinstance(pointer, nltk.data.FileSystemPathPointer):
+        return pointer.path
+
+    return pointer.zipfile.filename
+
+
+def describe_file(path, source, sha256=None):
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "source": source,
+        "installed": time.time(),
+    }
+
+
+def is_entry_valid(entry):
+    """Tells whether the file that a manifest entry describes is still there, unchanged."""
+
+    if entry is None:
+        return False
+
+    try:
+        stat = os.stat(entry["path"])
+    except OSError:
+        return False
+
+    return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+
+def read_bundle_manifest(directory):
+    """Returns the installed packages recorded in the NLTK data directory, by id."""
+
+    try:
+        with open(
+            os.path.join(directory, BUNDLE_MANIFEST_FILENAME), "r", encoding="utf-8"
+        ) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        return {}
+
+    return manifest["packages"]
+
+
+def write_bundle_manifest(directory, packages):
+    manifest = {"format_version": BUNDLE_FORMAT_VERSION, "packages": packages}
+    write_atomically(
+        os.path.join(directory, BUNDLE_MANIFEST_FILENAME),
+        "w",
+        lambda file: json.dump(manifest, file, indent=2, sort_keys=True),
+        "utf-8",
+    )
+
+
+def strip_current_directory(path):
+    """Removes the './' that sha256sum and tar can put in front of relative paths."""
+
+    return path[len("./") :] if path.startswith("./") else path
+
+
+def parse_checksums(text):
+    """Parses the lines written by sha256sum into checksums by relative path."""
+
+    checksums = {}
+    for line in text.splitlines():
+        if line.strip():
+            checksum, path = line.split(maxsplit=1)
+            checksums[strip_current_directory(path.lstrip("*"))] = checksum.lower()
+
+    return checksums
+
+
+def copy_verified(source_file, destination, algorithm, expected):
+    """Copies a package into place through a temporary file, which only gets renamed if its
+    checksum matches.
+    Returns:
+        str: The SHA-256 of the package
+    Raises:
+        DataBundleError: If the checksum doesn't match.
+    """
+
+    digests = {"sha256": hashlib.sha256()}
+    digests.setdefault(algorithm, hashlib.new(algorithm))
+
+    def write(file):
+        for block in iter(lambda: source_file.read(BLOCK_SIZE), b""):
+            for digest in digests.values():
+                digest.update(block)
+            file.write(block)
+
+        if digests[algorithm].hexdigest() != expected.lower():
+            raise DataBundleError(
+                f"The checksum of {os.path.basename(destination)} doesn't match."
+            )
+
+    write_atomically(destination, "wb", write)
+    return digests["sha256"].hexdigest()
+
+
+def install_from_mirror(packages, mirror, directory):
+    try:
+        with open(
+            os.path.join(mirror, CHECKSUMS_FILENAME), "r", encoding="utf-8"
+        ) as file:
+            checksums = parse_checksums(file.read())
+    except FileNotFoundError as error:
+        raise DataBundleError(
+            f"The mirror {mirror} has no {CHECKSUMS_FILENAME} file."
+        ) from error
+
+    def install(package):
+        path = get_package_path(package)
+        if path not in checksums:
+            raise DataBundleError(f"The mirror {mirror} has no checksum for {path}.")
+
+        try:
+            with open(os.path.join(mirror, path), "rb") as source_file:
+                destination = os.path.join(directory, path)
+                sha256 = copy_verified(
+                    source_file, destination, "sha256", checksums[path]
+                )
+        except FileNotFoundError as error:
+            raise DataBundleError(f"The mirror {mirror} has no {path}.") from error
+
+        return package.id, describe_file(destination, mirror, sha256)
+
+    with ThreadPoolExecutor(max_workers=len(packages)) as executor:
+        return dict(executor.map(install, packages))
+
+
+def install_from_tarball(packages, tarball, directory):
+    installed = {}
+
+    with tarfile.open(tarball, "r:*") as archive:
+        members = {
+            strip_current_directory(member.name): member
+            for member in archive.getmembers()
+            if member.isfile()
+        }
+        if CHECKSUMS_FILENAME not in members:
+            raise DataBundleError(f"The tarball {tarball} has no {CHECKSUMS_FILENAME}.")
+        checksums = parse_checksums(
+            archive.extractfile(members[CHECKSUMS_FILENAME]).read().decode("utf-8")
+        )
+
+        for package in packages:
+            path = get_package_path(package)
+            if path not in members or path not in checksums:
+                raise DataBundleError(
+                    f"The tarball {tarball} has no {path}, or no checksum for it."
+                )
+
+            destination = os.path.join(directory, path)
+            sha256 = copy_verified(
+                archive.extractfile(members[path]),
+                destination,
+                "sha256",
+                checksums[path],
+            )
+            installed[package.id] = describe_file(destination, tarball, sha256)
+
+    return installed
+
+
+def install_from_nltk(packages, directory):
+    from urllib.request import urlopen
+
+    from nltk.downloader import Downloader
+
+    # Reading the package index is the only request that isn't made in parallel
+    downloader = Downloader()
+    infos = {package.id: downloader.info(package.id) for package in packages}
+
+    def install(package):
+        info = infos[package.id]
+        destination = os.path.join(directory, get_package_path(package))
+
+        with urlopen(info.url, timeout=DOWNLOAD_TIMEOUT) as response:
+            sha256 = copy_verified(response, destination, "md5", info.checksum)
+
+        return package.id, describe_file(destination, info.url, sha256)
+
+    with ThreadPoolExecutor(max_workers=len(packages)) as executor:
+        return dict(executor.map(install, packages))
+
+
+def install_packages(packages, source=NLTK_SOURCE, directory=None):
+    """Installs data packages from a source and records them in the bundle manifest,
+    replacing any earlier copy.
+    Args:
+        packages (list): The DataPackage of each package to install
+        source (str): 'nltk' for NLTK's download server, or the path of a mirror directory
+        or of a tarball
+        directory (str): The NLTK data directory. Defaults to get_nltk_data_directory().
+    Raises:
+        DataBundleError: If a package is missing from the source or doesn't match its
+        checksum. The packages installed before that are kept.
+    """
+
+    directory = directory or get_nltk_data_directory()
+
+    if not packages:
+        installed = {}
+    elif source == NLTK_SOURCE:
+        installed = install_from_nltk(packages, directory)
+    elif os.path.isdir(source):
+        installed = install_from_mirror(packages, source, directory)
+    elif os.path.isfile(source) and tarfile.is_tarfile(source):
+        installed = install_from_tarball(packages, source, directory)
+    else:
+        raise DataBundleError(
+            f"The data source {source} is neither 'nltk', a directory nor a tarball."
+        )
+
+    write_bundle_manifest(directory, {**read_bundle_manifest(directory), **installed})
+
+
+def ensure_data_packages(packages=None, source=None, directory=None):
+    """Makes sure that data packages are installed. When the bundle manifest says they are,
+    nothing else gets checked. Packages that NLTK already finds get recorded as they are,
+    and the others get installed.
+    Args:
+        packages (list): The DataPackage of each package. Defaults to the packages that the
+        analyzers need.
+        source (str): Where to install missing packages from. Defaults to the
+        WORD_INFO_DATA_SOURCE environment variable, or NLTK's download server.
+        directory (str): The NLTK data directory. Defaults to get_nltk_data_directory().
+    Returns:
+        list: The DataPackage of each package that had to be installed
+    """
+
+    if packages is None:
+        packages = get_required_packages()
+    directory = directory or get_nltk_data_directory()
+
+    manifest = read_bundle_manifest(directory)
+    missing = [
+        package for package in packages if not is_entry_valid(manifest.get(package.id))
+    ]
+    if not missing:
+        return []
+
+    to_install = []
+    for package in missing:
+        path = find_package_path(package)
+        if path is None:
+            to_install.append(package)
+        else:
+            manifest[package.id] = describe_file(path, "preinstalled")
+
+    if len(to_install) < len(missing):
+        write_bundle_manifest(directory, manifest)
+
+    if to_install:
+        install_packages(
+            to_install,
+            source or os.environ.get(DATA_SOURCE_ENV_VAR) or NLTK_SOURCE,
+            directory,
+        )
+
+    return to_install
@@ -0,0 +1,345 @@
+"""This module fetches etymologies from etymonline. Requests go through a pooled session with
+strict timeouts and bounded retries, so a slow or failing server can't stall a run, and are
+spaced out by a rate limiter shared by every thread, and by every worker process of a pool.
+
+Extracted etymologies are kept in an on-disk cache. Words that etymonline doesn't know (404
+responses) are cached as well, for a limited time, while transient failures aren't cached at
+all: they raise EtymologyUnavailableError, so that the analysis goes on without the etymology
+and doesn't store its results either.
+
+Functions:
+extract_etymology(html)
+share_rate_limit(next_slot)
+get_default_fetcher()
+
+Classes:
+EtymologyUnavailableError
+RateLimiter
+EtymologyCache
+EtymologyFetcher
+"""
+
+import functools
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from index_storage import get_data_directory
+
+ETYMOLOGY_BASE_URL = "https://www.etymonline.com/word/"
+ETYMOLOGY_URL_ENV_VAR = "WORD_INFO_ETYMOLOGY_URL"
+ETYMOLOGY_RATE_ENV_VAR = "WORD_INFO_ETYMOLOGY_RATE"
+ETYMOLOGY_SECTION_CLASS = "word__defination--2q7ZH"
+ETYMOLOGY_CACHE_FILENAME = "etymologies.sqlite3"
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 8
+
+# At most this many requests get sent per second, across every thread of a process, or every
+# process of a pool
+DEFAULT_REQUESTS_PER_SECOND = 4
+
+# The slot that share_rate_limit set, if this process is a worker of a pool
+_shared_rate_limit_slot = None
+
+# How long a word that etymonline doesn't know stays cached as such, in seconds
+NEGATIVE_CACHE_TTL = 7 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS etymologies (
+    word TEXT PRIMARY KEY,
+    etymology TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class EtymologyUnavailableError(Exception):
+    """Raised when an etymology couldn't be fetched because of a timeout, a connection error
+    or a server error that outlasted the retries. Fetching it again later may succeed.
+    """
+
+
+def extract_etymology(html):
+    """Returns the etymology text of an etymonline page, or None if the page doesn't have one.
+    Only the page's sections get parsed."""
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("section"))
+    etymology_section = soup.find("section", {"class": ETYMOLOGY_SECTION_CLASS})
+
+    if etymology_section:
+        return etymology_section.get_text(strip=True)
+
+    return None
+
+
+class RateLimiter:
+    """Spaces out calls to wait() so that at most 'rate' of them return per second, across
+    the threads of a process, or across processes when they share the next slot."""
+
+    def __init__(self, rate, next_slot=None):
+        """Creates a limiter.
+        Args:
+            rate (float): The number of calls per second, or None for no limit
+            next_slot (multiprocessing.Value): A 'd' value created before the processes that
+            share it. Defaults to one that only this process uses.
+        """
+
+        self.interval = 1 / rate if rate else 0
+        self._next_slot = next_slot or multiprocessing.Value("d", 0.0)
+
+    def wait(self):
+        with self._next_slot.get_lock():
+            now = time.monotonic()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EtymologyCache:
+    """Persistent cache of extracted etymologies, including the words that have none.
+
+    Like ResultCache, it can be shared by threads and passed to worker processes: each process
+    opens its own connection to the database.
+    """
+
+    def __init__(self, path=None, negative_ttl=NEGATIVE_CACHE_TTL):
+        self.path = path or os.path.join(get_data_directory(), ETYMOLOGY_CACHE_FILENAME)
+        self.negative_ttl = negative_ttl
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "negative_ttl": self.negative_ttl}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["negative_ttl"])
+
+    def _connect(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def get(self, word):
+        """Looks a word up.
+        Returns:
+            tuple: (True, etymology) if the word is cached, where the etymology is None for
+            words that etymonline doesn't know, and (False, None) otherwise
+        """
+
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT etymology, fetched_at FROM etymologies WHERE word = ?",
+                    (word,),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return False, None
+
+        etymology, fetched_at = row
+        if etymology is None and time.time() - fetched_at > self.negative_ttl:
+            return False, None
+
+        return True, etymology
+
+    def put(self, word, etymology):
+        """Stores the etymology of a word, or None for a word that etymonline doesn't know."""
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO etymologies VALUES (?, ?, ?)",
+                    (word, etymology, time.time()),
+                )
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM etymologies")
+
+
+class EtymologyFetcher:
+    """Fetches etymologies through a pooled, rate-limited HTTP session and a persistent cache."""
+
+    def __init__(
+        self,
+        base_url=ETYMOLOGY_BASE_URL,
+        cache=None,
+        requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        max_retries=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        rate_limit_slot=None,
+    ):
+        """Creates a fetcher.
+        Args:
+            base_url (str): The URL that words get appended to
+            cache (EtymologyCache): The cache to read and fill. Defaults to the one in the
+            data directory; pass False to disable caching.
+            requests_per_second (float): The rate limit, or None for no limit
+            timeout (tuple): The connect and read timeouts, in seconds
+            max_retries (int): How many times a failed request gets retried
+            backoff_factor (float): The base of the exponential delay between retries
+            rate_limit_slot (multiprocessing.Value): Shares the rate limit with the fetchers
+            of other processes, as RateLimiter describes
+        """
+
+        self.base_url = base_url
+        self.cache = EtymologyCache() if cache is None else cache or None
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_second, rate_limit_slot)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled HTTP session. It gets created, and requests imported, on the first
+        request, so that runs served from the stores never load them."""
+
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset({"GET"}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_SIZE,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+
+        return self._session
+
+    def _download(self, word):
+        self.rate_limiter.wait()
+        response = self.session.get(
+            self.base_url + quote(word, safe=""), timeout=self.timeout
+        )
+
+        if response.status_code == 200:
+            return extract_etymology(response.text)
+        # A 404 is a definite answer, which is worth caching; anything else is not
+        if response.status_code == 404:
+            return None
+
+        raise EtymologyUnavailableError(
+            f"Could not fetch the etymology of '{word}': etymonline answered with the "
+            f"status {response.status_code}"
+        )
+
+    def fetch(self, word):
+        """Returns the etymology of a word, or None if etymonline doesn't have one.
+        Raises:
+            EtymologyUnavailableError: If it couldn't be fetched this time.
+        """
+
+        if self.cache:
+            found, etymology = self.cache.get(word)
+            if found:
+                return etymology
+
+        import requests
+
+        try:
+            etymology = self._download(word)
+        except requests.RequestException as exception:
+            raise EtymologyUnavailableError(
+                f"Could not fetch the etymology of '{word}': {exception}"
+            ) from exception
+
+        if self.cache:
+            self.cache.put(word, etymology)
+
+        return etymology
+
+    def _fetch_or_log(self, word):
+        try:
+            return self.fetch(word)
+        except EtymologyUnavailableError as error:
+            logging.warning(error)
+            return None
+
+    def fetch_many(self, words, max_workers=POOL_SIZE):
+        """Fetches the etymologies of many words concurrently, within the rate limit. The
+        etymologies that couldn't be fetched get logged.
+        Returns:
+            dict: The etymology of each word, or None
+        """
+
+        words = list(dict.fromkeys(words))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(words, executor.map(self._fetch_or_log, words)))
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+def share_rate_limit(next_slot):
+    """Makes the default fetcher of this process share its rate limit with the other processes
+    that were given the same slot, as the workers of a pool are, so that together they stay
+    within it.
+    Args:
+        next_slot (multiprocessing.Value): The 'd' value that the processes share
+    """
+
+    global _shared_rate_limit_slot
+
+    _shared_rate_limit_slot = next_slot
+    # A forked worker may have inherited its parent's fetcher
+    get_default_fetcher.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_fetcher():
+    """Returns the fetcher shared by the analyses of a process. The WORD_INFO_ETYMOLOGY_URL and
+    WORD_INFO_ETYMOLOGY_RATE environment variables point it at a mirror of etymonline and set
+    its rate limit (0 for none), which the workers of a pool share."""
+
+    rate = os.environ.get(ETYMOLOGY_RATE_ENV_VAR)
+    return EtymologyFetcher(
+        base_url=os.environ.get(ETYMOLOGY_URL_ENV_VAR, ETYMOLOGY_BASE_URL),
+        requests_per_second=(
+            DEFAULT_REQUESTS_PER_SECOND if rate is None else float(rate) or None
+        ),
+        rate_limit_slot=_shared_rate_limit_slot,
+    )
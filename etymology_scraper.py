@@ -1,17 +1,20 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 
+from etymology_fetcher import EtymologyUnavailableError, get_default_fetcher
+from etymology_store import get_default_store
+from word_analysis import AnalyzerUnavailableError
+
+# When this environment variable is set, etymologies only come from the offline store
+OFFLINE_ENV_VAR = "WORD_INFO_OFFLINE"
 
-def get_etymology(word):
-    url = f"https://www.etymonline.com/word/{word}"
-    response = requests.get(url)
-    etymology_text = None
 
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        etymology_section = soup.find("section", {"class": "word__defination--2q7ZH"})
+def get_etymology(word):
+    found, etymology = get_default_store().get(word)
 
-        if etymology_section:
-            etymology_text = etymology_section.get_text(strip=True)
+    if found or os.environ.get(OFFLINE_ENV_VAR):
+        return etymology
 
-    return etymology_text
+    try:
+        return get_default_fetcher().fetch(word)
+    except EtymologyUnavailableError as error:
+        raise AnalyzerUnavailableError(str(error)) from error
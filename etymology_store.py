@@ -0,0 +1,308 @@
+"""This module provides an offline store of etymologies, imported from saved etymonline pages,
+so that analyses don't need to reach etymonline at all.
+
+Pages can be imported from a directory or from a zip or tar archive; each page is named after
+its word (such as 'white.html'). Pages are read in chunks and fed to a small streaming parser
+that only collects the text of the etymology section and stops reading as soon as that section
+ends, instead of building the tree of the whole page.
+
+Functions:
+extract_etymology_streaming(chunks)
+iter_saved_pages(source)
+import_etymology_pages(source, store)
+get_default_store()
+
+Classes:
+EtymologySectionParser
+EtymologyStore
+ImportReport
+"""
+
+import codecs
+import functools
+import os
+import pathlib
+import sqlite3
+import tarfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from etymology_fetcher import ETYMOLOGY_SECTION_CLASS
+from index_storage import get_data_directory
+
+ETYMOLOGY_STORE_FILENAME = "etymology_store.sqlite3"
+PAGE_EXTENSIONS = (".html", ".htm")
+READ_CHUNK_SIZE = 64 * 1024
+
+# How many entries get written per transaction during an import
+IMPORT_BATCH_SIZE = 1000
+
+# Elements whose text get_text() of BeautifulSoup leaves out as well
+SKIPPED_ELEMENTS = {"script", "style", "template"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS etymologies (
+    word TEXT PRIMARY KEY,
+    etymology TEXT
+) WITHOUT ROWID;
+"""
+
+
+class ImportReport(namedtuple("ImportReport", ["pages", "etymologies", "seconds"])):
+    """How many pages an import read, how many had an etymology, and how long it took."""
+
+    __slots__ = ()
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+class EtymologySectionParser(HTMLParser):
+    """Collects the text of the etymology section of a page, the way
+    BeautifulSoup's get_text(strip=True) would, and notes when the section has ended."""
+
+    def __init__(self):
+        super().__init__()
+        self.strings = []
+        self.text = []
+        self.section_depth = 0
+        self.skipped_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_text()
+        if self.done:
+            return
+
+        if tag == "section":
+            if self.section_depth:
+                self.section_depth += 1
+            elif ETYMOLOGY_SECTION_CLASS in (dict(attrs).get("class") or "").split():
+                self.section_depth = 1
+        elif self.section_depth and tag in SKIPPED_ELEMENTS:
+            self.skipped_depth += 1
+
+    def handle_endtag(self, tag):
+        self.flush_text()
+        if not self.section_depth or self.done:
+            return
+
+        if tag == "section":
+            self.section_depth -= 1
+            self.done = not self.section_depth
+        elif tag in SKIPPED_ELEMENTS and self.skipped_depth:
+            self.skipped_depth -= 1
+
+    def handle_data(self, data):
+        if self.section_depth and not self.skipped_depth and not self.done:
+            self.text.append(data)
+
+    def flush_text(self):
+        # A text node can reach handle_data in pieces, when it spans chunks
+        string = "".join(self.text).strip()
+        if string:
+            self.strings.append(string)
+        self.text.clear()
+
+    @property
+    def etymology(self):
+        self.flush_text()
+        return "".join(self.strings) or None
+
+
+def extract_etymology_streaming(chunks):
+    """Extracts the etymology from a page read as chunks of bytes, without reading the chunks
+    that come after the etymology section.
+    Returns:
+        str: The etymology, or None if the page doesn't have one
+    """
+
+    parser = EtymologySectionParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            return parser.etymology
+
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.etymology
+
+
+def read_chunks(file):
+    return iter(lambda: file.read(READ_CHUNK_SIZE), b"")
+
+
+def word_from_page_name(name):
+    """Returns the word of a saved page, or None if the file isn't a page."""
+
+    base, extension = os.path.splitext(os.path.basename(name))
+    if extension.lower() not in PAGE_EXTENSIONS or not base:
+        return None
+
+    return unquote(base)
+
+
+def iter_saved_pages(source):
+    """Yields the word and the open binary file of every page saved in a directory or archive.
+    Args:
+        source (str): A directory (searched recursively), or a zip or tar archive
+    Raises:
+        ValueError: If the source is neither a directory nor a supported archive
+    """
+
+    if os.path.isdir(source):
+        for directory, _, filenames in os.walk(source):
+            for filename in sorted(filenames):
+                word = word_from_page_name(filename)
+                if word:
+                    with open(os.path.join(directory, filename), "rb") as file:
+                        yield word, file
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                word = word_from_page_name(member.filename)
+                if word and not member.is_dir():
+                    with archive.open(member) as file:
+                        yield word, file
+    elif tarfile.is_tarfile(source):
+        # Streaming mode reads the members in order, which suits compressed archives
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                word = word_from_page_name(member.name)
+                if word and member.isfile():
+                    with archive.extractfile(member) as file:
+                        yield word, file
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip or tar archive.")
+
+
+class EtymologyStore:
+    """Local store of imported etymologies, looked up through the primary key of an SQLite
+    table. Lookups open the database read-only, and find nothing if it doesn't exist."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_data_directory(), ETYMOLOGY_STORE_FILENAME)
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _connect(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            if not os.path.exists(self.path):
+                return None
+            self._connection = sqlite3.connect(
+                f"{pathlib.Path(self.path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def get(self, word):
+        """Looks a word up.
+        Returns:
+            tuple: (True, etymology) if the word was imported, where the etymology is None for
+            pages without one, and (False, None) otherwise
+        """
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return False, None
+            row = connection.execute(
+                "SELECT etymology FROM etymologies WHERE word = ?", (word,)
+            ).fetchone()
+
+        return (False, None) if row is None else (True, row[0])
+
+    def write(self, entries):
+        """Stores (word, etymology) pairs, replacing the words that were already stored.
+        Returns:
+            int: The number of entries written
+        """
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        written = 0
+        try:
+            connection.executescript(SCHEMA)
+            batch = []
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    written += self._write_batch(connection, batch)
+            written += self._write_batch(connection, batch)
+        finally:
+            connection.close()
+
+        # Reopen the database the next time, so that lookups see the imported entries
+        with self._lock:
+            self._connection = None
+
+        return written
+
+    @staticmethod
+    def _write_batch(connection, batch):
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO etymologies VALUES (?, ?)", batch
+            )
+        written = len(batch)
+        batch.clear()
+        return written
+
+    def __len__(self):
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return 0
+            return connection.execute("SELECT COUNT(*) FROM etymologies").fetchone()[0]
+
+
+def import_etymology_pages(source, store=None):
+    """Extracts the etymologies of the pages saved in a directory or archive into a store.
+    Args:
+        source (str): A directory, or a zip or tar archive, of pages named after their words
+        store (EtymologyStore): The store to fill. Defaults to the one in the data directory.
+    Returns:
+        ImportReport: How many pages were read, how many had an etymology, and how long it took
+    """
+
+    if store is None:
+        store = EtymologyStore()
+    counts = {"pages": 0, "etymologies": 0}
+
+    def extract_entries():
+        for word, file in iter_saved_pages(source):
+            etymology = extract_etymology_streaming(read_chunks(file))
+            counts["pages"] += 1
+            counts["etymologies"] += etymology is not None
+            yield word, etymology
+
+    started = time.perf_counter()
+    store.write(extract_entries())
+
+    return ImportReport(
+        counts["pages"], counts["etymologies"], time.perf_counter() - started
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_store():
+    """Returns the store in the data directory, shared by the analyses of a process."""
+
+    return EtymologyStore()
@@ -0,0 +1,290 @@
+"""This module provides a persisted approximate-match index that suggests the known words
+closest to a misspelled one, without computing the edit distance to every word.
+
+Every word is broken into its distinct padded letter pairs, and an inverted index maps each
+pair to the words that contain it. A query only looks at the words that share a letter pair
+with it. The number of shared pairs gives a lower bound on the edit distance, so candidates
+are verified in order of that bound with a bounded Damerau-Levenshtein distance, and the
+search stops as soon as no remaining candidate can beat the suggestions already found.
+
+Functions:
+get_letter_pairs(word)
+bounded_edit_distance(first, second, bound)
+write_fuzzy_index(directory, words, source)
+load_fuzzy_index(name, source, get_words)
+get_lemma_index()
+
+Classes:
+FuzzyIndex
+"""
+
+import functools
+import os
+from bisect import insort
+from collections import Counter
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    read_strings,
+    write_array,
+    write_manifest,
+    write_strings,
+)
+from wordnet_snapshot import get_wordnet
+
+FUZZY_INDEX_FORMAT_VERSION = 1
+FUZZY_INDEXES_DIRECTORY = "fuzzy"
+
+VOCABULARY_FILENAME = "vocabulary.txt"
+LETTER_PAIRS_FILENAME = "letter_pairs.txt"
+POSTING_OFFSETS_FILENAME = "posting_offsets.bin"
+POSTINGS_FILENAME = "postings.bin"
+PAIR_COUNTS_FILENAME = "pair_counts.bin"
+
+# Control characters that can't appear in a word mark where words start and end
+WORD_START = "\x02"
+WORD_END = "\x03"
+
+# A single edit destroys at most this many letter pairs of a word (a transposition
+# touches three of them)
+PAIRS_DESTROYED_PER_EDIT = 3
+
+
+def get_letter_pairs(word):
+    """Returns the distinct letter pairs of a word, padded so that its first and last
+    letters form pairs of their own."""
+
+    padded = f"{WORD_START}{word}{WORD_END}"
+    return {padded[index : index + 2] for index in range(len(padded) - 1)}
+
+
+def bounded_edit_distance(first, second, bound):
+    """Computes the Damerau-Levenshtein distance between two strings the same way as
+    nltk's edit_distance with transpositions, but gives up as soon as the distance is
+    known to exceed 'bound'.
+
+    Returns:
+        int: The distance, or bound + 1 if it is larger than 'bound'
+    """
+
+    first_length, second_length = len(first), len(second)
+    if abs(first_length - second_length) > bound:
+        return bound + 1
+
+    rows = [list(range(second_length + 1))]
+    last_row_of_character = {}
+
+    for i in range(1, first_length + 1):
+        previous_row = rows[i - 1]
+        row = [i] + [0] * second_length
+        first_character = first[i - 1]
+        last_matching_column = 0
+
+        for j in range(1, second_length + 1):
+            second_character = second[j - 1]
+            last_left = last_row_of_character.get(second_character, 0)
+            last_right = last_matching_column
+            if first_character == second_character:
+                last_matching_column = j
+
+            substitution = previous_row[j - 1] + (first_character != second_character)
+            distance = min(previous_row[j] + 1, row[j - 1] + 1, substitution)
+
+            if last_left > 0 and last_right > 0:
+                transposition = (
+                    rows[last_left - 1][last_right - 1]
+                    + i
+                    - last_left
+                    + j
+                    - last_right
+                    - 1
+                )
+                distance = min(distance, transposition)
+
+            row[j] = distance
+
+        rows.append(row)
+        last_row_of_character[first_character] = i
+
+        # The minimum of a row never decreases from one row to the next
+        if min(row) > bound:
+            return bound + 1
+
+    return min(rows[first_length][second_length], bound + 1)
+
+
+def write_fuzzy_index(directory, words, source):
+    """Writes the fuzzy index of 'words' to 'directory'.
+    Args:
+        directory (str): The directory that will hold the index files
+        words (iterable): The words that can be suggested
+        source (dict): JSON-serializable description of where the words came from
+    """
+
+    vocabulary = sorted(set(words))
+    postings_by_pair = {}
+    pair_counts = []
+
+    for word_id, word in enumerate(vocabulary):
+        letter_pairs = get_letter_pairs(word)
+        pair_counts.append(len(letter_pairs))
+        for letter_pair in letter_pairs:
+            postings_by_pair.setdefault(letter_pair, []).append(word_id)
+
+    letter_pairs = sorted(postings_by_pair)
+    posting_offsets = [0]
+    for letter_pair in letter_pairs:
+        posting_offsets.append(posting_offsets[-1] + len(postings_by_pair[letter_pair]))
+
+    os.makedirs(directory, exist_ok=True)
+    write_strings(os.path.join(directory, VOCABULARY_FILENAME), vocabulary)
+    write_strings(os.path.join(directory, LETTER_PAIRS_FILENAME), letter_pairs)
+    write_array(os.path.join(directory, POSTING_OFFSETS_FILENAME), "Q", posting_offsets)
+    write_array(
+        os.path.join(directory, POSTINGS_FILENAME),
+        "I",
+        (
+            word_id
+            for letter_pair in letter_pairs
+            for word_id in postings_by_pair[letter_pair]
+        ),
+    )
+    write_array(os.path.join(directory, PAIR_COUNTS_FILENAME), "H", pair_counts)
+    write_manifest(
+        directory,
+        {
+            "format_version": FUZZY_INDEX_FORMAT_VERSION,
+            "source": source,
+            "vocabulary_size": len(vocabulary),
+        },
+    )
+
+
+class FuzzyIndex:
+    """Read-only view over a fuzzy index written by write_fuzzy_index."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.vocabulary = read_strings(os.path.join(directory, VOCABULARY_FILENAME))
+        self.letter_pairs = {
+            letter_pair: index
+            for index, letter_pair in enumerate(
+                read_strings(os.path.join(directory, LETTER_PAIRS_FILENAME))
+            )
+        }
+        self.posting_offsets = map_array(
+            os.path.join(directory, POSTING_OFFSETS_FILENAME), "Q"
+        )
+        self.postings = map_array(os.path.join(directory, POSTINGS_FILENAME), "I")
+        self.pair_counts = map_array(os.path.join(directory, PAIR_COUNTS_FILENAME), "H")
+
+    def count_shared_letter_pairs(self, query_pairs):
+        shared_counts = Counter()
+
+        for letter_pair in query_pairs:
+            index = self.letter_pairs.get(letter_pair)
+            if index is not None:
+                shared_counts.update(
+                    self.postings[
+                        self.posting_offsets[index] : self.posting_offsets[index + 1]
+                    ]
+                )
+
+        return shared_counts
+
+    def closest(self, word, limit=3, max_distance=None):
+        """Returns up to 'limit' words of the index that are closest to 'word', nearest first.
+        Only words that share at least one letter pair with 'word' are considered.
+        Args:
+            word (str): The (possibly misspelled) word
+            limit (int): The maximum number of suggestions
+            max_distance (int): If passed, words further away than this are never suggested
+        """
+
+        if limit <= 0:
+            return []
+
+        query_pairs = get_letter_pairs(word)
+        shared_counts = self.count_shared_letter_pairs(query_pairs)
+
+        candidates = []
+        for word_id, shared in shared_counts.items():
+            missing = max(len(query_pairs), self.pair_counts[word_id]) - shared
+            lower_bound = max(
+                -(-missing // PAIRS_DESTROYED_PER_EDIT),
+                abs(len(word) - len(self.vocabulary[word_id])),
+            )
+            if max_distance is None or lower_bound <= max_distance:
+                candidates.append((lower_bound, -shared, self.vocabulary[word_id]))
+
+        candidates.sort()
+
+        # The best suggestions found so far, as sorted (distance, -shared, word) keys
+        best = []
+        for lower_bound, negated_shared, candidate in candidates:
+            if len(best) == limit:
+                worst_distance = best[-1][0]
+                if lower_bound > worst_distance:
+                    break
+                bound = worst_distance
+            else:
+                bound = max(len(word), len(candidate))
+
+            if max_distance is not None:
+                bound = min(bound, max_distance)
+
+            distance = bounded_edit_distance(word, candidate, bound)
+            if distance <= bound:
+                insort(best, (distance, negated_shared, candidate))
+                del best[limit:]
+
+        return [candidate for _, _, candidate in best]
+
+
+def load_fuzzy_index(name, source, get_words):
+    """Loads the fuzzy index called 'name', building and persisting it first if it is
+    missing or was built from a different source or index format.
+    Args:
+        name (str): The name under which the index is stored
+        source (dict): JSON-serializable description of the words and their version
+        get_words (callable): Returns the words to index, only called when the index has
+        to be built
+    """
+
+    directory = get_index_directory(os.path.join(FUZZY_INDEXES_DIRECTORY, name))
+    expected = {"format_version": FUZZY_INDEX_FORMAT_VERSION, "source": source}
+
+    ensure_index(
+        directory,
+        expected,
+        lambda build_directory: write_fuzzy_index(build_directory, get_words(), source),
+    )
+
+    return FuzzyIndex(directory)
+
+
+def get_all_lemma_names():
+    return (
+        lemma.name()
+        for synset in get_wordnet().all_synsets()
+        for lemma in synset.lemmas()
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_lemma_index():
+    """Returns the fuzzy index of every WordNet lemma name, built on first use."""
+
+    # Imported here, so that importing utils for the traversal doesn't load NLTK
+    import nltk
+
+    source = {
+        "wordnet_version": get_wordnet().get_version(),
+        "nltk_version": nltk.__version__,
+    }
+
+    return load_fuzzy_index("wordnet_lemmas", source, get_all_lemma_names)
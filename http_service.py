@@ -0,0 +1,476 @@
+"""This module serves the analyses over a local HTTP API from a single long-running process,
+which loads WordNet, the corpus indexes and the page template once and keeps them warm.
+
+The connections are handled on an asyncio event loop, while the analyses and the page
+rendering run on a bounded pool of threads. Concurrent requests for the same word share a
+single analysis, and when too many words are already waiting, new ones are turned away with
+503 instead of queuing without bound. The endpoints are:
+
+    GET /words/<word>   The results of analyze_word, as JSON
+    GET /pages/<word>   The page of the word, as HTML
+    GET /styles.css     The stylesheet of the pages
+    GET /health         Whether the service is up
+    GET /metrics        Request counts and latencies, analyses run and coalesced, and the
+                        statistics of the analyzers when instrumentation is enabled
+
+Analysis results are encoded with result_serialization, so the sets and tuples that the
+analyzers return can be rebuilt with decode_analysis.
+
+Functions:
+serve(host, port, cache, threads, max_pending)
+
+Classes:
+HTTPError
+ServiceMetrics
+WordService
+"""
+
+import asyncio
+import contextlib
+import copy
+import logging
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+import instrumentation
+from cli import generate_html_content, get_template
+from output_writer import OUTPUT_DIRECTORY, STYLESHEET_FILENAME
+from result_cache import analyze_word_with_cache, normalize_word
+from result_serialization import canonical_json, to_json_value
+from utils import WordNotFoundError, handle_word_not_found
+from word_analysis import WordAnalysisError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_SERVICE_THREADS = 4
+
+# How many distinct words can be waiting for, or going through, an analysis at once
+DEFAULT_MAX_PENDING = 64
+
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADERS = 100
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+HTML_CONTENT_TYPE = "text/html; charset=utf-8"
+CSS_CONTENT_TYPE = "text/css; charset=utf-8"
+
+# The first component of the paths that get counted separately in the metrics
+ROUTES = ("health", "metrics", STYLESHEET_FILENAME, "words", "pages")
+
+
+class HTTPError(Exception):
+    """An error to answer a request with, as a status and a message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceMetrics:
+    """Counts what the service did since it started."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = Counter()
+        self.latencies = {}
+        self.analyses = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def record_request(self, route, status, seconds):
+        self.requests[f"{route} {status}"] += 1
+
+        latency = self.latencies.setdefault(
+            route, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        latency["count"] += 1
+        latency["total_seconds"] += seconds
+        latency["max_seconds"] = max(latency["max_seconds"], seconds)
+
+    def to_dict(self):
+        return {
+            "uptime_seconds": time.monotonic() - self.started,
+            "requests": dict(self.requests),
+            "latencies": {
+                route: dict(latency) for route, latency in self.latencies.items()
+            },
+            "analyses": self.analyses,
+            "coalesced_requests": self.coalesced,
+            "rejected_requests": self.rejected,
+        }
+
+
+def encode_json(value):
+    return canonical_json(value).encode("utf-8")
+
+
+def encode_error(error):
+    return encode_json({"error": str(error)})
+
+
+class WordService:
+    """Answers the requests of the HTTP API. Its coroutines must run on a single event loop,
+    which owns the bookkeeping of the pending analyses."""
+
+    def __init__(
+        self,
+        cache=None,
+        threads=DEFAULT_SERVICE_THREADS,
+        max_pending=DEFAULT_MAX_PENDING,
+    ):
+        """Creates the service.
+        Args:
+            cache (ResultCache): The cache of analysis results to read and fill, if any
+            threads (int): How many analyses and pages can be worked on at the same time
+            max_pending (int): How many distinct words can wait for an analysis before new
+            ones get turned away
+        """
+
+        self.cache = cache
+        self.threads = threads
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="word-service"
+        )
+        self.pending = {}
+        self.connections = 0
+        self.metrics = ServiceMetrics()
+        self.stylesheet = None
+
+    def warm_up(self):
+        """Loads everything that the analyses and the pages need, so that the first requests
+        don't pay for it."""
+
+        from data_bundle import ensure_data_packages
+        from fuzzy_index import get_lemma_index
+        from sentence_index import get_webtext_index
+        from worker_pool import load_shared_state
+
+        ensure_data_packages()
+        load_shared_state()
+        get_lemma_index()
+        get_webtext_index()
+        get_template()
+
+        with open(os.path.join(OUTPUT_DIRECTORY, STYLESHEET_FILENAME), "rb") as file:
+            self.stylesheet = file.read()
+
+    def close(self):
+        # Analyses that haven't started can only be cancelled from Python 3.9 on; before, they
+        # get finished first
+        if sys.version_info >= (3, 9):
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            self.executor.shutdown(wait=True)
+
+    def analyze_in_thread(self, word):
+        # Unknown words raise WordNotFoundError here, instead of the generic error that
+        # analyze_word wraps every failure in
+        handle_word_not_found(word)
+        return analyze_word_with_cache(word, self.cache)
+
+    def render_in_thread(self, word, analysis_results):
+        # Rendering adds the word to its synonyms, and the results may be shared with
+        # coalesced requests
+        return "".join(
+            generate_html_content(
+                word, copy.deepcopy(analysis_results), f"/{STYLESHEET_FILENAME}"
+            )
+        )
+
+    async def analyze(self, word):
+        """Returns the analysis results of a word. A word that is already being analyzed
+        gets the results of that analysis.
+        Raises:
+            HTTPError: If too many words are waiting for an analysis already.
+        """
+
+        word = normalize_word(word)
+        if not word:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "The word is empty.")
+
+        future = self.pending.get(word)
+        if future is not None:
+            self.metrics.coalesced += 1
+        else:
+            if len(self.pending) >= self.max_pending:
+                self.metrics.rejected += 1
+                raise HTTPError(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    "Too many words are being analyzed, try again later.",
+                )
+
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, self.analyze_in_thread, word
+            )
+            self.pending[word] = future
+            future.add_done_callback(lambda done: self.finish_analysis(word, done))
+            self.metrics.analyses += 1
+
+        # A client that goes away must not cancel the analysis that others wait for
+        return await asyncio.shield(future)
+
+    def finish_analysis(self, word, future):
+        self.pending.pop(word, None)
+        if not future.cancelled():
+            # Marks the error as retrieved even if every client went away meanwhile
+            future.exception()
+
+    async def render(self, word):
+        analysis_results = await self.analyze(word)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.render_in_thread, normalize_word(word), analysis_results
+        )
+
+    def get_metrics(self):
+        metrics = self.metrics.to_dict()
+        metrics.update(
+            pending_analyses=len(self.pending),
+            open_connections=self.connections,
+            threads=self.threads,
+        )
+
+        collector = instrumentation.get_instrumentation()
+        if collector is not None:
+            metrics["analyzers"] = collector.stats()
+
+        return metrics
+
+    async def respond(self, method, target):
+        """Answers a request.
+        Returns:
+            tuple: The route for the metrics, the status, the content type and the body
+        """
+
+        path = unquote(urlsplit(target).path)
+        route = path.split("/")[1]
+        if route not in ROUTES:
+            route = "unknown"
+
+        try:
+            if method not in ("GET", "HEAD"):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Only GET is supported.")
+
+            if path == "/health":
+                return (
+                    route,
+                    HTTPStatus.OK,
+                    JSON_CONTENT_TYPE,
+                    encode_json({"status": "ok"}),
+                )
+
+            if path == "/metrics":
+                return (
+                    route,
+                    HTTPStatus.OK,
+                    JSON_CONTENT_TYPE,
+                    encode_json(self.get_metrics()),
+                )
+
+            if path == f"/{STYLESHEET_FILENAME}" and self.stylesheet is not None:
+                return route, HTTPStatus.OK, CSS_CONTENT_TYPE, self.stylesheet
+
+            if path.startswith("/words/"):
+                word = path[len("/words/") :]
+                analysis_results = await self.analyze(word)
+                return (
+                    route,
+                    HTTPStatus.OK,
+                    JSON_CONTENT_TYPE,
+                    encode_json(
+                        {"word": word, "results": to_json_value(analysis_results)}
+                    ),
+                )
+
+            if path.startswith("/pages/"):
+                html = await self.render(path[len("/pages/") :])
+                return route, HTTPStatus.OK, HTML_CONTENT_TYPE, html.encode("utf-8")
+
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Nothing is served at {path}.")
+        except HTTPError as error:
+            return route, error.status, JSON_CONTENT_TYPE, encode_error(error)
+        except WordNotFoundError as error:
+            return route, HTTPStatus.NOT_FOUND, JSON_CONTENT_TYPE, encode_error(error)
+        except WordAnalysisError as error:
+            return (
+                route,
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                JSON_CONTENT_TYPE,
+                encode_error(error),
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            # Errors from outside analyze_word, such as those of the result cache or of the
+            # rendering, still get a response and a metric
+            logging.exception(f"{method} {target} failed")
+            return (
+                route,
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                JSON_CONTENT_TYPE,
+                encode_error(error),
+            )
+
+    async def handle_connection(self, reader, writer):
+        """Answers the requests of a connection until the client closes it or stops keeping
+        it alive."""
+
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as error:
+                    writer.write(
+                        format_response(
+                            HTTPStatus.BAD_REQUEST,
+                            JSON_CONTENT_TYPE,
+                            encode_error(error),
+                            keep_alive=False,
+                        )
+                    )
+                    await writer.drain()
+                    break
+
+                if request is None:
+                    break
+
+                method, target, version, headers = request
+                started = time.perf_counter()
+                route, status, content_type, body = await self.respond(method, target)
+                keep_alive = should_keep_alive(version, headers)
+
+                writer.write(
+                    format_response(
+                        status, content_type, body, keep_alive, method == "HEAD"
+                    )
+                )
+                await writer.drain()
+                self.metrics.record_request(
+                    route, int(status), time.perf_counter() - started
+                )
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Starts listening, and returns the asyncio server."""
+
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def read_request(reader):
+    """Reads the request line and the headers of a request.
+    Returns:
+        tuple: The method, the target, the HTTP version and the headers, by lowercase name,
+        or None when the client closed the connection or let it idle
+    Raises:
+        ValueError: If the request is malformed.
+    """
+
+    try:
+        line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if not line:
+        return None
+
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise ValueError("Malformed request line.")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) == MAX_HEADERS:
+            raise ValueError("Too many headers.")
+
+        name, separator, value = line.decode("latin-1").partition(":")
+        if not separator:
+            raise ValueError("Malformed header.")
+        headers[name.strip().lower()] = value.strip()
+
+    return parts[0], parts[1], parts[2], headers
+
+
+def should_keep_alive(version, headers):
+    # The service never reads request bodies, so whatever follows one can't be parsed
+    if "content-length" in headers or "transfer-encoding" in headers:
+        return False
+
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+
+    return connection != "close"
+
+
+def format_response(status, content_type, body, keep_alive, omit_body=False):
+    status = HTTPStatus(status)
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    ).encode("latin-1")
+
+    return head if omit_body else head + body
+
+
+async def run_service(service, host, port):
+    server = await service.start(host, port)
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        # Signal handlers can't be installed on every platform, where Ctrl+C still interrupts
+        with contextlib.suppress(NotImplementedError, RuntimeError, ValueError):
+            loop.add_signal_handler(signal_number, stop.set)
+
+    address = server.sockets[0].getsockname()
+    print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+
+    async with server:
+        await stop.wait()
+
+
+def serve(
+    host=DEFAULT_HOST,
+    port=DEFAULT_PORT,
+    cache=None,
+    threads=DEFAULT_SERVICE_THREADS,
+    max_pending=DEFAULT_MAX_PENDING,
+):
+    """Loads everything the analyses need, then serves the HTTP API until interrupted.
+    Args:
+        host (str): The address to listen on
+        port (int): The port to listen on
+        cache (ResultCache): The cache of analysis results to read and fill, if any
+        threads (int): How many analyses and pages can be worked on at the same time
+        max_pending (int): How many distinct words can wait for an analysis before new ones
+        get turned away
+    """
+
+    service = WordService(cache, threads, max_pending)
+    service.warm_up()
+
+    try:
+        asyncio.run(run_service(service, host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
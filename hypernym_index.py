@@ -0,0 +1,432 @@
+"""This module precomputes the transitive closure of the WordNet noun and verb hierarchies, so
+that ancestry questions ('is a dog a kind of animal?') are answered from labels instead of by
+walking the hypernyms of a synset up to the root every time.
+
+The hierarchies are directed acyclic graphs, where a synset is linked to its hypernyms and
+instance hypernyms. The index picks a spanning tree of each (a synset's first hypernym is its
+parent in the tree) and numbers the synsets in the post-order of a depth-first walk of the
+tree, so that the descendants of a synset in the tree are a range of numbers. The few synsets
+that have several hypernyms add the ranges of their descendants to those of every other
+hypernym, and the ranges of each synset get merged, which leaves most synsets with a single
+range and the rest with a handful. A synset is then a hyponym of another when its number
+falls in one of the other's ranges, which is a bisection.
+
+Alongside those ranges, the index stores the hypernyms and hyponyms of every synset and the
+depth of every synset (its longest path to a root, as NLTK's max_depth), which answer the
+full hypernym paths, the lowest common hypernyms and bounded-depth hyponym trees by visiting
+only the synsets that the answer is made of.
+
+Synsets are identified by their names, such as 'dog.n.01'.
+
+Functions:
+merge_ranges(ranges)
+write_hypernym_index(directory, wordnet, source)
+get_hypernym_index()
+
+Classes:
+HypernymIndex
+"""
+
+import bisect
+import functools
+import os
+from array import array
+
+import nltk
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    read_strings,
+    write_array,
+    write_manifest,
+    write_strings,
+)
+from wordnet_snapshot import get_wordnet
+
+HYPERNYM_INDEX_FORMAT_VERSION = 1
+HYPERNYM_INDEX_DIRECTORY = "hypernyms"
+
+# The parts of speech that WordNet organizes in hypernym hierarchies
+HIERARCHY_POS = ("n", "v")
+
+STRINGS_FILENAME = "strings.txt"
+
+# The array tables of the index and their typecodes. The offset tables have one more entry
+# than there are synsets.
+TABLES = {
+    "hypernym_offsets": "I",
+    "hypernyms": "I",
+    "hyponym_offsets": "I",
+    "hyponyms": "I",
+    "labels": "I",
+    "depths": "H",
+    "range_offsets": "I",
+    "range_starts": "I",
+    "range_ends": "I",
+}
+
+
+def merge_ranges(ranges):
+    """Merges inclusive (start, end) ranges of integers into the fewest sorted, disjoint ones
+    that cover the same integers."""
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    return [tuple(each) for each in merged]
+
+
+def read_hierarchy(wordnet):
+    """Returns the names of the noun and verb synsets, sorted, and the ids of the hypernyms
+    of each, in the order of the names."""
+
+    synsets = [synset for pos in HIERARCHY_POS for synset in wordnet.all_synsets(pos)]
+    names = sorted(synset.name() for synset in synsets)
+    synset_ids = {name: index for index, name in enumerate(names)}
+
+    hypernyms = [[] for _ in names]
+    for synset in synsets:
+        hypernyms[synset_ids[synset.name()]] = sorted(
+            {
+                synset_ids[hypernym.name()]
+                for hypernym in synset.hypernyms() + synset.instance_hypernyms()
+            }
+        )
+
+    return names, hypernyms
+
+
+def sort_topologically(hypernyms):
+    """Orders the synsets so that the hypernyms of each come before it. WordNet has a few
+    hypernym cycles; the links that would close them are dropped from 'hypernyms'.
+    Returns:
+        list: The ids of the synsets, from the roots down
+    """
+
+    hyponyms = [[] for _ in hypernyms]
+    for synset_id, targets in enumerate(hypernyms):
+        for target in targets:
+            hyponyms[target].append(synset_id)
+
+    missing = [len(targets) for targets in hypernyms]
+    placed = [False] * len(hypernyms)
+    ready = [synset_id for synset_id, count in enumerate(missing) if count == 0]
+    order = []
+
+    while len(order) < len(hypernyms):
+        if not ready:
+            # Only cycles and their hyponyms are left. Following unplaced hypernyms leads
+            # into a cycle, whose synset keeps the hypernyms that are already placed and
+            # loses the others.
+            synset_id = placed.index(False)
+            visited = set()
+            while synset_id not in visited:
+                visited.add(synset_id)
+                synset_id = next(
+                    target for target in hypernyms[synset_id] if not placed[target]
+                )
+            hypernyms[synset_id] = [
+                target for target in hypernyms[synset_id] if placed[target]
+            ]
+            missing[synset_id] = 0
+            ready.append(synset_id)
+
+        synset_id = ready.pop()
+        placed[synset_id] = True
+        order.append(synset_id)
+        for hyponym in hyponyms[synset_id]:
+            if missing[hyponym]:
+                missing[hyponym] -= 1
+                if missing[hyponym] == 0:
+                    ready.append(hyponym)
+
+    return order
+
+
+def label_tree(hypernyms):
+    """Numbers the synsets in the post-order of a depth-first walk of the spanning tree where
+    the first hypernym of each synset is its parent.
+    Returns:
+        tuple: The number of each synset, and the lowest number among its descendants in the
+        tree, so that these are the numbers from the lowest to its own
+    """
+
+    children = [[] for _ in hypernyms]
+    for synset_id, targets in enumerate(hypernyms):
+        if targets:
+            children[targets[0]].append(synset_id)
+
+    labels = [0] * len(hypernyms)
+    lowest = [0] * len(hypernyms)
+    next_label = 0
+
+    for root, targets in enumerate(hypernyms):
+        if targets:
+            continue
+
+        lowest[root] = next_label
+        stack = [(root, iter(children[root]))]
+        while stack:
+            synset_id, remaining = stack[-1]
+            child = next(remaining, None)
+            if child is None:
+                stack.pop()
+                labels[synset_id] = next_label
+                next_label += 1
+            else:
+                lowest[child] = next_label
+                stack.append((child, iter(children[child])))
+
+    return labels, lowest
+
+
+def write_hypernym_index(directory, wordnet, source):
+    """Writes the hypernym index of the noun and verb hierarchies of a WordNet reader.
+    Args:
+        directory (str): The empty directory to write the index in
+        wordnet: The WordNet reader, the snapshot or NLTK's
+        source (dict): JSON-serializable description of WordNet and its version
+    """
+
+    names, hypernyms = read_hierarchy(wordnet)
+    order = sort_topologically(hypernyms)
+
+    hyponyms = [[] for _ in names]
+    for synset_id, targets in enumerate(hypernyms):
+        for target in targets:
+            hyponyms[target].append(synset_id)
+
+    depths = [0] * len(names)
+    for synset_id in order:
+        depths[synset_id] = max(
+            (depths[target] + 1 for target in hypernyms[synset_id]), default=0
+        )
+
+    # The ranges of the descendants of each synset: its own in the tree, and those of its
+    # hyponyms, which go beyond it for the hyponyms that have other hypernyms too
+    labels, lowest = label_tree(hypernyms)
+    ranges = [None] * len(names)
+    for synset_id in reversed(order):
+        ranges[synset_id] = merge_ranges(
+            [(lowest[synset_id], labels[synset_id])]
+            + [each for hyponym in hyponyms[synset_id] for each in ranges[hyponym]]
+        )
+
+    tables = {name: array(typecode) for name, typecode in TABLES.items()}
+    for offsets_name in ["hypernym_offsets", "hyponym_offsets", "range_offsets"]:
+        tables[offsets_name].append(0)
+    for synset_id in range(len(names)):
+        tables["hypernyms"].extend(hypernyms[synset_id])
+        tables["hypernym_offsets"].append(len(tables["hypernyms"]))
+        tables["hyponyms"].extend(hyponyms[synset_id])
+        tables["hyponym_offsets"].append(len(tables["hyponyms"]))
+        tables["range_starts"].extend(start for start, _ in ranges[synset_id])
+        tables["range_ends"].extend(end for _, end in ranges[synset_id])
+        tables["range_offsets"].append(len(tables["range_starts"]))
+    tables["labels"].extend(labels)
+    tables["depths"].extend(depths)
+
+    write_strings(os.path.join(directory, STRINGS_FILENAME), names)
+    for name, values in tables.items():
+        write_array(os.path.join(directory, f"{name}.bin"), TABLES[name], values)
+    write_manifest(
+        directory,
+        {
+            "format_version": HYPERNYM_INDEX_FORMAT_VERSION,
+            "source": source,
+            "synsets": len(names),
+            "ranges": len(tables["range_starts"]),
+        },
+    )
+
+
+class HypernymIndex:
+    """Read-only view over an index written by write_hypernym_index.
+
+    Every method takes and returns synset names, and raises KeyError for the names of synsets
+    that aren't nouns or verbs of WordNet.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.names = read_strings(os.path.join(directory, STRINGS_FILENAME))
+        self.synset_ids = {name: index for index, name in enumerate(self.names)}
+
+        self.hypernym_offsets = self._map_table("hypernym_offsets")
+        self.hypernyms = self._map_table("hypernyms")
+        self.hyponym_offsets = self._map_table("hyponym_offsets")
+        self.hyponyms = self._map_table("hyponyms")
+        self.labels = self._map_table("labels")
+        self.depths = self._map_table("depths")
+        self.range_offsets = self._map_table("range_offsets")
+        self.range_starts = self._map_table("range_starts")
+        self.range_ends = self._map_table("range_ends")
+
+    def _map_table(self, name):
+        return map_array(os.path.join(self.directory, f"{name}.bin"), TABLES[name])
+
+    def __contains__(self, name):
+        return name in self.synset_ids
+
+    def _get_id(self, name):
+        try:
+            return self.synset_ids[name]
+        except KeyError:
+            raise KeyError(f"Not a noun or verb synset of WordNet: {name}") from None
+
+    def _get_hypernym_ids(self, synset_id):
+        return self.hypernyms[
+            self.hypernym_offsets[synset_id] : self.hypernym_offsets[synset_id + 1]
+        ]
+
+    def _get_hyponym_ids(self, synset_id):
+        return self.hyponyms[
+            self.hyponym_offsets[synset_id] : self.hyponym_offsets[synset_id + 1]
+        ]
+
+    def _is_descendant(self, synset_id, ancestor_id):
+        start, end = (
+            self.range_offsets[ancestor_id],
+            self.range_offsets[ancestor_id + 1],
+        )
+        label = self.labels[synset_id]
+        # The last range that starts at or before the label is the only one it can be in
+        index = bisect.bisect_right(self.range_starts, label, start, end) - 1
+
+        return index >= start and label <= self.range_ends[index]
+
+    def _get_ancestor_ids(self, synset_id):
+        ancestors = set()
+        pending = [synset_id]
+        while pending:
+            for hypernym in self._get_hypernym_ids(pending.pop()):
+                if hypernym not in ancestors:
+                    ancestors.add(hypernym)
+                    pending.append(hypernym)
+
+        return ancestors
+
+    def get_hypernyms(self, name):
+        """Returns the direct hypernyms and instance hypernyms of a synset."""
+
+        return [
+            self.names[index] for index in self._get_hypernym_ids(self._get_id(name))
+        ]
+
+    def get_hyponyms(self, name):
+        """Returns the direct hyponyms and instance hyponyms of a synset."""
+
+        return [
+            self.names[index] for index in self._get_hyponym_ids(self._get_id(name))
+        ]
+
+    def get_depth(self, name):
+        """Returns the length of the longest hypernym path from a synset to a root."""
+
+        return self.depths[self._get_id(name)]
+
+    def is_hyponym(self, name, ancestor):
+        """Tells whether a synset is a kind of another: itself, or one of its hyponyms at any
+        depth. 'dog.n.01' is a kind of 'animal.n.01'."""
+
+        return self._is_descendant(self._get_id(name), self._get_id(ancestor))
+
+    def get_hypernym_closure(self, name):
+        """Returns every hypernym of a synset at any depth, the deepest first."""
+
+        return sorted(
+            (self.names[index] for index in self._get_ancestor_ids(self._get_id(name))),
+            key=lambda ancestor: (-self.get_depth(ancestor), ancestor),
+        )
+
+    def get_hypernym_paths(self, name):
+        """Returns every path from a root of the hierarchy down to a synset, as NLTK's
+        hypernym_paths does.
+        Returns:
+            list: The lists of the synsets of each path, the root first and the synset last
+        """
+
+        paths = {}
+
+        def get_paths(synset_id):
+            if synset_id not in paths:
+                hypernym_ids = self._get_hypernym_ids(synset_id)
+                paths[synset_id] = [
+                    path + [self.names[synset_id]]
+                    for hypernym in hypernym_ids
+                    for path in get_paths(hypernym)
+                ] or [[self.names[synset_id]]]
+
+            return paths[synset_id]
+
+        return get_paths(self._get_id(name))
+
+    def get_lowest_common_hypernyms(self, name, other):
+        """Returns the deepest synsets that both synsets are a kind of, sorted like NLTK's
+        lowest_common_hypernyms. Synsets of different hierarchies have none."""
+
+        synset_id, other_id = self._get_id(name), self._get_id(other)
+        candidates = self._get_ancestor_ids(synset_id) | {synset_id}
+        common = [
+            candidate
+            for candidate in candidates
+            if self._is_descendant(other_id, candidate)
+        ]
+        if not common:
+            return []
+
+        deepest = max(self.depths[candidate] for candidate in common)
+        return sorted(
+            self.names[candidate]
+            for candidate in common
+            if self.depths[candidate] == deepest
+        )
+
+    def get_hyponym_tree(self, name, max_depth):
+        """Returns the hyponyms of a synset down to a depth, nested as NLTK's tree() does:
+        [synset, subtree of its first hyponym, subtree of its second hyponym, ...].
+        Args:
+            name (str): The synset at the top of the tree
+            max_depth (int): How many levels of hyponyms the tree goes down to
+        """
+
+        def get_tree(synset_id, depth):
+            tree = [self.names[synset_id]]
+            if depth < max_depth:
+                tree.extend(
+                    get_tree(hyponym, depth + 1)
+                    for hyponym in self._get_hyponym_ids(synset_id)
+                )
+
+            return tree
+
+        return get_tree(self._get_id(name), 0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_hypernym_index():
+    """Returns the hypernym index of WordNet, built on first use."""
+
+    wordnet = get_wordnet()
+    source = {
+        "wordnet_version": wordnet.get_version(),
+        "nltk_version": nltk.__version__,
+    }
+    directory = get_index_directory(HYPERNYM_INDEX_DIRECTORY)
+    expected = {"format_version": HYPERNYM_INDEX_FORMAT_VERSION, "source": source}
+
+    ensure_index(
+        directory,
+        expected,
+        lambda build_directory: write_hypernym_index(build_directory, wordnet, source),
+    )
+
+    return HypernymIndex(directory)
@@ -0,0 +1,141 @@
+"""This module reports what the command line imports before it gets to work, and checks it
+against the startup budget: the heavy dependencies must not be imported just to parse the
+arguments, and the imports must fit in STARTUP_BUDGET_MS.
+
+It runs the given Python code in a fresh interpreter with -X importtime, for example:
+
+    python import_report.py
+    python import_report.py "import cli, sys; sys.argv = ['main.py', '--help']; cli.main()"
+
+Functions:
+parse_import_times(lines)
+measure_import_times(code)
+check_startup(code)
+main()
+
+Classes:
+ImportTime
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import namedtuple
+
+STARTUP_BUDGET_MS = 150
+DEFAULT_CODE = "import cli"
+
+# The modules that only the analyzers and the page rendering need
+HEAVY_MODULES = ("nltk", "requests", "urllib3", "bs4", "jinja2")
+
+ImportTime = namedtuple("ImportTime", ["module", "self_us", "cumulative_us", "depth"])
+ImportTime.__doc__ = """How long importing a module took, in microseconds, by itself and with
+the modules it imported, and how deep in the import chain it was."""
+
+
+def parse_import_times(lines):
+    """Parses the lines that -X importtime writes to the standard error.
+    Returns:
+        list: The ImportTime of each module, in the order the imports finished
+    """
+
+    import_times = []
+
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        module = name.strip()
+        depth = (len(name.rstrip()) - len(module) - 1) // 2
+        import_times.append(ImportTime(module, int(self_us), int(cumulative_us), depth))
+
+    return import_times
+
+
+def measure_import_times(code=DEFAULT_CODE):
+    """Runs Python code in a fresh interpreter and returns the ImportTime of every module that
+    it imported, besides the ones that the interpreter imports on its own.
+    Raises:
+        subprocess.CalledProcessError: If the code fails, as its imports would then be partial.
+    """
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    baseline = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    startup_modules = {
+        import_time.module
+        for import_time in parse_import_times(baseline.stderr.splitlines())
+    }
+
+    return [
+        import_time
+        for import_time in parse_import_times(process.stderr.splitlines())
+        if import_time.module not in startup_modules
+    ]
+
+
+def check_startup(code=DEFAULT_CODE):
+    """Measures the imports of Python code, as the startup budget counts them.
+    Returns:
+        tuple: The total import time in milliseconds, the heavy modules that got imported, and
+        the ImportTime of every module
+    """
+
+    import_times = measure_import_times(code)
+    total_ms = sum(import_time.self_us for import_time in import_times) / 1000
+    heavy_modules = sorted(
+        {
+            import_time.module.split(".")[0]
+            for import_time in import_times
+            if import_time.module.split(".")[0] in HEAVY_MODULES
+        }
+    )
+
+    return total_ms, heavy_modules, import_times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report the imports of the command line against the startup budget."
+    )
+    parser.add_argument(
+        "code", nargs="?", default=DEFAULT_CODE, help="The Python code to measure."
+    )
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument(
+        "--top", type=int, default=15, help="How many of the slowest imports to list."
+    )
+    args = parser.parse_args()
+
+    total_ms, heavy_modules, import_times = check_startup(args.code)
+
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for import_time in sorted(
+        import_times,
+        key=lambda import_time: import_time.cumulative_us,
+        reverse=True,
+    )[: args.top]:
+        print(
+            f"{import_time.cumulative_us / 1000:14.1f} {import_time.self_us / 1000:8.1f}"
+            f"  {'  ' * import_time.depth}{import_time.module}"
+        )
+
+    print(f"\nImports took {total_ms:.1f} ms, for a budget of {args.budget_ms:.0f} ms.")
+    if heavy_modules:
+        print(f"Heavy modules imported at startup: {', '.join(heavy_modules)}")
+
+    sys.exit(1 if heavy_modules or total_ms > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""This module provides the shared plumbing for the on-disk indexes that the analyzers
+build once and reuse: where they live, how their manifests are versioned, and how
+their compact array tables are written and memory-mapped back.
+
+Functions:
+get_data_directory()
+get_index_directory(name)
+write_atomically(path, mode, write, encoding, create_directory)
+write_array(path, typecode, values)
+map_array(path, typecode)
+write_strings(path, strings)
+read_strings(path)
+write_manifest(directory, manifest)
+read_manifest(directory)
+manifest_matches(manifest, expected)
+make_build_directory(destination)
+replace_directory(source, destination)
+ensure_index(directory, expected, build)
+"""
+
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+DATA_DIRECTORY_ENV_VAR = "WORD_INFO_DATA_DIR"
+DEFAULT_DATA_DIRECTORY = os.path.join("~", ".cache", "word-information-generator")
+MANIFEST_FILENAME = "manifest.json"
+FILE_MODE = 0o644
+
+
+def get_data_directory():
+    """Returns the root directory for persisted indexes and caches. It can be
+    overridden through the WORD_INFO_DATA_DIR environment variable."""
+
+    directory = os.environ.get(DATA_DIRECTORY_ENV_VAR, DEFAULT_DATA_DIRECTORY)
+    return os.path.abspath(os.path.expanduser(directory))
+
+
+def get_index_directory(name):
+    """Returns the directory in which the index called 'name' is stored.
+    Args:
+        name (str): The name of the index, possibly containing path separators
+    """
+
+    return os.path.join(get_data_directory(), name)
+
+
+def write_atomically(path, mode, write, encoding=None, create_directory=True):
+    """Writes a file through a temporary file in the same directory that gets renamed into
+    place, so that readers never see a partially written file.
+    Args:
+        path (str): The destination file
+        mode (str): The mode to open the temporary file with, such as "wb"
+        write (callable): Called with the open temporary file to write the content
+        encoding (str): The encoding of files opened in text mode
+        create_directory (bool): Whether to create the directory of the file if needed
+    """
+
+    directory = os.path.dirname(path) or "."
+    if create_directory:
+        os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, mode, encoding=encoding) as file:
+            write(file)
+        # Temporary files are only readable by their owner
+        os.chmod(temporary_path, FILE_MODE)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def write_array(path, typecode, values):
+    """Writes a sequence of integers to 'path' as a packed native array.
+    Args:
+        path (str): The destination file
+        typecode (str): An array typecode such as "I" or "Q"
+        values (iterable): The integers to store
+    """
+
+    packed = values if isinstance(values, array) else array(typecode, values)
+    write_atomically(path, "wb", packed.tofile)
+
+
+def map_array(path, typecode):
+    """Memory-maps a file written by write_array and returns a read-only
+    memoryview over it, so lookups don't copy the table into Python objects.
+    Args:
+        path (str): The file to map
+        typecode (str): The typecode that was used when writing the file
+    """
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return memoryview(array(typecode))
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return memoryview(mapped).cast(typecode)
+
+
+def write_strings(path, strings):
+    """Writes a sequence of strings that contain no newlines, one per line."""
+
+    write_atomically(
+        path, "wb", lambda file: file.write("\n".join(strings).encode("utf-8"))
+    )
+
+
+def read_strings(path):
+    """Reads back the strings written by write_strings as a list."""
+
+    with open(path, "rb") as file:
+        content = file.read().decode("utf-8")
+
+    return content.split("\n") if content else []
+
+
+def write_manifest(directory, manifest):
+    """Writes the manifest that describes an index. The byte order of the machine is
+    recorded as well, because the array tables are stored in native order."""
+
+    manifest = dict(manifest, byteorder=sys.byteorder)
+    write_atomically(
+        os.path.join(directory, MANIFEST_FILENAME),
+        "w",
+        lambda file: json.dump(manifest, file, indent=2, sort_keys=True),
+    )
+
+
+def read_manifest(directory):
+    """Returns the manifest of the index stored in 'directory', or None if there
+    is no readable manifest."""
+
+    try:
+        with open(
+            os.path.join(directory, MANIFEST_FILENAME), "r", encoding="utf-8"
+        ) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def manifest_matches(manifest, expected):
+    """Tells whether a stored manifest was written on a machine with the same byte
+    order and agrees with every entry of 'expected'."""
+
+    if manifest is None or manifest.get("byteorder") != sys.byteorder:
+        return False
+
+    return all(manifest.get(key) == value for key, value in expected.items())
+
+
+def replace_directory(source, destination):
+    """Moves a freshly built index directory into place, replacing any stale one."""
+
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+
+
+def make_build_directory(destination):
+    """Creates an empty scratch directory next to 'destination' in which an index
+    can be built before replace_directory moves it into place."""
+
+    parent = os.path.dirname(destination)
+    os.makedirs(parent, exist_ok=True)
+    return tempfile.mkdtemp(dir=parent, prefix=".build-")
+
+
+def ensure_index(directory, expected, build):
+    """Makes sure that 'directory' holds an index whose manifest agrees with 'expected',
+    building it from scratch otherwise.
+    Args:
+        directory (str): The directory of the index
+        expected (dict): The manifest entries that a usable index must have
+        build (callable): Called with an empty directory in which it must write the index,
+        manifest included
+    """
+
+    if manifest_matches(read_manifest(directory), expected):
+        return
+
+    build_directory = make_build_directory(directory)
+    try:
+        build(build_directory)
+    except BaseException:
+        shutil.rmtree(build_directory, ignore_errors=True)
+        raise
+
+    replace_directory(build_directory, directory)
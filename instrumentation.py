@@ -0,0 +1,254 @@
+"""This module measures where the time and memory of the analyses go. Each instrumented function
+or analyzer gets its call count, wall time, CPU time and, optionally, the peak memory allocated
+during its calls recorded, and can optionally be profiled with cProfile.
+
+Instrumentation is disabled by default, and then costs a single check per call. Once enabled,
+the statistics can be printed as a summary, written as JSON, and merged across the processes
+of a batch run.
+
+Functions:
+enable(track_memory, profile_directory)
+disable()
+get_instrumentation()
+instrumented(name)
+format_summary(stats)
+
+Classes:
+Instrumentation
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+STAT_FIELDS = ("calls", "errors", "wall_seconds", "cpu_seconds", "peak_memory_bytes")
+
+# tracemalloc's peak can only be reset from Python 3.9. Before, what a call still holds when
+# it returns is recorded instead of its peak.
+CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+_active = None
+
+# Profilers of different threads can't run at the same time on recent Python versions, so
+# profiled calls take turns. Calls nested in a profiled call are part of its profile already.
+_profile_lock = threading.RLock()
+_profiling = threading.local()
+
+
+def empty_stats():
+    return dict.fromkeys(STAT_FIELDS, 0)
+
+
+def merge_stat(stats, other):
+    for field in STAT_FIELDS:
+        if field == "peak_memory_bytes":
+            stats[field] = max(stats[field], other[field])
+        else:
+            stats[field] += other[field]
+
+
+class Instrumentation:
+    """Collects the statistics of the instrumented calls of a process.
+
+    Peak memory comes from tracemalloc, whose peak is that of the whole process, and resetting
+    it for a call resets it for every other call in progress. analyze_word runs its analyzers
+    one at a time while memory is tracked, so that the calls it records don't overlap.
+    """
+
+    def __init__(self, track_memory=False, profile_directory=None):
+        """Creates the statistics collector.
+        Args:
+            track_memory (bool): Whether to record the peak memory allocated during calls.
+            Tracing allocations slows the program down noticeably.
+            profile_directory (str): If passed, every instrumented function gets profiled with
+            cProfile, and write_profiles dumps one file of profile statistics per function there.
+            Profiled calls take turns, so they no longer overlap across threads.
+        """
+
+        self.track_memory = track_memory
+        self.profile_directory = profile_directory
+        self._stats = {}
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self):
+        """The arguments to create an equivalent collector with, in a worker process."""
+
+        return {
+            "track_memory": self.track_memory,
+            "profile_directory": self.profile_directory,
+        }
+
+    def call(self, name, function, *args, **kwargs):
+        """Calls a function, recording its statistics under 'name'."""
+
+        profile = None
+        if self.profile_directory and not getattr(_profiling, "active", False):
+            import cProfile
+
+            profile = cProfile.Profile()
+        if self.track_memory:
+            memory_before, _ = tracemalloc.get_traced_memory()
+            if CAN_RESET_PEAK:
+                tracemalloc.reset_peak()
+
+        failed = True
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            if profile is not None:
+                with _profile_lock:
+                    _profiling.active = True
+                    try:
+                        result = profile.runcall(function, *args, **kwargs)
+                    finally:
+                        _profiling.active = False
+            else:
+                result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            stats = {
+                "calls": 1,
+                "errors": int(failed),
+                "wall_seconds": time.perf_counter() - wall_start,
+                "cpu_seconds": time.thread_time() - cpu_start,
+                "peak_memory_bytes": 0,
+            }
+            if self.track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = peak if CAN_RESET_PEAK else current
+                stats["peak_memory_bytes"] = max(peak - memory_before, 0)
+
+            with self._lock:
+                merge_stat(self._stats.setdefault(name, empty_stats()), stats)
+                if profile is not None:
+                    import pstats
+
+                    if name in self._profiles:
+                        self._profiles[name].add(profile)
+                    else:
+                        self._profiles[name] = pstats.Stats(profile)
+
+    def stats(self):
+        """Returns a copy of the statistics recorded so far, by name."""
+
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def drain(self):
+        """Returns the statistics recorded so far and starts over, so that a worker process can
+        hand them over to the parent piece by piece."""
+
+        with self._lock:
+            stats, self._stats = self._stats, {}
+
+        return stats
+
+    def merge(self, stats):
+        """Adds statistics recorded elsewhere, such as in a worker process."""
+
+        with self._lock:
+            for name, other in stats.items():
+                merge_stat(self._stats.setdefault(name, empty_stats()), other)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.stats(), file, indent=2, sort_keys=True)
+
+    def write_profiles(self):
+        """Dumps the profile statistics of each function to '<name>.<pid>.prof' in the profile
+        directory. They can be read, and combined across processes, with pstats.
+        Returns:
+            list: The paths of the files written
+        """
+
+        if not self.profile_directory:
+            return []
+
+        os.makedirs(self.profile_directory, exist_ok=True)
+        paths = []
+
+        with self._lock:
+            for name, profile_stats in self._profiles.items():
+                path = os.path.join(
+                    self.profile_directory, f"{name}.{os.getpid()}.prof"
+                )
+                profile_stats.dump_stats(path)
+                paths.append(path)
+
+        return paths
+
+
+def enable(track_memory=False, profile_directory=None):
+    """Starts instrumenting the process, and returns the collector of its statistics."""
+
+    global _active
+
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    _active = Instrumentation(track_memory, profile_directory)
+    return _active
+
+
+def disable():
+    global _active
+
+    if _active is not None and _active.track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    _active = None
+
+
+def get_instrumentation():
+    """Returns the active collector of statistics, or None when instrumentation is disabled."""
+
+    return _active
+
+
+def instrumented(name=None):
+    """Decorates a function so that its calls get recorded while instrumentation is enabled.
+    Args:
+        name (str): The name to record the calls under. Defaults to the function's name.
+    """
+
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            instrumentation = _active
+            if instrumentation is None:
+                return function(*args, **kwargs)
+
+            return instrumentation.call(label, function, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def format_summary(stats):
+    """Formats statistics as a table, with the most expensive names first."""
+
+    lines = [
+        f"{'name':<36} {'calls':>7} {'errors':>6} {'wall ms':>10} {'cpu ms':>10}"
+        f" {'ms/call':>8} {'peak KiB':>9}"
+    ]
+
+    for name, stat in sorted(
+        stats.items(), key=lambda item: item[1]["wall_seconds"], reverse=True
+    ):
+        lines.append(
+            f"{name:<36} {stat['calls']:>7} {stat['errors']:>6}"
+            f" {stat['wall_seconds'] * 1000:>10.1f} {stat['cpu_seconds'] * 1000:>10.1f}"
+            f" {stat['wall_seconds'] * 1000 / max(stat['calls'], 1):>8.2f}"
+            f" {stat['peak_memory_bytes'] / 1024:>9.1f}"
+        )
+
+    return "\n".join(lines)
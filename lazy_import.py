@@ -0,0 +1,33 @@
+"""This module defers importing the modules that the analyzers need until they actually run,
+so that the command line starts without loading NLTK, requests or Jinja.
+
+Classes:
+LazyFunction
+"""
+
+import importlib
+
+
+class LazyFunction:
+    """Stands in for a function of a module, which gets imported the first time it's called."""
+
+    def __init__(self, module_name, function_name):
+        self.module_name = module_name
+        self.function_name = function_name
+        self.__name__ = function_name
+        self._function = None
+
+    def load(self):
+        """Imports the module and returns the function."""
+
+        if self._function is None:
+            module = importlib.import_module(self.module_name)
+            self._function = getattr(module, self.function_name)
+
+        return self._function
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyFunction({self.module_name}.{self.function_name})"
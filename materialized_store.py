@@ -0,0 +1,331 @@
+"""This module precomputes the analyses of the whole WordNet vocabulary into a read-only store,
+so that serving one of its words is a single indexed read instead of an analysis.
+
+The store is an SQLite database in the data directory, with one row per lemma name holding
+its compressed results, in a table clustered on the word. It is only used while its analysis
+version matches the installed analyzers and data; analyze_word_with_cache reads it first and
+falls back to analyzing the words that it doesn't hold.
+
+Materializing analyzes every lemma name with a pool of worker processes, committing the
+results as they come into a partial database next to the store. An interrupted run resumes
+from what was committed, as long as the analysis version didn't change. Once every word is
+done, the partial database is compacted and renamed into place.
+
+    python main.py --materialize --workers 0
+
+Functions:
+get_store_path()
+get_materialized_store()
+open_materialized_store(path)
+materialize(path, workers, chunk_size, progress, fetch_etymologies)
+
+Classes:
+MaterializedStore
+MaterializeReport
+"""
+
+import functools
+import os
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from index_storage import get_data_directory
+from result_cache import get_version_key, normalize_word
+from result_serialization import canonical_json, decode_analysis, encode_analysis
+
+MATERIALIZED_STORE_FILENAME = "materialized.sqlite3"
+PARTIAL_SUFFIX = ".partial"
+
+# How many analyzed words get committed at a time, which is at most what an interrupted run
+# loses
+WORDS_PER_COMMIT = 500
+
+# How often, in seconds, the progress of a run gets reported
+PROGRESS_INTERVAL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    word TEXT PRIMARY KEY,
+    payload BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class MaterializeReport(
+    namedtuple(
+        "MaterializeReport", ["words", "analyzed", "resumed", "failed", "seconds"]
+    )
+):
+    """How many words the vocabulary has, how many were analyzed by this run, how many were
+    already done by an interrupted one, how many couldn't be analyzed, and how long it took.
+    """
+
+    __slots__ = ()
+
+    @property
+    def words_per_second(self):
+        return self.analyzed / self.seconds if self.seconds else 0.0
+
+
+def get_store_path():
+    return os.path.join(get_data_directory(), MATERIALIZED_STORE_FILENAME)
+
+
+class MaterializedStore:
+    """The read-only store of the analyses of a vocabulary. A store can be shared by the
+    threads of a process, and each process opens its own connection."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            # Immutable, since the store gets replaced rather than written to, which spares
+            # the reads any locking
+            uri = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro&immutable=1"
+            self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def get_metadata(self, key):
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT value FROM metadata WHERE key = ?", (key,))
+                .fetchone()
+            )
+
+        return None if row is None else row[0]
+
+    def get(self, word):
+        """Returns the stored results of a word, or None if the store doesn't hold it."""
+
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT payload FROM analyses WHERE word = ?",
+                    (normalize_word(word),),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+
+        return decode_analysis(zlib.decompress(row[0]).decode("utf-8"))
+
+    def __len__(self):
+        with self._lock:
+            return (
+                self._connect().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            )
+
+
+def open_materialized_store(path):
+    """Returns the store at a path if it exists and was materialized from the current analysis
+    version, or None. Each version of the store file is opened once per process, and a
+    missing one is looked for again on every call, so that a process started before the
+    store was materialized still gets to use it."""
+
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    return open_store_file(path, modified)
+
+
+# Only the current version of the store stays open
+@functools.lru_cache(maxsize=1)
+def open_store_file(path, modified):
+    """Opens the store file at a path, as of its modification time, which only changes when
+    it gets materialized again: the store is replaced rather than written to."""
+
+    from word_analysis import get_analysis_version
+
+    store = MaterializedStore(path)
+    if store.get_metadata("version_key") != get_version_key(get_analysis_version()):
+        return None
+
+    return store
+
+
+def get_materialized_store():
+    """Returns the store of the data directory, or None if there is no usable one."""
+
+    return open_materialized_store(get_store_path())
+
+
+def open_partial_store(path, version):
+    """Opens the partial database of a run, emptying it if it was started from another
+    analysis version.
+    Returns:
+        sqlite3.Connection: The connection to the partial database
+    """
+
+    connection = sqlite3.connect(f"{path}{PARTIAL_SUFFIX}")
+    connection.executescript(SCHEMA)
+
+    version_key = get_version_key(version)
+    row = connection.execute(
+        "SELECT value FROM metadata WHERE key = 'version_key'"
+    ).fetchone()
+    if row is None or row[0] != version_key:
+        with connection:
+            connection.execute("DELETE FROM analyses")
+            connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [("version_key", version_key), ("version", canonical_json(version))],
+            )
+
+    return connection
+
+
+def report_progress(done, total, analyzed, started, file):
+    seconds = time.perf_counter() - started
+    rate = analyzed / seconds if seconds else 0.0
+    remaining = f", about {(total - done) / rate / 60:.0f} min left" if rate else ""
+    print(
+        f"Materialized {done}/{total} words ({done / total:.1%}), "
+        f"{rate:.0f} words/s{remaining}.",
+        file=file,
+    )
+
+
+def materialize(
+    path=None,
+    workers=None,
+    chunk_size=None,
+    progress=sys.stderr,
+    fetch_etymologies=False,
+):
+    """Analyzes every lemma name of WordNet into the materialized store, resuming an
+    interrupted run. Words that can't be analyzed, or whose results miss data that was
+    temporarily out of reach, are left out of the store and counted as failed, so they get
+    analyzed when they're asked for.
+
+    The etymologies come from the offline etymology store. Unless it was imported or the
+    analyses are offline, materializing would send a request to etymonline for every word,
+    so it has to be allowed explicitly.
+    Args:
+        path (str): The store. Defaults to the one in the data directory.
+        workers (int): The number of worker processes. With 1, the words get analyzed in this
+        process; None uses every available core.
+        chunk_size (int): How many words get sent to a worker at a time. Defaults to the
+        pool's default.
+        progress (file): Where the progress gets reported every PROGRESS_INTERVAL seconds.
+        With None, it doesn't get reported.
+        fetch_etymologies (bool): Whether the etymologies that the etymology store lacks may
+        be fetched from etymonline, within the rate limit that the workers share
+    Returns:
+        MaterializeReport: What was analyzed, and how fast
+    Raises:
+        ValueError: If the etymologies would be fetched without being allowed to.
+    """
+
+    from etymology_fetcher import get_default_fetcher
+    from etymology_scraper import OFFLINE_ENV_VAR
+    from etymology_store import get_default_store
+    from word_analysis import get_analysis_version, is_complete
+    from wordnet_snapshot import get_wordnet
+    from worker_pool import (
+        DEFAULT_CHUNK_SIZE,
+        analyze_word_safely,
+        analyze_words_in_parallel,
+    )
+
+    started = time.perf_counter()
+    path = path or get_store_path()
+    version = get_analysis_version()
+    words = sorted({normalize_word(name) for name in get_wordnet().all_lemma_names()})
+
+    if not os.path.exists(f"{path}{PARTIAL_SUFFIX}"):
+        store = open_materialized_store(path)
+        if store is not None:
+            return MaterializeReport(len(words), 0, len(store), 0, 0.0)
+
+    if not (os.environ.get(OFFLINE_ENV_VAR) or len(get_default_store())):
+        if not fetch_etymologies:
+            raise ValueError(
+                "Materializing would fetch the etymology of every word from etymonline. "
+                "Import saved pages into the etymology store, run offline, or allow "
+                "fetching the etymologies."
+            )
+        if progress:
+            interval = get_default_fetcher().rate_limiter.interval
+            rate = (
+                f"at most {1 / interval:g} requests per second"
+                if interval
+                else "no limit"
+            )
+            print(
+                f"The etymology store is empty: fetching every etymology from etymonline, "
+                f"with {rate}.",
+                file=progress,
+            )
+
+    connection = open_partial_store(path, version)
+    done = {word for (word,) in connection.execute("SELECT word FROM analyses")}
+    remaining = [word for word in words if word not in done]
+
+    if workers == 1:
+        outcomes = (analyze_word_safely(word) for word in remaining)
+    else:
+        outcomes = analyze_words_in_parallel(
+            remaining, workers, chunk_size or DEFAULT_CHUNK_SIZE
+        )
+
+    analyzed = failed = 0
+    rows = []
+    last_report = time.perf_counter()
+
+    for outcome in outcomes:
+        # Results that miss data that was temporarily out of reach are left out like
+        # failures, and analyzed again when they're asked for
+        if outcome.error_type is None and is_complete(outcome.results):
+            payload = zlib.compress(encode_analysis(outcome.results).encode("utf-8"))
+            rows.append((outcome.word, payload))
+            analyzed += 1
+        else:
+            failed += 1
+
+        if len(rows) >= WORDS_PER_COMMIT:
+            with connection:
+                connection.executemany("INSERT INTO analyses VALUES (?, ?)", rows)
+            rows = []
+
+        if progress and time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+            report_progress(
+                len(done) + analyzed + failed, len(words), analyzed, started, progress
+            )
+            last_report = time.perf_counter()
+
+    with connection:
+        connection.executemany("INSERT INTO analyses VALUES (?, ?)", rows)
+        connection.execute(
+            "INSERT OR REPLACE INTO metadata VALUES ('words', ?)", (str(len(words)),)
+        )
+
+    # Compacted into a single file, with no journal, before being renamed into place
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(f"{path}{PARTIAL_SUFFIX}", path)
+    open_store_file.cache_clear()
+
+    return MaterializeReport(
+        len(words), analyzed, len(done), failed, time.perf_counter() - started
+    )
@@ -0,0 +1,364 @@
+"""This module provides a persisted morphology index that maps every WordNet lemma to its
+inflected forms, and every inflected form back to its lemmas, so that morphological
+variations can be expanded in both directions: 'run' gives 'ran', 'running' and 'runs', and
+'ran' gives 'run' along with them.
+
+The inflected forms come from two places. WordNet's exception lists give the irregular ones
+('ran', 'geese', 'better'). Regular ones are generated with the English spelling rules for
+plurals, verb forms and comparatives, and kept only when one of WordNet's own detachment
+rules maps them back to their lemma and no exception list claims them, so that every form of
+the index lemmatizes back to its lemma the way WordNet does. WordNet's exception lists spell
+out the forms that double their last consonant ('running', 'bigger'), so the rules don't
+need to.
+
+The index is stored as a single table of strings and two packed offset tables of string ids,
+one for each direction. Loading it reads the strings into a dictionary and maps the tables,
+so a lookup in either direction is a dictionary access and a slice.
+
+Functions:
+inflect(lemma, pos)
+is_regular_form(form, lemma, substitutions, exceptions)
+collect_inflections(wordnet)
+write_morphology_index(directory, inflections, source)
+get_morphology_index()
+
+Classes:
+MorphologyIndex
+"""
+
+import functools
+import os
+import re
+from array import array
+from collections import defaultdict
+
+import nltk
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    read_strings,
+    write_array,
+    write_manifest,
+    write_strings,
+)
+from wordnet_snapshot import POS_LIST, WordNetSnapshot, get_wordnet, read_nltk_lexicon
+
+MORPHOLOGY_INDEX_FORMAT_VERSION = 1
+MORPHOLOGY_INDEX_DIRECTORY = "morphology"
+
+STRINGS_FILENAME = "strings.txt"
+FORM_OFFSETS_FILENAME = "form_offsets.bin"
+FORMS_FILENAME = "forms.bin"
+LEMMA_OFFSETS_FILENAME = "lemma_offsets.bin"
+LEMMAS_FILENAME = "lemmas.bin"
+
+VOWELS = "aeiou"
+SIBILANT_ENDINGS = ("s", "x", "z", "ch", "sh")
+SYLLABLE_PATTERN = re.compile(r"[aeiouy]+")
+
+# Only adjectives this short take -er and -est ('green', 'happy'); longer ones take 'more'
+# and 'most'
+MAX_COMPARABLE_SYLLABLES = 2
+
+
+def count_syllables(word):
+    """Roughly counts the syllables of a word, by its groups of vowels."""
+
+    syllables = len(SYLLABLE_PATTERN.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and syllables > 1:
+        syllables -= 1
+
+    return syllables
+
+
+def ends_with_consonant_and_y(word):
+    return len(word) > 1 and word[-1] == "y" and word[-2] not in VOWELS
+
+
+def add_s(word):
+    if word.endswith(SIBILANT_ENDINGS):
+        return word + "es"
+    if ends_with_consonant_and_y(word):
+        return word[:-1] + "ies"
+
+    return word + "s"
+
+
+def inflect(lemma, pos):
+    """Returns the regular inflected forms of a lemma for a part of speech, by the English
+    spelling rules, without doubling final consonants. Compound and capitalized lemmas aren't
+    inflected.
+    Args:
+        lemma (str): The lemma
+        pos (str): One of 'n', 'v', 'a' and 'r'
+    """
+
+    if not (lemma.isalpha() and lemma.islower()):
+        return []
+
+    if pos == "n":
+        # WordNet's detachment rules turn 'men' into 'man'
+        if lemma.endswith("man"):
+            return [lemma[:-3] + "men"]
+        return [add_s(lemma)]
+
+    if pos == "v":
+        if lemma.endswith("e"):
+            past = lemma + "d"
+            participle = lemma + "ing" if lemma.endswith(("ee", "ye", "oe")) else None
+            participle = participle or lemma[:-1] + "ing"
+        elif ends_with_consonant_and_y(lemma):
+            past, participle = lemma[:-1] + "ied", lemma + "ing"
+        else:
+            past, participle = lemma + "ed", lemma + "ing"
+
+        return [add_s(lemma), past, participle]
+
+    if pos == "a":
+        syllables = count_syllables(lemma)
+        if syllables > MAX_COMPARABLE_SYLLABLES or (
+            syllables == MAX_COMPARABLE_SYLLABLES and not lemma.endswith("y")
+        ):
+            return []
+        if lemma.endswith("e"):
+            return [lemma + "r", lemma + "st"]
+        if ends_with_consonant_and_y(lemma):
+            return [lemma[:-1] + "ier", lemma[:-1] + "iest"]
+
+        return [lemma + "er", lemma + "est"]
+
+    return []
+
+
+def is_regular_form(form, lemma, substitutions, exceptions):
+    """Tells whether WordNet lemmatizes a form into a lemma in one step of its detachment
+    rules, which it only applies to forms that aren't in its exception list.
+    Args:
+        form (str): The inflected form
+        lemma (str): The lemma
+        substitutions (list): The (suffix, replacement) rules of the part of speech
+        exceptions (dict): The exception list of the part of speech
+    """
+
+    return form not in exceptions and any(
+        form.endswith(suffix) and form[: len(form) - len(suffix)] + replacement == lemma
+        for suffix, replacement in substitutions
+    )
+
+
+def get_detached_forms(form, substitutions):
+    """Returns the words, other than the form, that the detachment rules turn it into."""
+
+    return {
+        form[: len(form) - len(suffix)] + replacement
+        for suffix, replacement in substitutions
+        if form.endswith(suffix) and len(form) > len(suffix)
+    } - {form}
+
+
+def get_inflection_slot(form, pos):
+    """Returns which inflection of its lemma a form is, by its ending: the plural of a noun,
+    the comparative or superlative of an adjective, or the third person, present participle
+    or past of a verb."""
+
+    if pos == "n":
+        return "s"
+    if pos == "a":
+        return "est" if form.endswith("st") else "er"
+    if form.endswith("ing"):
+        return "ing"
+    if form.endswith("s"):
+        return "s"
+
+    return "ed"
+
+
+def get_morphology_rules(wordnet, pos):
+    """Returns the detachment rules and the exception list of a part of speech. NLTK's reader
+    only has the exception lists in its internals, which read_nltk_lexicon reads."""
+
+    if isinstance(wordnet, WordNetSnapshot):
+        return wordnet.substitutions[pos], wordnet.exceptions(pos)
+
+    return wordnet.MORPHOLOGICAL_SUBSTITUTIONS[pos], read_nltk_lexicon(wordnet, pos)[1]
+
+
+def collect_inflections(wordnet):
+    """Returns the inflected forms of every lemma of WordNet, irregular and regular.
+    Args:
+        wordnet: The WordNet reader, the snapshot or NLTK's
+    Returns:
+        dict: The set of inflected forms of each lemma that has any
+    """
+
+    inflections = defaultdict(set)
+
+    for pos in POS_LIST:
+        substitutions, exceptions = get_morphology_rules(wordnet, pos)
+        lemmas = set(wordnet.all_lemma_names(pos))
+
+        # The inflections of each lemma that its irregular forms take the place of: 'ran'
+        # leaves no room for 'runned', nor 'geese' for 'gooses'
+        irregular_slots = defaultdict(set)
+        for form, bases in exceptions.items():
+            for base in bases:
+                if base in lemmas and base != form:
+                    inflections[base].add(form)
+                    irregular_slots[base].add(get_inflection_slot(form, pos))
+
+        for lemma in lemmas:
+            # Lemmas that are themselves inflected forms of another ('glasses') aren't
+            # inflected again
+            if lemma in exceptions or any(
+                base in lemmas for base in get_detached_forms(lemma, substitutions)
+            ):
+                continue
+
+            for form in inflect(lemma, pos):
+                slot = get_inflection_slot(form, pos)
+                if slot not in irregular_slots[lemma] and is_regular_form(
+                    form, lemma, substitutions, exceptions
+                ):
+                    inflections[lemma].add(form)
+
+    return dict(inflections)
+
+
+def write_offset_table(directory, offsets_filename, values_filename, rows):
+    offsets = array("I", [0])
+    values = array("I")
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+
+    write_array(os.path.join(directory, offsets_filename), "I", offsets)
+    write_array(os.path.join(directory, values_filename), "I", values)
+
+
+def write_morphology_index(directory, inflections, source):
+    """Writes the index of the inflected forms of each lemma, and of the lemmas of each form.
+    Args:
+        directory (str): The empty directory to write the index in
+        inflections (dict): The inflected forms of each lemma
+        source (dict): JSON-serializable description of WordNet and its version
+    """
+
+    strings = sorted(
+        set(inflections).union(*inflections.values()) if inflections else ()
+    )
+    string_ids = {string: index for index, string in enumerate(strings)}
+
+    lemmas_of_forms = defaultdict(list)
+    for lemma in sorted(inflections):
+        for form in inflections[lemma]:
+            lemmas_of_forms[form].append(string_ids[lemma])
+
+    write_strings(os.path.join(directory, STRINGS_FILENAME), strings)
+    write_offset_table(
+        directory,
+        FORM_OFFSETS_FILENAME,
+        FORMS_FILENAME,
+        (
+            sorted(string_ids[form] for form in inflections.get(string, ()))
+            for string in strings
+        ),
+    )
+    write_offset_table(
+        directory,
+        LEMMA_OFFSETS_FILENAME,
+        LEMMAS_FILENAME,
+        (lemmas_of_forms.get(string, ()) for string in strings),
+    )
+    write_manifest(
+        directory,
+        {
+            "format_version": MORPHOLOGY_INDEX_FORMAT_VERSION,
+            "source": source,
+            "lemmas": len(inflections),
+            "forms": len(lemmas_of_forms),
+        },
+    )
+
+
+class MorphologyIndex:
+    """Read-only view over an index written by write_morphology_index. Words are looked up
+    in lowercase, as WordNet's lemmas are."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.strings = read_strings(os.path.join(directory, STRINGS_FILENAME))
+        self.string_ids = {string: index for index, string in enumerate(self.strings)}
+        self.form_offsets = map_array(
+            os.path.join(directory, FORM_OFFSETS_FILENAME), "I"
+        )
+        self.forms = map_array(os.path.join(directory, FORMS_FILENAME), "I")
+        self.lemma_offsets = map_array(
+            os.path.join(directory, LEMMA_OFFSETS_FILENAME), "I"
+        )
+        self.lemmas = map_array(os.path.join(directory, LEMMAS_FILENAME), "I")
+
+    def _lookup(self, word, offsets, values):
+        string_id = self.string_ids.get(word.lower())
+        if string_id is None:
+            return []
+
+        return [
+            self.strings[value]
+            for value in values[offsets[string_id] : offsets[string_id + 1]]
+        ]
+
+    def inflections_of(self, lemma):
+        """Returns the inflected forms of a lemma, in alphabetical order."""
+
+        return self._lookup(lemma, self.form_offsets, self.forms)
+
+    def lemmas_of(self, form):
+        """Returns the lemmas that a form is an inflection of, in alphabetical order."""
+
+        return self._lookup(form, self.lemma_offsets, self.lemmas)
+
+    def get_variations(self, word):
+        """Returns the morphological variations of a word: its lemmas, its own inflected
+        forms, and the inflected forms of its lemmas, without the word itself."""
+
+        lemmas = self.lemmas_of(word)
+        variations = lemmas + self.inflections_of(word)
+        for lemma in lemmas:
+            variations += self.inflections_of(lemma)
+
+        word = word.lower()
+        return [
+            variation for variation in dict.fromkeys(variations) if variation != word
+        ]
+
+    def expand(self, words):
+        """Returns the morphological variations of each of many words, by word."""
+
+        return {word: self.get_variations(word) for word in words}
+
+
+@functools.lru_cache(maxsize=None)
+def get_morphology_index():
+    """Returns the morphology index of WordNet, built on first use."""
+
+    wordnet = get_wordnet()
+    source = {
+        "wordnet_version": wordnet.get_version(),
+        "nltk_version": nltk.__version__,
+    }
+    directory = get_index_directory(MORPHOLOGY_INDEX_DIRECTORY)
+    expected = {"format_version": MORPHOLOGY_INDEX_FORMAT_VERSION, "source": source}
+
+    ensure_index(
+        directory,
+        expected,
+        lambda build_directory: write_morphology_index(
+            build_directory, collect_inflections(wordnet), source
+        ),
+    )
+
+    return MorphologyIndex(directory)
@@ -1,84 +1,30 @@
-import os
+from corpus_index import get_corpus_index
+from morphology_index import get_morphology_index
 
-import nltk
-from nltk.collocations import BigramCollocationFinder
-from nltk.corpus import reuters
-from nltk.corpus import wordnet as wn
-from nltk.metrics import BigramAssocMeasures
-from nltk.probability import FreqDist
-from nltk.stem import WordNetLemmatizer
-from nltk.util import bigrams
+NUMBER_OF_COLLOCATIONS = 100
 
-NLTK_DOWNLOAD_FLAG_FILE = "nltk_downloads_complete.flag"
 
-
-def download_nltk_datasets():
-    if not os.path.exists(NLTK_DOWNLOAD_FLAG_FILE):
-        nltk.download("wordnet")
-        nltk.download("maxent_ne_chunker")
-        nltk.download("words")
-        nltk.download("stopwords")
-        nltk.download("reuters")
-        nltk.download("punkt")
-        nltk.download("averaged_perceptron_tagger")
-        nltk.download("omw")
-        nltk.download("webtext")
-
-        with open(NLTK_DOWNLOAD_FLAG_FILE, "w") as flag_file:
-            flag_file.write("Downloads complete.")
-
-    else:
-        print("NLTK datasets already downloaded.")
-
-
-def get_word_frequencies(words_list):
+def get_word_frequencies(words_list, corpus=None):
     # Check if words_list contains only strings
     if not all(isinstance(word, str) for word in words_list):
         raise ValueError(
             f"The function 'get_word_frequencies' received a list of words that didn't contain only strings: {words_list}"
         )
 
-    reuters_words = [w.lower() for w in reuters.words() if w.isalnum()]
-
-    # Calculate the frequency distribution for words
-    freq_dist = FreqDist(reuters_words)
+    corpus_index = get_corpus_index(corpus)
 
     # Return the frequencies of the words in words_list
-    return {word: freq_dist[word] for word in words_list}
+    return {word: corpus_index.frequency(word) for word in words_list}
 
 
-def get_collocations(words_list):
-    reuters_words = [w.lower() for w in reuters.words() if w.isalnum()]
-    bigram_measures = BigramAssocMeasures()
-    finder = BigramCollocationFinder.from_words(reuters_words)
+def get_collocations(words_list, corpus=None):
+    corpus_index = get_corpus_index(corpus)
 
-    # Apply the word filter only once
-    finder.apply_word_filter(lambda w: w not in words_list)
-
-    # Get the top collocations without any filtering
-    top_collocations = finder.nbest(bigram_measures.raw_freq, 100)
-
-    # Filter the collocations to keep only those that contain words from words_list
-    collocations = [
-        bigram
-        for bigram in top_collocations
-        if any(word in bigram for word in words_list)
-    ]
-
-    # Calculate the frequency distribution for bigrams
-    freq_dist = FreqDist(bigrams(reuters_words))
-
-    # Return collocations along with their frequencies
-    return [(bigram, freq_dist[bigram]) for bigram in collocations]
+    # The most frequent bigrams made only of words from words_list, along with their frequencies
+    return corpus_index.top_bigrams_within(words_list, NUMBER_OF_COLLOCATIONS)
 
 
 def get_morphological_variations(word):
-    lemmatizer = WordNetLemmatizer()
-    morphological_variations = []
-
-    for pos in ["a", "s", "r", "n", "v"]:
-        lemma = lemmatizer.lemmatize(word, pos)
-        if lemma != word:
-            morphological_variations.append(lemma)
-
-    return morphological_variations
+    # The lemmas of the word and their inflected forms, or the inflected forms of the word if
+    # it is a lemma: 'ran' gives 'run', 'running' and 'runs'
+    return get_morphology_index().get_variations(word)
@@ -0,0 +1,280 @@
+"""This module writes the generated pages of a run. Pages get rendered and written by a pool of
+background threads while the next words are being analyzed, and every page is written
+atomically, so that an interrupted run never leaves a truncated page behind.
+
+Pages can be laid out in a single directory, spread across sharded subdirectories so that no
+directory holds too many files, or packed into a single zip or tar archive.
+
+Functions:
+get_page_filename(word)
+get_shard(word)
+is_interactive()
+
+Classes:
+WriterReport
+PageWriter
+"""
+
+import filecmp
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from index_storage import write_atomically
+
+OUTPUT_DIRECTORY = "output"
+STYLESHEET_FILENAME = "styles.css"
+TEMPLATE_FILENAME = "word_info_template.html"
+LAYOUTS = ("flat", "sharded", "zip", "tar")
+ARCHIVE_EXTENSIONS = {"zip": ".zip", "tar": ".tar"}
+DEFAULT_WRITER_THREADS = 4
+
+# Pages waiting to be written, per writer thread, beyond which write() blocks
+PENDING_PAGES_PER_THREAD = 8
+
+# The number of leading hex digits of a word's hash that name its shard, which gives 256
+# shards: a million pages make about 4000 files per directory
+SHARD_DIGITS = 2
+
+
+class WriterReport(namedtuple("WriterReport", ["pages", "bytes", "seconds"])):
+    """How many pages a writer wrote, how many bytes they took, and how long it took."""
+
+    __slots__ = ()
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def get_page_filename(word):
+    return f"{word}_info.html"
+
+
+def get_shard(word):
+    """Returns the subdirectory of a word's page in the sharded layout. It comes from a hash of
+    the word, so that pages spread evenly whatever the words look like."""
+
+    return hashlib.md5(word.encode("utf-8")).hexdigest()[:SHARD_DIGITS]
+
+
+def is_interactive():
+    """Tells whether a person is likely watching the run: the standard output is a terminal,
+    and on Linux, there is a display to open a browser on."""
+
+    if not sys.stdout.isatty():
+        return False
+
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+    return True
+
+
+def render_page(html_content):
+    if isinstance(html_content, str):
+        return html_content
+
+    return "".join(html_content)
+
+
+class PageWriter:
+    """Writes pages in the background, in one of the LAYOUTS. Use it as a context manager:
+    leaving the context waits for every page to be written, and raises the first error that
+    occurred while writing."""
+
+    def __init__(
+        self,
+        path=OUTPUT_DIRECTORY,
+        layout="flat",
+        threads=DEFAULT_WRITER_THREADS,
+    ):
+        """Creates a writer.
+        Args:
+            path (str): The output directory, or the archive for the zip and tar layouts
+            layout (str): One of LAYOUTS
+            threads (int): The number of threads that render and write pages. Archives are
+            always written by a single thread.
+        Raises:
+            ValueError: If the layout isn't supported
+        """
+
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown output layout: {layout}")
+
+        self.path = path
+        self.layout = layout
+        self.threads = 1 if layout in ARCHIVE_EXTENSIONS else threads
+        self.pages = 0
+        self.bytes = 0
+        self._created_directories = set()
+        self._archive = None
+        self._archive_temporary_path = None
+        self._executor = None
+        self._pending = threading.BoundedSemaphore(
+            self.threads * PENDING_PAGES_PER_THREAD
+        )
+        self._counts_lock = threading.Lock()
+        self._errors = []
+        self._started = None
+
+    @property
+    def stylesheet_href(self):
+        """The link to the stylesheet from the pages, which sit one directory deeper than it in
+        the sharded layout."""
+
+        if self.layout == "sharded":
+            return f"../{STYLESHEET_FILENAME}"
+
+        return STYLESHEET_FILENAME
+
+    def _copy_stylesheet(self):
+        # The stylesheet lives in the default output directory, next to the pages
+        source = os.path.join(OUTPUT_DIRECTORY, STYLESHEET_FILENAME)
+        if not os.path.exists(source):
+            return
+
+        if self.layout == "zip":
+            self._archive.write(source, STYLESHEET_FILENAME)
+            return
+        if self.layout == "tar":
+            self._archive.add(source, STYLESHEET_FILENAME)
+            return
+
+        # Copied again when it changed, since the pages already there link to it too
+        destination = os.path.join(self.path, STYLESHEET_FILENAME)
+        if not os.path.exists(destination) or not filecmp.cmp(
+            source, destination, shallow=False
+        ):
+            self._make_directory(self.path)
+            shutil.copyfile(source, destination)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="page-writer"
+        )
+
+        if self.layout in ARCHIVE_EXTENSIONS:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # The archive is built under a temporary name and renamed into place when complete
+            self._archive_temporary_path = f"{self.path}.tmp"
+            if self.layout == "zip":
+                self._archive = zipfile.ZipFile(
+                    self._archive_temporary_path, "w", zipfile.ZIP_DEFLATED
+                )
+            else:
+                self._archive = tarfile.open(self._archive_temporary_path, "w")
+
+        self._copy_stylesheet()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self._executor.shutdown(wait=True)
+
+        if self._archive is not None:
+            self._archive.close()
+            if exception_type is None and not self._errors:
+                os.replace(self._archive_temporary_path, self.path)
+            else:
+                os.remove(self._archive_temporary_path)
+
+        if exception_type is None and self._errors:
+            raise self._errors[0]
+
+    def get_page_path(self, word):
+        """Returns where the page of a word gets written: a file path for the directory
+        layouts, or a member name for the archives."""
+
+        filename = get_page_filename(word)
+        if self.layout == "flat":
+            return os.path.join(self.path, filename)
+        if self.layout == "sharded":
+            return os.path.join(self.path, get_shard(word), filename)
+
+        return filename
+
+    def write(self, word, html_content, on_written=None):
+        """Queues a page to be rendered and written. It blocks while too many pages are waiting,
+        so that a fast producer can't pile up pages in memory.
+        Args:
+            word (str): The word whose page it is
+            html_content (str or iterable): The page, whole or as the pieces yielded by
+            generate_html_content
+            on_written (callable): If passed, it gets called with the word and the path of
+            the page, from a writer thread, once the page is written
+        Returns:
+            str: Where the page will be written
+        """
+
+        path = self.get_page_path(word)
+        self._pending.acquire()
+        self._executor.submit(self._write_page, path, html_content, word, on_written)
+        return path
+
+    def _write_page(self, path, html_content, word=None, on_written=None):
+        try:
+            if self.layout in ARCHIVE_EXTENSIONS:
+                size = self._add_to_archive(path, render_page(html_content))
+            else:
+                self._make_directory(os.path.dirname(path))
+                size = self._write_file(path, html_content)
+
+            with self._counts_lock:
+                self.pages += 1
+                self.bytes += size
+
+            if on_written is not None:
+                on_written(word, path)
+        except Exception as exception:
+            self._errors.append(exception)
+        finally:
+            self._pending.release()
+
+    @staticmethod
+    def _write_file(path, html_content):
+        pieces = [html_content] if isinstance(html_content, str) else html_content
+        sizes = []
+
+        def write(file):
+            # The pieces get written as the template renders them
+            for piece in pieces:
+                data = piece.encode("utf-8")
+                file.write(data)
+                sizes.append(len(data))
+
+        write_atomically(path, "wb", write, create_directory=False)
+        return sum(sizes)
+
+    def _add_to_archive(self, name, page):
+        data = page.encode("utf-8")
+
+        if self.layout == "zip":
+            self._archive.writestr(name, data)
+        else:
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mtime = int(time.time())
+            self._archive.addfile(member, io.BytesIO(data))
+
+        return len(data)
+
+    def _make_directory(self, directory):
+        if directory not in self._created_directories:
+            os.makedirs(directory or ".", exist_ok=True)
+            self._created_directories.add(directory)
+
+    def report(self):
+        """Returns how many pages were written so far, and how fast."""
+
+        seconds = time.perf_counter() - self._started if self._started else 0.0
+        return WriterReport(self.pages, self.bytes, seconds)
@@ -0,0 +1,334 @@
+"""This module writes the results of analyze_word as machine-readable records, one per word,
+for the programs that index them, instead of HTML pages that they would have to scrape back.
+
+Records are written as JSON Lines (one JSON object per line) or as MessagePack (one map
+after the other, with no framing in between), to a file or to the standard output, as the
+words get analyzed. Either way, a consumer can read them one at a time with read_records,
+however many there are.
+
+Every record is a map with these keys:
+
+    version   RECORD_FORMAT_VERSION, bumped whenever the layout of the records changes
+    word      The word
+    results   The results of analyze_word, encoded by result_serialization.to_json_value:
+              sets become sorted lists tagged '__set__', tuples lists tagged '__tuple__', and
+              dictionaries whose keys aren't strings lists of pairs tagged '__dict__'. They
+              can be rebuilt with from_json_value. Absent when the word couldn't be analyzed.
+              When some data was temporarily out of reach, such as the etymology, the
+              results list the analyzers that missed it under 'unavailable'.
+    error     The 'type' and 'message' of the error that prevented analyzing the word, if any
+
+MessagePack gets encoded here, for the few types that records are made of, so that it needs
+no extra dependency.
+
+Functions:
+make_record(outcome)
+pack_value(value)
+unpack_value(file)
+read_records(file, record_format)
+
+Classes:
+RecordWriter
+"""
+
+import json
+import os
+import struct
+import sys
+
+from result_serialization import to_json_value
+
+RECORD_FORMAT_VERSION = 1
+RECORD_FORMATS = ("jsonl", "msgpack")
+RECORD_EXTENSIONS = {"jsonl": ".jsonl", "msgpack": ".msgpack"}
+
+# The output path that stands for the standard output
+STANDARD_OUTPUT = "-"
+
+
+def make_record(outcome):
+    """Returns the record of a WordAnalysisOutcome, as a value made of JSON types."""
+
+    record = {"version": RECORD_FORMAT_VERSION, "word": outcome.word}
+
+    if outcome.error_type is None:
+        record["results"] = to_json_value(outcome.results)
+    else:
+        record["error"] = {"type": outcome.error_type, "message": outcome.error_message}
+
+    return record
+
+
+def pack_header(small_tag, small_limit, tags, size):
+    # The header of a string, array or map: the length fits in the tag byte when it's small,
+    # and otherwise follows it on 1, 2 or 4 bytes
+    if size < small_limit:
+        return bytes([small_tag | size])
+
+    for tag, length_format in tags:
+        if size < 1 << (8 * struct.calcsize(length_format)):
+            return bytes([tag]) + struct.pack(length_format, size)
+
+    raise ValueError(f"A value of {size} items is too large for MessagePack.")
+
+
+def pack_integer(value):
+    if 0 <= value < 0x80:
+        return bytes([value])
+    if -0x20 <= value < 0:
+        return struct.pack(">b", value)
+
+    formats = (
+        [(0xCC, ">B"), (0xCD, ">H"), (0xCE, ">I"), (0xCF, ">Q")]
+        if value >= 0
+        else [(0xD0, ">b"), (0xD1, ">h"), (0xD2, ">i"), (0xD3, ">q")]
+    )
+    for tag, integer_format in formats:
+        bits = 8 * struct.calcsize(integer_format)
+        low, high = (0, 1 << bits) if value >= 0 else (-(1 << (bits - 1)), 0)
+        if low <= value < high:
+            return bytes([tag]) + struct.pack(integer_format, value)
+
+    raise ValueError(f"The integer {value} is too large for MessagePack.")
+
+
+def pack_value(value, output=None):
+    """Encodes a value made of JSON types as MessagePack.
+    Args:
+        value: None, a boolean, a number, a string, or a list or dictionary of those. The
+        keys of dictionaries must be strings.
+        output (bytearray): If passed, the encoding gets appended to it
+    Returns:
+        bytearray: The encoding
+    Raises:
+        ValueError: If the value, or one of its items, can't be encoded.
+    """
+
+    output = bytearray() if output is None else output
+
+    if value is None:
+        output.append(0xC0)
+    elif value is True or value is False:
+        output.append(0xC3 if value else 0xC2)
+    elif isinstance(value, int):
+        output += pack_integer(value)
+    elif isinstance(value, float):
+        output += b"\xcb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        output += pack_header(
+            0xA0, 32, [(0xD9, ">B"), (0xDA, ">H"), (0xDB, ">I")], len(data)
+        )
+        output += data
+    elif isinstance(value, list):
+        output += pack_header(0x90, 16, [(0xDC, ">H"), (0xDD, ">I")], len(value))
+        for item in value:
+            pack_value(item, output)
+    elif isinstance(value, dict):
+        output += pack_header(0x80, 16, [(0xDE, ">H"), (0xDF, ">I")], len(value))
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise ValueError(f"MessagePack records can't have the key {key!r}.")
+            pack_value(key, output)
+            pack_value(item, output)
+    else:
+        raise ValueError(f"MessagePack records can't hold {type(value).__name__}.")
+
+    return output
+
+
+# The fixed-size values, by tag: their struct format
+FIXED_FORMATS = {
+    0xCA: ">f",
+    0xCB: ">d",
+    0xCC: ">B",
+    0xCD: ">H",
+    0xCE: ">I",
+    0xCF: ">Q",
+    0xD0: ">b",
+    0xD1: ">h",
+    0xD2: ">i",
+    0xD3: ">q",
+}
+
+# The strings, binaries, arrays and maps whose length follows their tag: their kind and the
+# struct format of their length
+SIZED_FORMATS = {
+    0xC4: ("binary", ">B"),
+    0xC5: ("binary", ">H"),
+    0xC6: ("binary", ">I"),
+    0xD9: ("string", ">B"),
+    0xDA: ("string", ">H"),
+    0xDB: ("string", ">I"),
+    0xDC: ("array", ">H"),
+    0xDD: ("array", ">I"),
+    0xDE: ("map", ">H"),
+    0xDF: ("map", ">I"),
+}
+
+
+def read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("The MessagePack stream ends in the middle of a value.")
+
+    return data
+
+
+def unpack_value(file):
+    """Reads the next MessagePack value of a binary file, which can hold anything that
+    pack_value writes, and the binaries and 32-bit floats that other encoders may write.
+    Returns:
+        The value. Binaries are returned as bytes.
+    Raises:
+        EOFError: If the file ends before the value starts.
+        ValueError: If the value is truncated, or of a type that records don't use.
+    """
+
+    tag_byte = file.read(1)
+    if not tag_byte:
+        raise EOFError
+    tag = tag_byte[0]
+
+    if tag < 0x80:
+        return tag
+    if tag >= 0xE0:
+        return tag - 0x100
+    if tag < 0x90:
+        kind, size = "map", tag & 0x0F
+    elif tag < 0xA0:
+        kind, size = "array", tag & 0x0F
+    elif tag < 0xC0:
+        kind, size = "string", tag & 0x1F
+    elif tag in (0xC0, 0xC2, 0xC3):
+        return {0xC0: None, 0xC2: False, 0xC3: True}[tag]
+    elif tag in FIXED_FORMATS:
+        value_format = FIXED_FORMATS[tag]
+        return struct.unpack(
+            value_format, read_exactly(file, struct.calcsize(value_format))
+        )[0]
+    elif tag in SIZED_FORMATS:
+        kind, size_format = SIZED_FORMATS[tag]
+        (size,) = struct.unpack(
+            size_format, read_exactly(file, struct.calcsize(size_format))
+        )
+    else:
+        raise ValueError(f"Unsupported MessagePack type: 0x{tag:02x}")
+
+    try:
+        if kind == "string":
+            return read_exactly(file, size).decode("utf-8")
+        if kind == "binary":
+            return read_exactly(file, size)
+        if kind == "array":
+            return [unpack_value(file) for _ in range(size)]
+
+        return {unpack_value(file): unpack_value(file) for _ in range(size)}
+    except EOFError:
+        raise ValueError(
+            "The MessagePack stream ends in the middle of a value."
+        ) from None
+
+
+def read_records(file, record_format):
+    """Yields the records of a file one at a time, without reading the rest of it.
+    Args:
+        file: The file of records, opened in binary mode
+        record_format (str): One of RECORD_FORMATS
+    Raises:
+        ValueError: If a record is malformed, or was written in another version of the format.
+    """
+
+    if record_format == "jsonl":
+        records = (json.loads(line) for line in file if line.strip())
+    else:
+
+        def unpack_records():
+            while True:
+                try:
+                    yield unpack_value(file)
+                except EOFError:
+                    return
+
+        records = unpack_records()
+
+    for record in records:
+        if (
+            not isinstance(record, dict)
+            or record.get("version") != RECORD_FORMAT_VERSION
+        ):
+            raise ValueError(
+                f"Expected records of version {RECORD_FORMAT_VERSION} of the format."
+            )
+        yield record
+
+
+def encode_record(record, record_format):
+    if record_format == "jsonl":
+        # Non-finite numbers aren't JSON, and the analyzers never return them
+        return (
+            json.dumps(
+                record, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+            )
+            + "\n"
+        ).encode("utf-8")
+
+    return bytes(pack_value(record))
+
+
+class RecordWriter:
+    """Writes the records of analyzed words as they come, to a file or to the standard
+    output. Use it as a context manager: a file is written under a temporary name and only
+    renamed into place once every record is written, like the page archives."""
+
+    def __init__(self, path=STANDARD_OUTPUT, record_format="jsonl"):
+        """Creates a writer.
+        Args:
+            path (str): The file to write, or '-' for the standard output
+            record_format (str): One of RECORD_FORMATS
+        Raises:
+            ValueError: If the format isn't supported
+        """
+
+        if record_format not in RECORD_FORMATS:
+            raise ValueError(f"Unknown record format: {record_format}")
+
+        self.path = path
+        self.record_format = record_format
+        self.records = 0
+        self.bytes = 0
+        self._file = None
+        self._temporary_path = None
+
+    def __enter__(self):
+        if self.path == STANDARD_OUTPUT:
+            self._file = sys.stdout.buffer
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._temporary_path = f"{self.path}.tmp"
+            self._file = open(self._temporary_path, "wb")
+
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if self._temporary_path is None:
+            self._file.flush()
+            return
+
+        self._file.close()
+        if exception_type is None:
+            os.replace(self._temporary_path, self.path)
+        else:
+            os.remove(self._temporary_path)
+
+    def write(self, outcome):
+        """Writes the record of a WordAnalysisOutcome. On the standard output, it gets
+        flushed right away, so that a consumer reading the pipe gets it."""
+
+        data = encode_record(make_record(outcome), self.record_format)
+        self._file.write(data)
+        if self._temporary_path is None:
+            self._file.flush()
+
+        self.records += 1
+        self.bytes += len(data)
@@ -0,0 +1,264 @@
+"""This module provides a persistent cache of analysis results in front of analyze_word, so that
+words analyzed before don't redo their WordNet work, corpus lookups and etymology request.
+Words of a materialized store get read from it before the cache is even looked at.
+
+The results are stored in an SQLite database, keyed by the normalized word and by a hash of
+the analysis version (the analyzers' version plus the versions of NLTK, WordNet and the corpus
+indexes). When the database grows beyond its size limit, the least recently used entries get
+evicted.
+
+Functions:
+normalize_word(word)
+get_version_key(version)
+analyze_word_with_cache(word, cache, timings)
+
+Classes:
+ResultCache
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+
+from index_storage import get_data_directory
+from result_serialization import canonical_json, decode_analysis, encode_analysis
+from word_analysis import analyze_word, get_analysis_version, is_complete
+
+RESULT_CACHE_FILENAME = "results.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# How many entries get stored between two checks of the size of the cache
+EVICTION_CHECK_INTERVAL = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    word TEXT NOT NULL,
+    version TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (word, version)
+);
+CREATE INDEX IF NOT EXISTS results_by_last_access ON results (last_access);
+"""
+
+
+def normalize_word(word):
+    """Normalizes a word for use as a cache key. Surrounding whitespace and Unicode
+    representation differences are dropped, but case is kept, because some analyzers
+    (such as the morphological variations and the etymology) are case-sensitive."""
+
+    return unicodedata.normalize("NFC", word.strip())
+
+
+def get_version_key(version):
+    """Returns the short hash that results of an analysis version get stored under."""
+
+    return hashlib.sha256(canonical_json(version).encode("utf-8")).hexdigest()[:16]
+
+
+class ResultCache:
+    """Size-bounded, persistent cache of analysis results.
+
+    A cache can be shared by the threads of a process, and it can be passed to worker
+    processes: each process opens its own connection to the database.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        """Creates a cache, without touching the database until it gets used.
+        Args:
+            path (str): The SQLite database. Defaults to a file in the data directory.
+            max_bytes (int): The total size of stored results beyond which entries get
+            evicted. With None, entries are kept until they're removed.
+            version (dict): The analysis version to key entries with. Defaults to the one of
+            the installed analyzers and data, which gets computed on first use.
+        """
+
+        self.path = path or os.path.join(get_data_directory(), RESULT_CACHE_FILENAME)
+        self.max_bytes = max_bytes
+        self._version = version
+        self._version_key = None
+        self._connection = None
+        self._connection_pid = None
+        self._lock = threading.Lock()
+        self._stores_since_eviction_check = 0
+
+    def __getstate__(self):
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "version": self._version,
+            "version_key": self.version_key,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"], state["version"])
+        self._version_key = state["version_key"]
+
+    @property
+    def version_key(self):
+        """The hash of the analysis version that entries get stored under."""
+
+        if self._version_key is None:
+            self._version_key = get_version_key(self._version or get_analysis_version())
+
+        return self._version_key
+
+    def _connect(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def get(self, word):
+        """Returns the cached results of a word, or None if they aren't cached."""
+
+        key = (normalize_word(word), self.version_key)
+
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT payload FROM results WHERE word = ? AND version = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+
+            with connection:
+                connection.execute(
+                    "UPDATE results SET last_access = ? WHERE word = ? AND version = ?",
+                    (time.time(), *key),
+                )
+
+        return decode_analysis(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, word, analysis_results):
+        """Stores the results of a word, evicting the least recently used entries if the
+        cache grew beyond its size limit."""
+
+        payload = zlib.compress(encode_analysis(analysis_results).encode("utf-8"))
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (
+                        normalize_word(word),
+                        self.version_key,
+                        payload,
+                        len(payload),
+                        time.time(),
+                    ),
+                )
+
+            self._stores_since_eviction_check += 1
+            if (
+                self.max_bytes is not None
+                and self._stores_since_eviction_check >= EVICTION_CHECK_INTERVAL
+            ):
+                self._evict(connection)
+
+    def _evict(self, connection):
+        self._stores_since_eviction_check = 0
+        (total_size,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+
+        if self.max_bytes is None or total_size <= self.max_bytes:
+            return
+
+        excess = total_size - self.max_bytes
+        evicted_words = []
+        for word, version, size in connection.execute(
+            "SELECT word, version, size FROM results ORDER BY last_access"
+        ):
+            evicted_words.append((word, version))
+            excess -= size
+            if excess <= 0:
+                break
+
+        with connection:
+            connection.executemany(
+                "DELETE FROM results WHERE word = ? AND version = ?", evicted_words
+            )
+
+    def evict(self):
+        """Evicts the least recently used entries until the cache fits its size limit."""
+
+        with self._lock:
+            self._evict(self._connect())
+
+    def invalidate(self, word):
+        """Removes the cached results of a word, for every analysis version."""
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM results WHERE word = ?", (normalize_word(word),)
+                )
+
+    def remove_other_versions(self):
+        """Removes the results stored under another analysis version than this cache's,
+        which it would never return."""
+
+        version_key = self.version_key
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM results WHERE version != ?", (version_key,)
+                )
+
+    def clear(self):
+        """Removes every cached result."""
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM results")
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def analyze_word_with_cache(word, cache, timings=None):
+    """Returns the results of analyze_word for a word, from the materialized store or the
+    cache when they're there.
+    Args:
+        word (str): The word to analyze
+        cache (ResultCache): The cache to read and fill. With None, the word just gets analyzed,
+        without reading the materialized store either.
+        timings (dict): Passed on to analyze_word. It stays empty if the results were stored.
+    """
+
+    if cache is None:
+        return analyze_word(word, timings=timings)
+
+    # Imported here, as the store imports this module
+    from materialized_store import get_materialized_store
+
+    store = get_materialized_store()
+    if store is not None:
+        analysis_results = store.get(word)
+        if analysis_results is not None:
+            return analysis_results
+
+    analysis_results = cache.get(word)
+    if analysis_results is None:
+        analysis_results = analyze_word(word, timings=timings)
+        # Results that miss data that was temporarily out of reach get analyzed again
+        if is_complete(analysis_results):
+            cache.put(word, analysis_results)
+
+    return analysis_results
@@ -0,0 +1,86 @@
+"""This module provides a faithful JSON encoding of analysis results. The analyzers return sets,
+tuples and dictionaries with tuple keys, which plain JSON would turn into lists or reject, so
+those get tagged and rebuilt on decoding.
+
+Sets are written in a deterministic order, so the same results always encode to the same text.
+
+Functions:
+to_json_value(value)
+from_json_value(value)
+encode_analysis(analysis_results)
+decode_analysis(text)
+"""
+
+import json
+
+SET_TAG = "__set__"
+TUPLE_TAG = "__tuple__"
+DICT_TAG = "__dict__"
+TAGS = {SET_TAG, TUPLE_TAG, DICT_TAG}
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def to_json_value(value):
+    """Converts a value made of sets, tuples, lists, dictionaries and scalars into a value that
+    JSON can represent, tagging the containers that JSON doesn't have."""
+
+    if isinstance(value, (set, frozenset)):
+        return {
+            SET_TAG: sorted((to_json_value(item) for item in value), key=canonical_json)
+        }
+
+    if isinstance(value, tuple):
+        return {TUPLE_TAG: [to_json_value(item) for item in value]}
+
+    if isinstance(value, list):
+        return [to_json_value(item) for item in value]
+
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and not TAGS.intersection(value):
+            return {key: to_json_value(item) for key, item in value.items()}
+
+        return {
+            DICT_TAG: [
+                [to_json_value(key), to_json_value(item)] for key, item in value.items()
+            ]
+        }
+
+    return value
+
+
+def from_json_value(value):
+    """Rebuilds the value that to_json_value converted."""
+
+    if isinstance(value, list):
+        return [from_json_value(item) for item in value]
+
+    if isinstance(value, dict):
+        if len(value) == 1:
+            tag, items = next(iter(value.items()))
+            if tag == SET_TAG:
+                return {from_json_value(item) for item in items}
+            if tag == TUPLE_TAG:
+                return tuple(from_json_value(item) for item in items)
+            if tag == DICT_TAG:
+                return {
+                    from_json_value(key): from_json_value(item) for key, item in items
+                }
+
+        return {key: from_json_value(item) for key, item in value.items()}
+
+    return value
+
+
+def encode_analysis(analysis_results):
+    """Encodes the results of analyze_word as JSON text."""
+
+    return canonical_json(to_json_value(analysis_results))
+
+
+def decode_analysis(text):
+    """Decodes the JSON text written by encode_analysis back into analysis results."""
+
+    return from_json_value(json.loads(text))
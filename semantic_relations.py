@@ -1,53 +1,56 @@
-from nltk.corpus import wordnet as wn
+from lazy_import import LazyFunction
+from utils import lookup_synsets, replace_underscore_with_space
+from wordnet_traversal import traverse_word
 
-from progress_reporter import progress_wrapper
-from utils import replace_underscore_with_space
+get_hypernym_index = LazyFunction("hypernym_index", "get_hypernym_index")
 
 
-@progress_wrapper
 def get_semantic_fields(word):
-    synsets = wn.synsets(word)
-    semantic_fields = []
-    for synset in synsets:
-        for hypernym in synset.hypernyms():
-            semantic_fields.append(
-                replace_underscore_with_space(hypernym.name().split(".")[0])
-            )
-    return semantic_fields
+    return traverse_word(word, ("semantic_fields",))["semantic_fields"]
 
 
-@progress_wrapper
 def get_semantic_relations(word):
-    synsets = wn.synsets(word)
-    hyponyms = []
-    hypernyms = []
-    meronyms = []
-    for synset in synsets:
-        hyponyms.extend(
-            [replace_underscore_with_space(hypo.name()) for hypo in synset.hyponyms()]
-        )
-        hypernyms.extend(
-            [
-                replace_underscore_with_space(hyper.name())
-                for hyper in synset.hypernyms()
-            ]
-        )
-        meronyms.extend(
-            [
-                replace_underscore_with_space(mero.name())
-                for mero in synset.part_meronyms()
-            ]
-        )
-        meronyms.extend(
-            [
-                replace_underscore_with_space(mero.name())
-                for mero in synset.substance_meronyms()
-            ]
-        )
-        meronyms.extend(
-            [
-                replace_underscore_with_space(mero.name())
-                for mero in synset.member_meronyms()
-            ]
-        )
-    return hyponyms, hypernyms, meronyms
+    results = traverse_word(word, ("hyponyms", "hypernyms", "meronyms"))
+    return results["hyponyms"], results["hypernyms"], results["meronyms"]
+
+
+def get_hierarchy_synset_names(word, hypernym_index):
+    # Only nouns and verbs are organized in hypernym hierarchies
+    return [
+        synset.name()
+        for synset in lookup_synsets(word)
+        if synset.name() in hypernym_index
+    ]
+
+
+def get_semantic_field_chains(word):
+    """Returns the chains of semantic fields of a word, from the most general down to the
+    closest, one for each hypernym path of each of its noun and verb synsets."""
+
+    hypernym_index = get_hypernym_index()
+    chains = {}
+
+    for name in get_hierarchy_synset_names(word, hypernym_index):
+        for path in hypernym_index.get_hypernym_paths(name):
+            chain = tuple(
+                replace_underscore_with_space(hypernym.split(".")[0])
+                for hypernym in path[:-1]
+            )
+            if chain:
+                chains[chain] = None
+
+    return [list(chain) for chain in chains]
+
+
+def is_kind_of(word, other_word):
+    """Tells whether a meaning of a word is a kind of a meaning of another, at any depth of
+    the hierarchy: 'dog' is a kind of 'animal'."""
+
+    hypernym_index = get_hypernym_index()
+    ancestors = get_hierarchy_synset_names(other_word, hypernym_index)
+
+    return any(
+        hypernym_index.is_hyponym(name, ancestor)
+        for name in get_hierarchy_synset_names(word, hypernym_index)
+        for ancestor in ancestors
+    )
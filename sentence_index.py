@@ -0,0 +1,261 @@
+"""This module provides a persisted inverted index from lowercased tokens to the sentences of a
+corpus that contain them, so that the phrases around a word can be fetched without scanning
+the corpus sentence by sentence.
+
+Every token maps to (file, sentence, token offset) postings, recorded for the first occurrence
+of the token in each sentence. The sentences themselves are kept in a flat file with an offset
+table, so a lookup only reads the sentences that match.
+
+Functions:
+write_sentence_index(directory, documents, source)
+load_sentence_index(name, source, get_documents)
+get_webtext_index()
+
+Classes:
+SentenceIndex
+"""
+
+import functools
+import os
+from itertools import zip_longest
+
+import nltk
+from nltk.corpus import webtext
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    read_strings,
+    write_array,
+    write_manifest,
+    write_strings,
+)
+
+SENTENCE_INDEX_FORMAT_VERSION = 1
+SENTENCE_INDEXES_DIRECTORY = "sentences"
+
+FILEIDS_FILENAME = "fileids.txt"
+FILE_SENTENCE_OFFSETS_FILENAME = "file_sentence_offsets.bin"
+SENTENCES_FILENAME = "sentences.txt"
+SENTENCE_OFFSETS_FILENAME = "sentence_offsets.bin"
+VOCABULARY_FILENAME = "vocabulary.txt"
+POSTING_OFFSETS_FILENAME = "posting_offsets.bin"
+POSTINGS_FILENAME = "postings.bin"
+
+# Tokens of a stored sentence are separated by tabs, and sentences by newlines
+TOKEN_SEPARATOR = "\t"
+
+# Each posting is stored as a (file, sentence within the file, token offset) triple
+POSTING_WIDTH = 3
+
+# How many tokens of context are shown before and after the word in a phrase
+TOKENS_BEFORE = 4
+TOKENS_AFTER = 5
+
+
+def write_sentence_index(directory, documents, source):
+    """Writes the sentence index of a corpus to 'directory'.
+    Args:
+        directory (str): The directory that will hold the index files
+        documents (iterable): (fileid, sentences) pairs, where each sentence is a list of tokens
+        source (dict): JSON-serializable description of where the documents came from
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    fileids = []
+    file_sentence_offsets = [0]
+    sentence_offsets = [0]
+    postings_by_token = {}
+
+    with open(os.path.join(directory, SENTENCES_FILENAME), "wb") as sentences_file:
+        for file_index, (fileid, sentences) in enumerate(documents):
+            fileids.append(fileid)
+            sentence_count = 0
+
+            for sentence_index, sentence in enumerate(sentences):
+                sentence_count += 1
+                encoded = (TOKEN_SEPARATOR.join(sentence) + "\n").encode("utf-8")
+                sentences_file.write(encoded)
+                sentence_offsets.append(sentence_offsets[-1] + len(encoded))
+
+                first_offsets = {}
+                for token_offset, token in enumerate(sentence):
+                    first_offsets.setdefault(token.lower(), token_offset)
+
+                for token, token_offset in first_offsets.items():
+                    postings_by_token.setdefault(token, []).extend(
+                        (file_index, sentence_index, token_offset)
+                    )
+
+            file_sentence_offsets.append(file_sentence_offsets[-1] + sentence_count)
+
+    vocabulary = sorted(postings_by_token)
+    posting_offsets = [0]
+    for token in vocabulary:
+        posting_offsets.append(
+            posting_offsets[-1] + len(postings_by_token[token]) // POSTING_WIDTH
+        )
+
+    write_strings(os.path.join(directory, FILEIDS_FILENAME), fileids)
+    write_array(
+        os.path.join(directory, FILE_SENTENCE_OFFSETS_FILENAME),
+        "Q",
+        file_sentence_offsets,
+    )
+    write_array(
+        os.path.join(directory, SENTENCE_OFFSETS_FILENAME), "Q", sentence_offsets
+    )
+    write_strings(os.path.join(directory, VOCABULARY_FILENAME), vocabulary)
+    write_array(os.path.join(directory, POSTING_OFFSETS_FILENAME), "Q", posting_offsets)
+    write_array(
+        os.path.join(directory, POSTINGS_FILENAME),
+        "I",
+        (value for token in vocabulary for value in postings_by_token[token]),
+    )
+    write_manifest(
+        directory,
+        {
+            "format_version": SENTENCE_INDEX_FORMAT_VERSION,
+            "source": source,
+            "sentence_count": len(sentence_offsets) - 1,
+            "vocabulary_size": len(vocabulary),
+        },
+    )
+
+
+class SentenceIndex:
+    """Read-only view over a sentence index written by write_sentence_index."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = read_manifest(directory)
+        self.fileids = read_strings(os.path.join(directory, FILEIDS_FILENAME))
+        self.file_indexes = {fileid: index for index, fileid in enumerate(self.fileids)}
+        self.file_sentence_offsets = map_array(
+            os.path.join(directory, FILE_SENTENCE_OFFSETS_FILENAME), "Q"
+        )
+        self.sentence_offsets = map_array(
+            os.path.join(directory, SENTENCE_OFFSETS_FILENAME), "Q"
+        )
+        self.token_ids = {
+            token: index
+            for index, token in enumerate(
+                read_strings(os.path.join(directory, VOCABULARY_FILENAME))
+            )
+        }
+        self.posting_offsets = map_array(
+            os.path.join(directory, POSTING_OFFSETS_FILENAME), "Q"
+        )
+        self.postings = map_array(os.path.join(directory, POSTINGS_FILENAME), "I")
+        self.sentences = map_array(os.path.join(directory, SENTENCES_FILENAME), "B")
+
+    def occurrences(self, word):
+        """Returns the (fileid, sentence index, token offset) of the first occurrence of 'word'
+        in every sentence that contains it, ignoring case, in corpus order."""
+
+        token_id = self.token_ids.get(word.lower())
+        if token_id is None:
+            return []
+
+        start = self.posting_offsets[token_id] * POSTING_WIDTH
+        end = self.posting_offsets[token_id + 1] * POSTING_WIDTH
+        postings = self.postings[start:end]
+
+        return [
+            (
+                self.fileids[postings[index]],
+                postings[index + 1],
+                postings[index + 2],
+            )
+            for index in range(0, len(postings), POSTING_WIDTH)
+        ]
+
+    def sentence(self, fileid, sentence_index):
+        """Returns the tokens of a sentence, reading only that sentence from disk."""
+
+        global_index = (
+            self.file_sentence_offsets[self.file_indexes[fileid]] + sentence_index
+        )
+        start = self.sentence_offsets[global_index]
+        end = self.sentence_offsets[global_index + 1] - 1
+
+        return bytes(self.sentences[start:end]).decode("utf-8").split(TOKEN_SEPARATOR)
+
+    def related_phrases(self, word, limit):
+        """Returns up to 'limit' phrases around the occurrences of 'word'. The phrases are
+        spread across the files of the corpus by taking one occurrence of each file in
+        turn, rather than exhausting the first file that mentions the word.
+        Args:
+            word (str): The word to find, ignoring case
+            limit (int): The maximum number of phrases
+        """
+
+        occurrences_by_file = {}
+        for occurrence in self.occurrences(word):
+            occurrences_by_file.setdefault(occurrence[0], []).append(occurrence)
+
+        phrases = []
+        for round_of_occurrences in zip_longest(*occurrences_by_file.values()):
+            for occurrence in round_of_occurrences:
+                if occurrence is None:
+                    continue
+                if len(phrases) >= limit:
+                    return phrases
+
+                fileid, sentence_index, token_offset = occurrence
+                sentence = self.sentence(fileid, sentence_index)
+                phrases.append(
+                    " ".join(
+                        sentence[
+                            max(0, token_offset - TOKENS_BEFORE) : token_offset
+                            + TOKENS_AFTER
+                            + 1
+                        ]
+                    )
+                )
+
+        return phrases
+
+
+def load_sentence_index(name, source, get_documents):
+    """Loads the sentence index called 'name', building and persisting it first if it is
+    missing or was built from a different source or index format.
+    Args:
+        name (str): The name under which the index is stored
+        source (dict): JSON-serializable description of the corpus and its version
+        get_documents (callable): Returns the (fileid, sentences) pairs of the corpus, only
+        called when the index has to be built
+    """
+
+    directory = get_index_directory(os.path.join(SENTENCE_INDEXES_DIRECTORY, name))
+    expected = {"format_version": SENTENCE_INDEX_FORMAT_VERSION, "source": source}
+
+    ensure_index(
+        directory,
+        expected,
+        lambda build_directory: write_sentence_index(
+            build_directory, get_documents(), source
+        ),
+    )
+
+    return SentenceIndex(directory)
+
+
+def get_webtext_documents():
+    return ((fileid, webtext.sents(fileid)) for fileid in webtext.fileids())
+
+
+@functools.lru_cache(maxsize=None)
+def get_webtext_index():
+    """Returns the sentence index of the webtext corpus, built on first use."""
+
+    source = {
+        "corpus": "webtext",
+        "nltk_version": nltk.__version__,
+        "fileids": webtext.fileids(),
+    }
+
+    return load_sentence_index("webtext", source, get_webtext_documents)
@@ -0,0 +1,83 @@
+import unittest
+from urllib.request import urlopen
+
+from benchmark import (
+    Benchmark,
+    compare_to_baseline,
+    format_results,
+    measure_target,
+    start_etymology_stub,
+)
+from etymology_fetcher import extract_etymology
+
+BASELINE = {
+    "analyze_word": {
+        "cold_seconds": 2.0,
+        "warm_seconds": 0.1,
+        "peak_memory_bytes": 50 * 1024 * 1024,
+    },
+    "get_meanings": {"cold_seconds": 1.0, "warm_seconds": 0.001},
+}
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_slower_measurements_are_regressions(self):
+        results = {
+            "analyze_word": {
+                "cold_seconds": 2.1,
+                "warm_seconds": 0.15,
+                "peak_memory_bytes": 80 * 1024 * 1024,
+            }
+        }
+
+        regressions = compare_to_baseline(results, BASELINE, threshold=0.2)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("analyze_word: warm_seconds"))
+        self.assertTrue(regressions[1].startswith("analyze_word: peak_memory_bytes"))
+
+    def test_differences_below_the_noise_floor_are_ignored(self):
+        results = {
+            "get_meanings": {"cold_seconds": 1.0, "warm_seconds": 0.003},
+            "get_collocations": {"cold_seconds": 9.0, "warm_seconds": 9.0},
+        }
+
+        self.assertEqual(compare_to_baseline(results, BASELINE), [])
+
+    def test_targets_are_measured_cold_and_warm(self):
+        benchmark = Benchmark("capwords", "string", "capwords", "word")
+
+        results = measure_target(benchmark, ["house", "run"], repeat=3)
+
+        self.assertEqual(results["calls"], 2)
+        self.assertEqual(results["errors"], 0)
+        self.assertGreater(results["cold_seconds"], 0)
+        self.assertIn("capwords", format_results({"capwords": results}))
+
+    def test_errors_are_counted(self):
+        benchmark = Benchmark("int", "builtins", "int", "word")
+
+        results = measure_target(benchmark, ["1", "one"], repeat=1)
+
+        self.assertEqual(results["errors"], 1)
+
+    def test_peak_memory_is_measured(self):
+        benchmark = Benchmark("bytearray", "builtins", "bytearray", "word")
+
+        results = measure_target(benchmark, [1024 * 1024], track_memory=True)
+
+        self.assertGreaterEqual(results["peak_memory_bytes"], 1024 * 1024)
+
+    def test_stub_serves_etymologies(self):
+        stub = start_etymology_stub()
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+
+        with urlopen(f"http://127.0.0.1:{stub.server_port}/word/house") as response:
+            html = response.read().decode("utf-8")
+
+        self.assertEqual(extract_etymology(html), "The stub etymology of house.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import build_manifest
+import cli
+import data_bundle
+import output_writer
+import result_cache
+from build_manifest import BuildManifest
+from output_writer import PageWriter
+
+ANALYSIS_RESULTS = {
+    "meanings": {"the quality of being white"},
+    "pos_and_transitivity": [("noun", None)],
+    "etymology": "Old English hwit",
+    "synonyms": {"whiteness"},
+    "antonyms": {"black"},
+    "word_frequencies": {"white": 12},
+    "collocations": [(("white", "house"), 3)],
+    "phrasal_verbs": set(),
+    "idiomatic_expressions": set(),
+    "related_phrases_and_expressions": [],
+    "semantic_fields": ["noun.attribute"],
+    "hyponyms": [],
+    "hypernyms": [],
+    "meronyms": [],
+    "domain_words": set(),
+    "alternative_words": set(),
+    "associated_nouns": set(),
+    "associated_verbs": set(),
+    "morphological_variations": {"whites"},
+}
+
+WORDS = ["white", "black"]
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.output = os.path.join(self.temporary_directory.name, "output")
+        self.template = os.path.join(self.temporary_directory.name, "template.html")
+        shutil.copyfile(output_writer.TEMPLATE_FILENAME, self.template)
+
+        self.analyzed = []
+        self.analysis_version = {"analyzers": 1}
+
+        def analyze(word, timings=None):
+            self.analyzed.append(word)
+            return copy.deepcopy(ANALYSIS_RESULTS)
+
+        for patcher in [
+            mock.patch.dict(
+                os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+            ),
+            mock.patch.object(result_cache, "analyze_word", analyze),
+            mock.patch.object(
+                result_cache, "get_analysis_version", lambda: self.analysis_version
+            ),
+            mock.patch.object(data_bundle, "ensure_data_packages"),
+            # The fingerprint follows a copy of the template, which the tests can change
+            mock.patch.object(build_manifest, "TEMPLATE_FILENAME", self.template),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build(self, layout="flat"):
+        self.analyzed.clear()
+        with mock.patch("sys.stdout"):
+            return cli.get_words_info(
+                WORDS, writer=PageWriter(self.output, layout), incremental=True
+            )
+
+    def get_page_path(self, word):
+        return os.path.join(self.output, f"{word}_info.html")
+
+    def test_only_stale_pages_get_generated(self):
+        self.assertEqual(self.build(), (2, 0))
+        self.assertEqual(self.analyzed, WORDS)
+        self.assertTrue(os.path.exists(self.get_page_path("black")))
+        self.assertEqual(len(BuildManifest(PageWriter(self.output))), 2)
+
+        self.assertEqual(self.build(), (0, 0))
+        self.assertEqual(self.analyzed, [])
+
+        # A missing page gets rendered again from its stored analysis
+        os.remove(self.get_page_path("black"))
+        self.assertEqual(self.build(), (1, 0))
+        self.assertEqual(self.analyzed, [])
+        self.assertTrue(os.path.exists(self.get_page_path("black")))
+
+    def test_template_changes_do_not_analyze_the_words_again(self):
+        self.build()
+        with open(self.template, "a", encoding="utf-8") as file:
+            file.write("<!-- changed -->\n")
+
+        self.assertEqual(self.build(), (2, 0))
+        self.assertEqual(self.analyzed, [])
+
+    def test_analysis_changes_analyze_the_words_again(self):
+        self.build()
+        self.analysis_version = {"analyzers": 2}
+
+        self.assertEqual(self.build(), (2, 0))
+        self.assertEqual(self.analyzed, WORDS)
+
+        # The analyses of the previous version are dropped
+        self.assertEqual(len(BuildManifest(PageWriter(self.output)).analyses), 2)
+
+    def test_layouts_are_fingerprinted_separately(self):
+        self.build()
+
+        self.assertEqual(self.build("sharded"), (2, 0))
+        self.assertEqual(self.analyzed, [])
+
+        with self.assertRaises(ValueError):
+            self.build("zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cli
+
+ANALYSIS_RESULTS = {
+    "meanings": {"the quality of being white"},
+    "pos_and_transitivity": [("noun", None), ("verb", "transitive")],
+    "etymology": "Old English hwit",
+    "synonyms": {"whiteness"},
+    "antonyms": {"black"},
+    "word_frequencies": {"white": 12},
+    "collocations": [(("white", "house"), 3)],
+    "phrasal_verbs": set(),
+    "idiomatic_expressions": set(),
+    "related_phrases_and_expressions": ["the White House"],
+    "semantic_fields": ["noun.attribute"],
+    "hyponyms": ["whiteness.n.01"],
+    "hypernyms": [],
+    "meronyms": [],
+    "domain_words": set(),
+    "alternative_words": set(),
+    "associated_nouns": set(),
+    "associated_verbs": set(),
+    "morphological_variations": {"whites"},
+}
+
+
+class TestHtmlRendering(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        patcher = mock.patch.dict(
+            os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cli.get_template.cache_clear()
+        self.addCleanup(cli.get_template.cache_clear)
+
+    def test_template_is_compiled_once_per_process(self):
+        self.assertIs(cli.get_template(), cli.get_template())
+        self.assertTrue(
+            os.listdir(
+                os.path.join(
+                    self.temporary_directory.name, cli.TEMPLATE_BYTECODE_DIRECTORY
+                )
+            )
+        )
+
+    def test_streamed_page_matches_the_rendered_page(self):
+        expected = cli.prepare_html_content("white", ANALYSIS_RESULTS)
+
+        # The template gets loaded from the working directory, which the page is saved in
+        cli.get_template()
+        output = os.path.join(self.temporary_directory.name, "run")
+        os.makedirs(output)
+        current_directory = os.getcwd()
+        os.chdir(output)
+        try:
+            cli.save_html_to_file(
+                "white",
+                cli.generate_html_content("white", ANALYSIS_RESULTS),
+                open_browser=False,
+            )
+        finally:
+            os.chdir(current_directory)
+
+        with open(
+            os.path.join(output, "output", "white_info.html"), encoding="utf-8"
+        ) as file:
+            self.assertEqual(file.read(), expected)
+        self.assertIn("Old English hwit", expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
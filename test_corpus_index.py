@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from nltk.collocations import BigramCollocationFinder
+from nltk.metrics import BigramAssocMeasures
+from nltk.probability import FreqDist
+
+from corpus_index import load_corpus_index, normalize_corpus_words
+
+CORPUS_WORDS = (
+    "The white house said the white paper was white , and the House of white "
+    "paper said : white house white house white paper 100 percent white"
+).split()
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(
+            os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temporary_directory.cleanup)
+
+    def load_index(self, get_words=lambda: CORPUS_WORDS):
+        return load_corpus_index("test", {"corpus": "test"}, get_words)
+
+    def test_frequencies_match_freq_dist(self):
+        index = self.load_index()
+        freq_dist = FreqDist(normalize_corpus_words(CORPUS_WORDS))
+
+        for word in ["white", "house", "paper", "100", "White", ",", "missing"]:
+            self.assertEqual(index.frequency(word), freq_dist[word], word)
+
+    def test_top_bigrams_match_collocation_finder(self):
+        index = self.load_index()
+        words_list = {"white", "house", "paper", "the", "House"}
+
+        finder = BigramCollocationFinder.from_words(
+            list(normalize_corpus_words(CORPUS_WORDS))
+        )
+        finder.apply_word_filter(lambda w: w not in words_list)
+        expected = finder.nbest(BigramAssocMeasures().raw_freq, 3)
+
+        top_bigrams = index.top_bigrams_within(words_list, 3)
+
+        self.assertEqual([bigram for bigram, _ in top_bigrams], expected)
+        self.assertEqual(top_bigrams[0], (("white", "house"), 3))
+
+    def test_index_is_built_only_once(self):
+        get_words = mock.Mock(return_value=CORPUS_WORDS)
+
+        self.load_index(get_words)
+        index = self.load_index(get_words)
+
+        get_words.assert_called_once()
+        self.assertEqual(index.bigram_frequency("white", "paper"), 3)
+        self.assertEqual(index.bigram_frequency("paper", "white"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import corpus_ingestion
+from corpus_index import count_unigrams_and_bigrams, get_corpus_index
+from corpus_ingestion import ingest_corpus, tokenize_text
+from nltk_helpers import get_collocations, get_word_frequencies
+
+TEXTS = [
+    "The white house said the white paper was white,\nand the House of white paper\n",
+    "said: white house! White house, white paper -- 100 percent white\n",
+    "white\n\nhouse white_paper don't\n",
+]
+
+
+class TestCorpusIngestion(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        patcher = mock.patch.dict(
+            os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # A plain file, and a directory with a gzipped file and a hidden one
+        self.corpus = os.path.join(self.temporary_directory.name, "corpus")
+        os.makedirs(os.path.join(self.corpus, "more"))
+        with open(os.path.join(self.corpus, "a.txt"), "w", encoding="utf-8") as file:
+            file.write(TEXTS[0])
+        with gzip.open(os.path.join(self.corpus, "more", "b.txt.gz"), "wt") as file:
+            file.write(TEXTS[1])
+        with open(os.path.join(self.corpus, "more", "c.txt"), "w") as file:
+            file.write(TEXTS[2])
+        with open(os.path.join(self.corpus, ".hidden"), "w") as file:
+            file.write("hidden")
+
+        self.unigram_counts, self.bigram_counts = count_unigrams_and_bigrams(
+            tokenize_text("\n".join(TEXTS))
+        )
+
+    def test_counts_do_not_depend_on_chunks_or_processes(self):
+        for workers, chunk_bytes in [(1, 1 << 20), (1, 10), (2, 30)]:
+            with self.subTest(workers=workers, chunk_bytes=chunk_bytes):
+                report = ingest_corpus(
+                    f"test{workers}{chunk_bytes}",
+                    [self.corpus],
+                    workers,
+                    chunk_bytes=chunk_bytes,
+                )
+                index = get_corpus_index(f"test{workers}{chunk_bytes}")
+
+                self.assertEqual(report.files, 3)
+                self.assertEqual(report.tokens, sum(self.unigram_counts.values()))
+                self.assertEqual(report.count_error_bound, 0)
+                for token, count in self.unigram_counts.items():
+                    self.assertEqual(index.frequency(token), count, token)
+                for (first, second), count in self.bigram_counts.items():
+                    self.assertEqual(index.bigram_frequency(first, second), count)
+                self.assertEqual(index.frequency("hidden"), 0)
+
+    def test_analyzers_query_ingested_corpora(self):
+        ingest_corpus("test", [self.corpus])
+
+        self.assertEqual(
+            get_word_frequencies(["white", "paper"], corpus="test"),
+            {"white": 10, "paper": 4},
+        )
+        self.assertEqual(
+            get_collocations(["white", "house"], corpus="test")[0],
+            (("white", "house"), 4),
+        )
+        with mock.patch.dict(os.environ, {"WORD_INFO_CORPUS": "test"}):
+            self.assertEqual(get_word_frequencies(["house"]), {"house": 5})
+
+    def test_pruning_keeps_counts_within_the_error_bound(self):
+        report = ingest_corpus(
+            "pruned",
+            [self.corpus],
+            max_memory_bytes=corpus_ingestion.BIGRAM_ENTRY_BYTES * 10,
+            chunk_bytes=20,
+        )
+        index = get_corpus_index("pruned")
+
+        self.assertGreater(report.count_error_bound, 0)
+        self.assertLess(report.vocabulary, len(self.unigram_counts))
+        for token, count in self.unigram_counts.items():
+            self.assertLessEqual(index.frequency(token), count)
+            if index.frequency(token):
+                self.assertGreaterEqual(
+                    index.frequency(token), count - report.count_error_bound
+                )
+        self.assertGreater(index.frequency("white"), 0)
+
+    def test_unchanged_corpora_are_not_ingested_again(self):
+        ingest_corpus("test", [self.corpus])
+
+        with mock.patch.object(corpus_ingestion, "count_chunks") as count_chunks:
+            report = ingest_corpus("test", [self.corpus])
+
+        count_chunks.assert_not_called()
+        self.assertEqual(report.tokens, sum(self.unigram_counts.values()))
+
+    def test_invalid_names_and_sources_are_rejected(self):
+        for name, sources in [
+            ("reuters", [self.corpus]),
+            ("../test", [self.corpus]),
+            ("test", [os.path.join(self.corpus, "missing")]),
+        ]:
+            with self.subTest(name=name):
+                with self.assertRaises(ValueError):
+                    ingest_corpus(name, sources)
+
+        with self.assertRaises(ValueError):
+            get_corpus_index("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+import data_bundle
+from data_bundle import (
+    ANALYZER_PACKAGES,
+    PACKAGES,
+    DataBundleError,
+    ensure_data_packages,
+    get_required_packages,
+    install_packages,
+    read_bundle_manifest,
+)
+from word_analysis import ANALYZERS
+
+CONTENTS = {
+    "corpora/wordnet.zip": b"wordnet" * 1000,
+    "corpora/reuters.zip": b"reuters" * 1000,
+    "tokenizers/punkt.zip": b"punkt",
+}
+
+
+class TestDataBundle(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.directory = os.path.join(self.temporary_directory.name, "nltk_data")
+        self.mirror = os.path.join(self.temporary_directory.name, "mirror")
+
+        checksums = []
+        for path, content in CONTENTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.mirror, path)), exist_ok=True)
+            with open(os.path.join(self.mirror, path), "wb") as file:
+                file.write(content)
+            checksums.append(f"{hashlib.sha256(content).hexdigest()}  {path}\n")
+        with open(os.path.join(self.mirror, "SHA256SUMS"), "w") as file:
+            file.writelines(checksums)
+
+        self.packages = [PACKAGES["wordnet"], PACKAGES["reuters"], PACKAGES["punkt"]]
+
+        # Keeps the data that NLTK may find on this machine out of the tests
+        patcher = mock.patch.object(data_bundle, "find_package_path", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_installed(self):
+        for path, content in CONTENTS.items():
+            with open(os.path.join(self.directory, path), "rb") as file:
+                self.assertEqual(file.read(), content)
+
+        manifest = read_bundle_manifest(self.directory)
+        self.assertEqual(set(manifest), {"wordnet", "reuters", "punkt"})
+        self.assertEqual(
+            manifest["punkt"]["sha256"], hashlib.sha256(b"punkt").hexdigest()
+        )
+
+    def test_packages_get_installed_from_a_mirror_or_a_tarball(self):
+        install_packages(self.packages, self.mirror, self.directory)
+        self.assert_installed()
+
+        shutil.rmtree(self.directory)
+        tarball = os.path.join(self.temporary_directory.name, "bundle.tar.gz")
+        with tarfile.open(tarball, "w:gz") as archive:
+            archive.add(self.mirror, ".")
+
+        install_packages(self.packages, tarball, self.directory)
+        self.assert_installed()
+
+    def test_packages_that_do_not_match_their_checksum_are_not_installed(self):
+        with open(os.path.join(self.mirror, "corpora", "reuters.zip"), "ab") as file:
+            file.write(b"tampered")
+
+        with self.assertRaises(DataBundleError):
+            install_packages(self.packages, self.mirror, self.directory)
+
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, "corpora", "reuters.zip"))
+        )
+        self.assertNotIn("reuters", read_bundle_manifest(self.directory))
+
+        with self.assertRaises(DataBundleError):
+            install_packages([PACKAGES["webtext"]], self.mirror, self.directory)
+
+    def test_a_valid_manifest_skips_every_check(self):
+        installed = ensure_data_packages(self.packages, self.mirror, self.directory)
+        self.assertEqual(installed, self.packages)
+
+        shutil.rmtree(self.mirror)
+        data_bundle.find_package_path.reset_mock()
+        with mock.patch.object(data_bundle, "install_packages") as install:
+            self.assertEqual(
+                ensure_data_packages(self.packages, "nltk", self.directory), []
+            )
+        install.assert_not_called()
+        data_bundle.find_package_path.assert_not_called()
+
+        # A package that changed since it was installed gets installed again
+        with open(
+            os.path.join(self.directory, "tokenizers", "punkt.zip"), "ab"
+        ) as file:
+            file.write(b"changed")
+        with mock.patch.object(data_bundle, "install_packages") as install:
+            ensure_data_packages(self.packages, "nltk", self.directory)
+        install.assert_called_once_with([PACKAGES["punkt"]], "nltk", self.directory)
+
+    def test_packages_that_nltk_finds_are_not_installed(self):
+        preinstalled = os.path.join(self.mirror, "corpora", "wordnet.zip")
+        data_bundle.find_package_path.side_effect = lambda package: (
+            preinstalled if package.id == "wordnet" else None
+        )
+
+        ensure_data_packages(self.packages, self.mirror, self.directory)
+
+        manifest = read_bundle_manifest(self.directory)
+        self.assertEqual(manifest["wordnet"]["source"], "preinstalled")
+        self.assertEqual(manifest["wordnet"]["path"], preinstalled)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, "corpora", "wordnet.zip"))
+        )
+        self.assertEqual(manifest["reuters"]["source"], self.mirror)
+
+    def test_only_the_packages_of_the_analyzers_are_required(self):
+        self.assertEqual(
+            set(ANALYZER_PACKAGES), {analyzer.name for analyzer in ANALYZERS}
+        )
+        self.assertEqual(
+            [package.id for package in get_required_packages(corpus="reuters")],
+            ["wordnet", "reuters", "webtext", "punkt"],
+        )
+        self.assertEqual(
+            [
+                package.id
+                for package in get_required_packages(["collocations"], corpus="news")
+            ],
+            ["wordnet"],
+        )
+        self.assertEqual(get_required_packages(["etymology"]), [PACKAGES["wordnet"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from etymology_fetcher import (
+    EtymologyCache,
+    EtymologyFetcher,
+    EtymologyUnavailableError,
+)
+
+PAGES = {
+    "white": '<html><body><section class="word__defination--2q7ZH">'
+    "<p>Old English <i>hwit</i></p></section></body></html>",
+    "blank": "<html><body><section>Nothing here</section></body></html>",
+}
+
+
+class StubEtymonlineHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        word = self.path.rsplit("/", 1)[-1]
+        self.server.requests.append(word)
+
+        if word == "flaky" and self.server.requests.count(word) == 1:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if word in ("slow", "slow2") and self.server.requests.count(word) == 1:
+            time.sleep(1)
+
+        page = PAGES.get(word, PAGES["white"] if word in ("flaky", "slow") else None)
+        if page is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestEtymologyFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubEtymonlineHandler)
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.cache = EtymologyCache(
+            os.path.join(self.temporary_directory.name, "etymologies.sqlite3")
+        )
+        self.fetcher = self.make_fetcher()
+
+    def make_fetcher(self, **options):
+        fetcher = EtymologyFetcher(
+            base_url=f"http://127.0.0.1:{self.server.server_port}/word/",
+            cache=self.cache,
+            requests_per_second=None,
+            backoff_factor=0,
+            **options,
+        )
+        self.addCleanup(fetcher.close)
+        return fetcher
+
+    def test_etymologies_are_extracted_and_cached(self):
+        self.assertEqual(self.fetcher.fetch("white"), "Old Englishhwit")
+        self.assertEqual(self.fetcher.fetch("white"), "Old Englishhwit")
+        self.assertIsNone(self.fetcher.fetch("blank"))
+
+        self.assertEqual(self.server.requests, ["white", "blank"])
+
+    def test_unknown_words_are_cached_until_they_expire(self):
+        self.assertIsNone(self.fetcher.fetch("unknown"))
+        self.assertIsNone(self.fetcher.fetch("unknown"))
+        self.assertEqual(self.server.requests, ["unknown"])
+
+        self.cache.negative_ttl = -1
+        self.fetcher.fetch("unknown")
+        self.assertEqual(self.server.requests, ["unknown", "unknown"])
+
+    def test_failed_requests_are_retried(self):
+        self.assertEqual(self.fetcher.fetch("flaky"), "Old Englishhwit")
+        self.assertEqual(self.server.requests, ["flaky", "flaky"])
+
+    def test_timeouts_are_raised_and_not_cached(self):
+        fetcher = self.make_fetcher(timeout=(1, 0.2), max_retries=0)
+
+        with self.assertRaises(EtymologyUnavailableError):
+            fetcher.fetch("slow")
+        self.assertEqual(self.cache.get("slow"), (False, None))
+
+        # The next fetch goes to etymonline again, and succeeds
+        self.assertEqual(
+            self.make_fetcher(timeout=(1, 5), max_retries=0).fetch("slow"),
+            "Old Englishhwit",
+        )
+        self.assertEqual(self.server.requests, ["slow", "slow"])
+        self.assertEqual(self.cache.get("slow"), (True, "Old Englishhwit"))
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(fetcher.fetch_many(["slow2"]), {"slow2": None})
+
+    def test_many_words_are_fetched_at_once(self):
+        self.assertEqual(
+            self.fetcher.fetch_many(["white", "unknown", "white"]),
+            {"white": "Old Englishhwit", "unknown": None},
+        )
+        self.assertEqual(sorted(self.server.requests), ["unknown", "white"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import etymology_scraper
+import word_analysis
+from etymology_fetcher import extract_etymology
+from etymology_store import (
+    EtymologyStore,
+    extract_etymology_streaming,
+    get_default_store,
+    import_etymology_pages,
+)
+from result_cache import get_version_key
+
+PAGES = {
+    "white.html": "<html><head><script>var a = '<section>';</script></head><body>"
+    "<section class='other'>Related entries</section>"
+    "<section class='intro word__defination--2q7ZH'><p>Old English <i>hw&iacute;t</i>,"
+    "</p><section><p>nested</p></section><script>track()</script><p> from PIE</p>"
+    "</section><section>Trailing</section></body></html>",
+    "no%20entry.htm": "<html><body><section>Nothing here</section></body></html>",
+    "notes.txt": "not a page",
+}
+
+
+def split_into_chunks(text, size):
+    data = text.encode("utf-8")
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+class TestStreamingExtraction(unittest.TestCase):
+    def test_streaming_extraction_matches_beautiful_soup(self):
+        for name in ["white.html", "no%20entry.htm"]:
+            for size in [1, 7, 4096]:
+                with self.subTest(name=name, size=size):
+                    self.assertEqual(
+                        extract_etymology_streaming(
+                            split_into_chunks(PAGES[name], size)
+                        ),
+                        extract_etymology(PAGES[name]),
+                    )
+
+    def test_chunks_after_the_section_are_not_read(self):
+        chunks = iter([PAGES["white.html"].encode("utf-8"), b"<p>unread</p>"])
+
+        extract_etymology_streaming(chunks)
+
+        self.assertEqual(list(chunks), [b"<p>unread</p>"])
+
+
+class TestEtymologyStore(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.pages_directory = os.path.join(self.temporary_directory.name, "pages")
+        os.makedirs(os.path.join(self.pages_directory, "w"))
+        for name, page in PAGES.items():
+            with open(
+                os.path.join(self.pages_directory, "w", name), "w", encoding="utf-8"
+            ) as file:
+                file.write(page)
+        self.store = EtymologyStore(
+            os.path.join(self.temporary_directory.name, "store.sqlite3")
+        )
+
+    def assert_imported(self, report):
+        self.assertEqual((report.pages, report.etymologies), (2, 1))
+        self.assertEqual(
+            self.store.get("white"), (True, "Old Englishhwít,nestedfrom PIE")
+        )
+        self.assertEqual(self.store.get("no entry"), (True, None))
+        self.assertEqual(self.store.get("black"), (False, None))
+
+    def test_missing_store_finds_nothing(self):
+        self.assertEqual(self.store.get("white"), (False, None))
+        self.assertEqual(len(self.store), 0)
+
+    def test_import_from_a_directory(self):
+        self.assert_imported(import_etymology_pages(self.pages_directory, self.store))
+
+    def test_import_from_a_zip_archive(self):
+        path = os.path.join(self.temporary_directory.name, "pages.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, page in PAGES.items():
+                archive.writestr(f"pages/{name}", page)
+
+        self.assert_imported(import_etymology_pages(path, self.store))
+
+    def test_import_from_a_compressed_tar_archive(self):
+        path = os.path.join(self.temporary_directory.name, "pages.tar.gz")
+        with tarfile.open(path, "w:gz") as archive:
+            for name, page in PAGES.items():
+                data = page.encode("utf-8")
+                member = tarfile.TarInfo(f"pages/{name}")
+                member.size = len(data)
+                archive.addfile(member, io.BytesIO(data))
+
+        self.assert_imported(import_etymology_pages(path, self.store))
+
+    def test_unsupported_sources_are_rejected(self):
+        with self.assertRaises(ValueError):
+            import_etymology_pages(
+                os.path.join(self.pages_directory, "w", "notes.txt"), self.store
+            )
+
+    def test_get_etymology_reads_the_store_offline(self):
+        with mock.patch.dict(
+            os.environ,
+            {
+                "WORD_INFO_DATA_DIR": self.temporary_directory.name,
+                etymology_scraper.OFFLINE_ENV_VAR: "1",
+            },
+        ):
+            get_default_store.cache_clear()
+            self.addCleanup(get_default_store.cache_clear)
+            import_etymology_pages(self.pages_directory)
+
+            with mock.patch.object(
+                etymology_scraper, "get_default_fetcher"
+            ) as get_default_fetcher:
+                self.assertEqual(
+                    etymology_scraper.get_etymology("white"),
+                    "Old Englishhwít,nestedfrom PIE",
+                )
+                self.assertIsNone(etymology_scraper.get_etymology("black"))
+
+            get_default_fetcher.assert_not_called()
+
+    def test_offline_analyses_have_their_own_version(self):
+        with mock.patch(
+            "corpus_index.get_corpus_version", return_value="reuters"
+        ), mock.patch("wordnet_snapshot.get_wordnet") as get_wordnet:
+            get_wordnet.return_value.get_version.return_value = "3.0"
+            online = word_analysis.get_analysis_version()
+            with mock.patch.dict(os.environ, {etymology_scraper.OFFLINE_ENV_VAR: "1"}):
+                offline = word_analysis.get_analysis_version()
+
+        self.assertNotEqual(get_version_key(online), get_version_key(offline))
+
+
+if __name__ == "__main__":
+    unittest.main()
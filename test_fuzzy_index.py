@@ -0,0 +1,82 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from nltk.metrics.distance import edit_distance
+
+from fuzzy_index import bounded_edit_distance, load_fuzzy_index
+
+WORDS = [
+    "white",
+    "whit",
+    "while",
+    "whine",
+    "wheat",
+    "write",
+    "black",
+    "blanket",
+    "whiteness",
+    "bite",
+    "kite",
+    "wit",
+]
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(
+            os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.index = load_fuzzy_index("test", {"words": "test"}, lambda: WORDS)
+
+    def test_bounded_edit_distance_matches_nltk(self):
+        generator = random.Random(0)
+
+        for _ in range(2000):
+            first = "".join(
+                generator.choice("abc") for _ in range(generator.randint(0, 6))
+            )
+            second = "".join(
+                generator.choice("abc") for _ in range(generator.randint(0, 6))
+            )
+            distance = edit_distance(first, second, transpositions=True)
+
+            for bound in range(4):
+                self.assertEqual(
+                    bounded_edit_distance(first, second, bound),
+                    min(distance, bound + 1),
+                    (first, second, bound),
+                )
+
+    def test_closest_words_are_the_nearest_ones(self):
+        for query in ["whtie", "blak", "wihte", "kitte", "wheet"]:
+            suggestions = self.index.closest(query, 3)
+            expected_distances = sorted(
+                edit_distance(query, word, transpositions=True) for word in WORDS
+            )[:3]
+
+            self.assertEqual(
+                [
+                    edit_distance(query, word, transpositions=True)
+                    for word in suggestions
+                ],
+                expected_distances,
+                query,
+            )
+
+    def test_transposition_counts_as_a_single_edit(self):
+        self.assertEqual(self.index.closest("whtie", 1), ["white"])
+
+    def test_max_distance_cuts_off_distant_words(self):
+        self.assertEqual(self.index.closest("blak", 5, max_distance=1), ["black"])
+        self.assertEqual(self.index.closest("zzzzzz", 3, max_distance=2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
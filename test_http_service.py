@@ -0,0 +1,151 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+
+import http_service
+from http_service import WordService
+from result_serialization import from_json_value
+from utils import WordNotFoundError
+
+RESULTS = {"meanings": {"the color of snow"}, "pos_and_transitivity": [("noun", None)]}
+
+
+async def send(port, request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request.encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+async def get(port, path):
+    return await send(port, f"GET {path} HTTP/1.1\r\nConnection: close\r\n\r\n")
+
+
+class TestWordService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.analyzed = []
+
+        def analyze(word, cache):
+            self.analyzed.append(word)
+            self.release.wait(5)
+            return RESULTS
+
+        def check_word(word):
+            if word == "whtie":
+                raise WordNotFoundError("Did you mean: white?")
+
+        for name, function in [
+            ("analyze_word_with_cache", analyze),
+            ("handle_word_not_found", check_word),
+            ("generate_html_content", lambda word, results, stylesheet: [word]),
+        ]:
+            patcher = mock.patch.object(http_service, name, function)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.service = WordService(threads=2, max_pending=2)
+        self.addCleanup(self.service.close)
+        self.server = await self.service.start("127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_analyses_are_served_as_json(self):
+        status, body = await get(self.port, "/words/white")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(from_json_value(json.loads(body)["results"]), RESULTS)
+
+        status, body = await get(self.port, "/pages/white")
+        self.assertEqual((status, body), (200, b"white"))
+
+    async def test_concurrent_requests_for_a_word_share_its_analysis(self):
+        self.release.clear()
+        requests = [
+            asyncio.ensure_future(get(self.port, "/words/white")) for _ in range(3)
+        ]
+        while self.service.metrics.coalesced < 2:
+            await asyncio.sleep(0.01)
+        self.release.set()
+
+        responses = await asyncio.gather(*requests)
+
+        self.assertEqual([status for status, _ in responses], [200] * 3)
+        self.assertEqual(self.analyzed, ["white"])
+        self.assertEqual(self.service.pending, {})
+
+    async def test_words_beyond_the_pending_limit_are_turned_away(self):
+        self.release.clear()
+        requests = [
+            asyncio.ensure_future(get(self.port, f"/words/{word}"))
+            for word in ["white", "black"]
+        ]
+        while len(self.service.pending) < 2:
+            await asyncio.sleep(0.01)
+
+        status, _ = await get(self.port, "/words/grey")
+        self.release.set()
+        await asyncio.gather(*requests)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(self.service.metrics.rejected, 1)
+
+    async def test_errors_get_their_status(self):
+        for path, expected_status in [
+            ("/words/whtie", 404),
+            ("/words/%20", 400),
+            ("/nothing", 404),
+        ]:
+            with self.subTest(path=path):
+                status, body = await get(self.port, path)
+
+                self.assertEqual(status, expected_status)
+                self.assertIn("error", json.loads(body))
+
+        status, _ = await send(
+            self.port, "POST /words/white HTTP/1.1\r\nContent-Length: 0\r\n\r\n"
+        )
+        self.assertEqual(status, 405)
+        status, _ = await send(self.port, "nonsense\r\n\r\n")
+        self.assertEqual(status, 400)
+
+    async def test_unexpected_errors_get_a_response_and_a_metric(self):
+        def analyze(word, cache):
+            raise sqlite3.OperationalError("database is locked")
+
+        with mock.patch.object(
+            http_service, "analyze_word_with_cache", analyze
+        ), self.assertLogs(level="ERROR"):
+            status, body = await get(self.port, "/words/white")
+
+        self.assertEqual(status, 500)
+        self.assertEqual(json.loads(body), {"error": "database is locked"})
+        self.assertEqual(self.service.metrics.to_dict()["requests"], {"words 500": 1})
+
+    async def test_connections_are_kept_alive(self):
+        status, body = await send(
+            self.port,
+            "GET /health HTTP/1.1\r\n\r\n"
+            "GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n",
+        )
+
+        self.assertEqual(status, 200)
+        metrics = json.loads(body.partition(b"\r\n\r\n")[2])
+        self.assertEqual(metrics["requests"], {"health 200": 1})
+        self.assertEqual(metrics["open_connections"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import hypernym_index
+import semantic_relations
+import utils
+from hypernym_index import (
+    HypernymIndex,
+    get_hypernym_index,
+    merge_ranges,
+    write_hypernym_index,
+)
+from test_wordnet_snapshot import FakeWordNet
+from wordnet_snapshot import WordNetSnapshot, write_wordnet_snapshot
+
+
+class FakeSynset:
+    def __init__(self, name, hypernyms=(), instance_hypernyms=()):
+        self._name = name
+        self._hypernyms = list(hypernyms)
+        self._instance_hypernyms = list(instance_hypernyms)
+
+    def name(self):
+        return self._name
+
+    def pos(self):
+        return self._name.split(".")[1]
+
+    def hypernyms(self):
+        return self._hypernyms
+
+    def instance_hypernyms(self):
+        return self._instance_hypernyms
+
+
+class FakeHierarchy:
+    def __init__(self, synsets):
+        self.synsets = synsets
+
+    def all_synsets(self, pos):
+        return [synset for synset in self.synsets if synset.pos() == pos]
+
+
+def get_ancestors(synset):
+    ancestors = set()
+    pending = [synset]
+    while pending:
+        for hypernym in pending.pop().hypernyms():
+            if hypernym not in ancestors:
+                ancestors.add(hypernym)
+                pending.append(hypernym)
+
+    return ancestors
+
+
+class TestHypernymIndex(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+
+    def write_index(self, synsets):
+        directory = tempfile.mkdtemp(dir=self.temporary_directory.name)
+        write_hypernym_index(directory, FakeHierarchy(synsets), {})
+        return HypernymIndex(directory)
+
+    def make_animals(self):
+        entity = FakeSynset("entity.n.01")
+        animal = FakeSynset("animal.n.01", [entity])
+        pet = FakeSynset("pet.n.01", [animal])
+        canine = FakeSynset("canine.n.02", [animal])
+        dog = FakeSynset("dog.n.01", [canine, pet])
+        puppy = FakeSynset("puppy.n.01", [dog])
+        cat = FakeSynset("cat.n.01", [pet])
+        laika = FakeSynset("laika.n.01", instance_hypernyms=[dog])
+        move = FakeSynset("move.v.01")
+        run = FakeSynset("run.v.01", [move])
+
+        return self.write_index(
+            [entity, animal, pet, canine, dog, puppy, cat, laika, move, run]
+        )
+
+    def test_ranges_get_merged(self):
+        self.assertEqual(
+            merge_ranges([(5, 6), (0, 2), (3, 3), (8, 9), (1, 2)]),
+            [(0, 3), (5, 6), (8, 9)],
+        )
+
+    def test_ancestry_matches_the_transitive_closure(self):
+        generator = random.Random(0)
+
+        for _ in range(20):
+            synsets = []
+            for number in range(60):
+                hypernyms = generator.sample(
+                    synsets, min(len(synsets), generator.choice([0, 1, 1, 1, 2, 3]))
+                )
+                synsets.append(FakeSynset(f"synset{number}.n.01", hypernyms))
+            index = self.write_index(synsets)
+
+            for synset in synsets:
+                ancestors = get_ancestors(synset) | {synset}
+                for other in synsets:
+                    self.assertEqual(
+                        index.is_hyponym(synset.name(), other.name()),
+                        other in ancestors,
+                        (synset.name(), other.name()),
+                    )
+
+    def test_hierarchy_queries(self):
+        index = self.make_animals()
+
+        self.assertTrue(index.is_hyponym("laika.n.01", "pet.n.01"))
+        self.assertFalse(index.is_hyponym("pet.n.01", "dog.n.01"))
+        self.assertFalse(index.is_hyponym("run.v.01", "entity.n.01"))
+        self.assertEqual(index.get_depth("puppy.n.01"), 4)
+        self.assertEqual(
+            index.get_hypernym_paths("puppy.n.01"),
+            [
+                ["entity.n.01", "animal.n.01", "canine.n.02", "dog.n.01", "puppy.n.01"],
+                ["entity.n.01", "animal.n.01", "pet.n.01", "dog.n.01", "puppy.n.01"],
+            ],
+        )
+        self.assertEqual(
+            index.get_hypernym_closure("dog.n.01"),
+            ["canine.n.02", "pet.n.01", "animal.n.01", "entity.n.01"],
+        )
+        self.assertEqual(
+            index.get_lowest_common_hypernyms("puppy.n.01", "cat.n.01"), ["pet.n.01"]
+        )
+        self.assertEqual(
+            index.get_lowest_common_hypernyms("dog.n.01", "puppy.n.01"), ["dog.n.01"]
+        )
+        self.assertEqual(index.get_lowest_common_hypernyms("dog.n.01", "run.v.01"), [])
+        self.assertEqual(
+            index.get_hyponym_tree("animal.n.01", 2),
+            [
+                "animal.n.01",
+                ["canine.n.02", ["dog.n.01"]],
+                ["pet.n.01", ["cat.n.01"], ["dog.n.01"]],
+            ],
+        )
+
+        with self.assertRaises(KeyError):
+            index.get_depth("white.a.01")
+
+    def test_cycles_are_broken(self):
+        first = FakeSynset("first.v.01")
+        second = FakeSynset("second.v.01", [first])
+        first._hypernyms.append(second)
+        third = FakeSynset("third.v.01", [first])
+
+        index = self.write_index([first, second, third])
+
+        self.assertEqual(
+            index.get_hypernym_paths("third.v.01"), [["first.v.01", "third.v.01"]]
+        )
+        self.assertTrue(index.is_hyponym("second.v.01", "first.v.01"))
+
+
+class TestSemanticFieldChains(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.snapshot_directory = tempfile.TemporaryDirectory()
+        write_wordnet_snapshot(cls.snapshot_directory.name, FakeWordNet(), {})
+        cls.snapshot = WordNetSnapshot(cls.snapshot_directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.snapshot_directory.cleanup()
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+
+        for patcher in [
+            mock.patch.dict(
+                os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+            ),
+            mock.patch.object(hypernym_index, "get_wordnet", lambda: self.snapshot),
+            mock.patch.object(utils, "get_wordnet", lambda: self.snapshot),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        for cached in [get_hypernym_index, utils.lookup_synsets]:
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+
+    def test_chains_go_from_the_most_general_field(self):
+        self.assertEqual(
+            semantic_relations.get_semantic_field_chains("whiteness"),
+            [["achromatic color", "white"]],
+        )
+        self.assertEqual(semantic_relations.get_semantic_field_chains("snowy"), [])
+
+    def test_kinds_are_checked_at_any_depth(self):
+        self.assertTrue(semantic_relations.is_kind_of("whiteness", "achromatic_color"))
+        self.assertFalse(semantic_relations.is_kind_of("achromatic_color", "whiteness"))
+        self.assertFalse(semantic_relations.is_kind_of("snowy", "white"))
+
+    def test_index_is_built_once(self):
+        get_hypernym_index()
+        get_hypernym_index.cache_clear()
+
+        with mock.patch.object(
+            hypernym_index, "write_hypernym_index"
+        ) as write_hypernym_index:
+            index = get_hypernym_index()
+
+        write_hypernym_index.assert_not_called()
+        self.assertTrue(index.is_hyponym("whiteness.n.01", "achromatic_color.n.01"))
+
+
+if __name__ == "__main__":
+    unittest.main()
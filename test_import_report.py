@@ -0,0 +1,45 @@
+import unittest
+
+from import_report import check_startup, parse_import_times
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       300 |        420 |   io
+import time:      2156 |      11078 | word_analysis
+"""
+
+STARTUP_PATHS = {
+    "import": "import cli",
+    "help": "import cli, sys; sys.argv = ['main.py', '--help']; cli.main()",
+    "empty word": "import cli, sys; sys.argv = ['main.py', '']; cli.main()",
+    # Rejected arguments exit with an error status, which measuring the imports would take
+    # for a failure
+    "invalid arguments": "import cli, sys; sys.argv = ['main.py', 'white', '--workers', '-1']\n"
+    "try:\n    cli.main()\nexcept SystemExit:\n    pass",
+}
+
+
+class TestImportReport(unittest.TestCase):
+    def test_importtime_output_is_parsed(self):
+        import_times = parse_import_times(IMPORTTIME_OUTPUT.splitlines())
+
+        self.assertEqual(
+            [(import_time.module, import_time.depth) for import_time in import_times],
+            [("_io", 2), ("io", 1), ("word_analysis", 0)],
+        )
+        self.assertEqual(import_times[2].cumulative_us, 11078)
+
+    def test_startup_does_not_import_the_heavy_modules(self):
+        for path, code in STARTUP_PATHS.items():
+            with self.subTest(path=path):
+                _, heavy_modules, import_times = check_startup(code)
+
+                self.assertIn(
+                    "cli", [import_time.module for import_time in import_times]
+                )
+                self.assertEqual(heavy_modules, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import pstats
+import tempfile
+import unittest
+from unittest import mock
+
+import instrumentation
+from instrumentation import format_summary, instrumented
+
+
+@instrumented()
+def allocate(size):
+    return bytearray(size)
+
+
+@instrumented(name="failing")
+def fail():
+    raise RuntimeError("boom")
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(instrumentation.disable)
+
+    def test_disabled_instrumentation_records_nothing(self):
+        self.assertEqual(len(allocate(10)), 10)
+        self.assertIsNone(instrumentation.get_instrumentation())
+
+    def test_calls_errors_and_times_are_recorded(self):
+        collector = instrumentation.enable()
+
+        allocate(10)
+        allocate(10)
+        with self.assertRaises(RuntimeError):
+            fail()
+
+        stats = collector.stats()
+        self.assertEqual(stats["allocate"]["calls"], 2)
+        self.assertEqual(stats["allocate"]["errors"], 0)
+        self.assertEqual(stats["failing"]["errors"], 1)
+        self.assertGreater(stats["allocate"]["wall_seconds"], 0)
+        self.assertEqual(stats["allocate"]["peak_memory_bytes"], 0)
+        self.assertIn("allocate", format_summary(stats))
+
+    def test_peak_memory_is_recorded_when_tracked(self):
+        collector = instrumentation.enable(track_memory=True)
+
+        allocate(1024 * 1024)
+
+        self.assertGreaterEqual(
+            collector.stats()["allocate"]["peak_memory_bytes"], 1024 * 1024
+        )
+
+    def test_retained_memory_is_recorded_without_peak_resets(self):
+        collector = instrumentation.enable(track_memory=True)
+
+        with mock.patch.object(instrumentation, "CAN_RESET_PEAK", False):
+            kept = allocate(1024 * 1024)
+
+        self.assertGreaterEqual(
+            collector.stats()["allocate"]["peak_memory_bytes"], len(kept)
+        )
+
+    def test_drained_statistics_merge_into_another_collector(self):
+        worker = instrumentation.Instrumentation()
+        worker.call("allocate", bytearray, 10)
+        parent = instrumentation.Instrumentation()
+        parent.call("allocate", bytearray, 10)
+
+        parent.merge(worker.drain())
+
+        self.assertEqual(worker.stats(), {})
+        self.assertEqual(parent.stats()["allocate"]["calls"], 2)
+
+    def test_profiles_are_written_per_function(self):
+        with tempfile.TemporaryDirectory() as directory:
+            collector = instrumentation.enable(profile_directory=directory)
+            allocate(10)
+            allocate(10)
+
+            (path,) = collector.write_profiles()
+
+            self.assertEqual(os.path.basename(path), f"allocate.{os.getpid()}.prof")
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
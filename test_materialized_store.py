@@ -0,0 +1,152 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import materialized_store
+import result_cache
+import word_analysis
+import wordnet_snapshot
+from materialized_store import (
+    get_materialized_store,
+    get_store_path,
+    materialize,
+    open_store_file,
+)
+from etymology_scraper import OFFLINE_ENV_VAR
+from etymology_store import get_default_store
+from result_cache import ResultCache, analyze_word_with_cache
+
+WORDS = ["black", "ice_cream", "white"]
+
+
+class FakeWordNet:
+    def all_lemma_names(self):
+        return WORDS
+
+
+class TestMaterializedStore(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+
+        self.analyzed = []
+        self.analysis_version = {"analyzers": 1}
+        self.interrupt_after = None
+
+        def analyze(word, timings=None):
+            if len(self.analyzed) == self.interrupt_after:
+                raise KeyboardInterrupt
+            self.analyzed.append(word)
+            if word == "ice_cream":
+                raise ValueError("Not analyzable")
+            return {"meanings": {f"the meaning of {word}"}}
+
+        for patcher in [
+            mock.patch.dict(
+                os.environ,
+                {
+                    "WORD_INFO_DATA_DIR": self.temporary_directory.name,
+                    OFFLINE_ENV_VAR: "1",
+                },
+            ),
+            mock.patch.object(result_cache, "analyze_word", analyze),
+            mock.patch.object(
+                word_analysis, "get_analysis_version", lambda: self.analysis_version
+            ),
+            mock.patch.object(wordnet_snapshot, "get_wordnet", FakeWordNet),
+            mock.patch.object(materialized_store, "WORDS_PER_COMMIT", 1),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        open_store_file.cache_clear()
+        self.addCleanup(open_store_file.cache_clear)
+
+    def materialize(self):
+        self.analyzed.clear()
+        return materialize(workers=1, progress=None)
+
+    def test_stored_words_are_read_instead_of_analyzed(self):
+        report = self.materialize()
+
+        self.assertEqual((report.words, report.analyzed, report.failed), (3, 2, 1))
+        self.assertEqual(len(get_materialized_store()), 2)
+
+        self.analyzed.clear()
+        cache = ResultCache(version=self.analysis_version)
+        self.assertEqual(
+            analyze_word_with_cache("white", cache),
+            {"meanings": {"the meaning of white"}},
+        )
+        self.assertEqual(self.analyzed, [])
+
+        # Words missing from the store get analyzed
+        with self.assertRaises(ValueError):
+            analyze_word_with_cache("ice_cream", cache)
+        self.assertEqual(self.analyzed, ["ice_cream"])
+
+        # Without a cache, every word gets analyzed again
+        analyze_word_with_cache("white", None)
+        self.assertEqual(self.analyzed, ["ice_cream", "white"])
+
+    def test_interrupted_runs_resume(self):
+        self.interrupt_after = 1
+        with self.assertRaises(KeyboardInterrupt):
+            self.materialize()
+        self.assertIsNone(get_materialized_store())
+
+        self.interrupt_after = None
+        report = self.materialize()
+
+        self.assertEqual((report.resumed, report.analyzed), (1, 1))
+        self.assertEqual(self.analyzed, ["ice_cream", "white"])
+        self.assertFalse(os.path.exists(get_store_path() + ".partial"))
+
+        # A complete store isn't materialized again
+        self.assertEqual(self.materialize().analyzed, 0)
+        self.assertEqual(self.analyzed, [])
+
+    def test_stores_materialized_later_get_used(self):
+        self.assertIsNone(get_materialized_store())
+
+        # As by another process, which leaves the opened stores of this one alone
+        with mock.patch.object(open_store_file, "cache_clear"):
+            self.materialize()
+
+        self.assertEqual(len(get_materialized_store()), 2)
+
+        # Only the current version of the store stays open
+        modified = os.stat(get_store_path()).st_mtime_ns
+        os.utime(get_store_path(), ns=(modified + 10**9, modified + 10**9))
+        self.assertIsNotNone(get_materialized_store())
+        self.assertEqual(open_store_file.cache_info().currsize, 1)
+
+    def test_etymologies_are_only_fetched_when_allowed(self):
+        del os.environ[OFFLINE_ENV_VAR]
+        get_default_store.cache_clear()
+        self.addCleanup(get_default_store.cache_clear)
+
+        with self.assertRaises(ValueError):
+            self.materialize()
+        self.assertEqual(self.analyzed, [])
+
+        progress = io.StringIO()
+        report = materialize(workers=1, progress=progress, fetch_etymologies=True)
+
+        self.assertEqual(report.analyzed, 2)
+        self.assertIn("fetching every etymology from etymonline", progress.getvalue())
+
+    def test_stores_of_another_analysis_version_are_ignored(self):
+        self.materialize()
+        self.analysis_version = {"analyzers": 2}
+        open_store_file.cache_clear()
+
+        self.assertIsNone(get_materialized_store())
+        self.assertEqual(self.materialize().analyzed, 2)
+        self.assertIsNotNone(get_materialized_store())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import morphology_index
+from morphology_index import (
+    collect_inflections,
+    get_morphology_index,
+    inflect,
+    is_regular_form,
+)
+from test_wordnet_snapshot import FakeWordNet
+from wordnet_snapshot import WordNetSnapshot, write_wordnet_snapshot
+
+
+class TestMorphologyIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.snapshot_directory = tempfile.TemporaryDirectory()
+        write_wordnet_snapshot(cls.snapshot_directory.name, FakeWordNet(), {})
+        cls.snapshot = WordNetSnapshot(cls.snapshot_directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.snapshot_directory.cleanup()
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+
+        for patcher in [
+            mock.patch.dict(
+                os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+            ),
+            mock.patch.object(morphology_index, "get_wordnet", lambda: self.snapshot),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        get_morphology_index.cache_clear()
+        self.addCleanup(get_morphology_index.cache_clear)
+        self.index = get_morphology_index()
+
+    def test_regular_forms_follow_the_spelling_rules(self):
+        self.assertEqual(inflect("whiten", "v"), ["whitens", "whitened", "whitening"])
+        self.assertEqual(inflect("bake", "v"), ["bakes", "baked", "baking"])
+        self.assertEqual(inflect("carry", "v"), ["carries", "carried", "carrying"])
+        self.assertEqual(inflect("glass", "n"), ["glasses"])
+        self.assertEqual(inflect("fireman", "n"), ["firemen"])
+        self.assertEqual(inflect("happy", "a"), ["happier", "happiest"])
+        self.assertEqual(inflect("beautiful", "a"), [])
+        self.assertEqual(inflect("ice_cream", "n"), [])
+
+    def test_only_forms_that_wordnet_lemmatizes_back_are_regular(self):
+        substitutions = self.snapshot.substitutions["a"]
+
+        self.assertTrue(is_regular_form("blacker", "black", substitutions, {}))
+        # WordNet has no rule for 'ier'
+        self.assertFalse(is_regular_form("happier", "happy", substitutions, {}))
+        # Nor does it apply its rules to the forms of its exception lists
+        self.assertFalse(
+            is_regular_form("whiter", "white", substitutions, {"whiter": ["white"]})
+        )
+
+    def test_irregular_forms_replace_the_regular_ones(self):
+        inflections = collect_inflections(self.snapshot)
+
+        self.assertEqual(inflections["goose"], {"geese"})
+        self.assertIn("better", inflections["good"])
+        self.assertNotIn("gooder", inflections["good"])
+        # Lemmas that are inflected forms of another lemma aren't inflected again
+        self.assertNotIn("glasses", inflections)
+
+    def test_variations_go_both_ways(self):
+        self.assertEqual(self.index.inflections_of("goose"), ["geese"])
+        self.assertEqual(self.index.lemmas_of("geese"), ["goose"])
+        self.assertEqual(self.index.get_variations("geese"), ["goose"])
+        self.assertEqual(
+            self.index.get_variations("whitened"),
+            ["whiten", "whitening", "whitens"],
+        )
+        self.assertEqual(
+            self.index.get_variations("Whiten"), ["whitened", "whitening", "whitens"]
+        )
+        self.assertIn("whiter", self.index.get_variations("whites"))
+        self.assertEqual(self.index.get_variations("unknown"), [])
+
+    def test_many_words_can_be_expanded_at_once(self):
+        self.assertEqual(
+            self.index.expand(["geese", "glass", "unknown"]),
+            {"geese": ["goose"], "glass": ["glasses"], "unknown": []},
+        )
+
+    def test_index_is_built_once(self):
+        get_morphology_index.cache_clear()
+
+        with mock.patch.object(
+            morphology_index, "collect_inflections"
+        ) as collect_inflections:
+            index = get_morphology_index()
+
+        collect_inflections.assert_not_called()
+        self.assertEqual(index.get_variations("geese"), ["goose"])
+
+
+if __name__ == "__main__":
+    unittest.main()
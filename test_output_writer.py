@@ -0,0 +1,101 @@
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from output_writer import PageWriter, get_shard
+
+PAGES = {word: f"<html><body>{word}</body></html>" for word in ["white", "black"]}
+
+
+def generate_page(word):
+    yield "<html><body>"
+    yield word
+    yield "</body></html>"
+
+
+class TestPageWriter(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.output = os.path.join(self.temporary_directory.name, "output")
+
+    def read(self, *path):
+        with open(os.path.join(self.output, *path), encoding="utf-8") as file:
+            return file.read()
+
+    def test_flat_layout_writes_whole_and_streamed_pages(self):
+        with PageWriter(self.output) as writer:
+            writer.write("white", PAGES["white"])
+            writer.write("black", generate_page("black"))
+
+        self.assertEqual(self.read("white_info.html"), PAGES["white"])
+        self.assertEqual(self.read("black_info.html"), PAGES["black"])
+        self.assertEqual(
+            sorted(os.listdir(self.output)),
+            ["black_info.html", "styles.css", "white_info.html"],
+        )
+        self.assertEqual(writer.report().pages, 2)
+        self.assertEqual(writer.report().bytes, sum(map(len, PAGES.values())))
+
+    def test_sharded_layout_spreads_pages_across_directories(self):
+        words = [f"word{index}" for index in range(200)]
+        with PageWriter(self.output, "sharded", threads=8) as writer:
+            for word in words:
+                writer.write(word, generate_page(word))
+
+        self.assertEqual(
+            self.read(get_shard("word7"), "word7_info.html"),
+            "<html><body>word7</body></html>",
+        )
+        self.assertGreater(len(os.listdir(self.output)), 100)
+        # The pages link to the stylesheet at the top of the layout
+        self.assertEqual(writer.stylesheet_href, "../styles.css")
+        self.assertTrue(os.path.exists(os.path.join(self.output, "styles.css")))
+        self.assertEqual(writer.report().pages, len(words))
+
+    def test_archive_layouts_pack_every_page(self):
+        for layout, open_archive, read_member in [
+            ("zip", zipfile.ZipFile, lambda archive, name: archive.read(name)),
+            (
+                "tar",
+                tarfile.open,
+                lambda archive, name: archive.extractfile(name).read(),
+            ),
+        ]:
+            with self.subTest(layout=layout):
+                path = os.path.join(self.output, f"pages.{layout}")
+                with PageWriter(path, layout) as writer:
+                    for word, page in PAGES.items():
+                        writer.write(word, page)
+
+                self.assertEqual(
+                    os.listdir(self.output).count(f"pages.{layout}.tmp"), 0
+                )
+                with open_archive(path) as archive:
+                    self.assertEqual(
+                        read_member(archive, "white_info.html").decode("utf-8"),
+                        PAGES["white"],
+                    )
+                    self.assertTrue(read_member(archive, "styles.css"))
+
+    def test_write_errors_are_raised_when_the_writer_closes(self):
+        def failing_page():
+            yield "<html>"
+            raise RuntimeError("Rendering failed")
+
+        with self.assertRaisesRegex(RuntimeError, "Rendering failed"):
+            with PageWriter(self.output) as writer:
+                writer.write("white", failing_page())
+
+        # The partially written page was never renamed into place
+        self.assertEqual(os.listdir(self.output), ["styles.css"])
+
+    def test_unknown_layouts_are_rejected(self):
+        with self.assertRaises(ValueError):
+            PageWriter(self.output, "rar")
+
+
+if __name__ == "__main__":
+    unittest.main()
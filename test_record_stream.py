@@ -0,0 +1,138 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cli
+import data_bundle
+import result_cache
+from record_stream import (
+    RecordWriter,
+    pack_value,
+    read_records,
+    unpack_value,
+)
+from result_serialization import from_json_value
+from worker_pool import WordAnalysisOutcome
+
+RESULTS = {
+    "meanings": {"the color of snow", "a white person"},
+    "pos_and_transitivity": [("noun", None), ("verb", "transitive")],
+    "word_frequencies": {"white": 12},
+    "collocations": [(("white", "house"), 3)],
+}
+
+
+class TestMessagePack(unittest.TestCase):
+    def test_values_survive_a_round_trip(self):
+        values = [
+            None,
+            True,
+            False,
+            0,
+            127,
+            128,
+            65536,
+            2**64 - 1,
+            -1,
+            -32,
+            -33,
+            -(2**63),
+            1.5,
+            "",
+            "é" * 16,
+            "x" * 256,
+            "x" * 65536,
+            list(range(16)),
+            {str(number): [number] for number in range(70000)},
+        ]
+
+        for value in values:
+            with self.subTest(value=str(value)[:20]):
+                self.assertEqual(unpack_value(io.BytesIO(pack_value(value))), value)
+
+    def test_encoding_follows_the_specification(self):
+        self.assertEqual(pack_value({"a": [1, -1, None]}), b"\x81\xa1a\x93\x01\xff\xc0")
+        self.assertEqual(pack_value(200), b"\xcc\xc8")
+        self.assertEqual(pack_value(-200), b"\xd1\xff\x38")
+        self.assertEqual(pack_value("x" * 40)[:2], b"\xd9\x28")
+
+    def test_invalid_values_are_rejected(self):
+        for value in [{1: 2}, {"a"}, 2**64, b"bytes"]:
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    pack_value(value)
+
+        with self.assertRaises(ValueError):
+            unpack_value(io.BytesIO(pack_value(["truncated"])[:-2]))
+
+
+class TestRecordStream(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.outcomes = [
+            WordAnalysisOutcome("white", RESULTS, None, None),
+            WordAnalysisOutcome("whtie", None, "WordNotFoundError", "Did you mean?"),
+        ]
+
+    def test_records_can_be_read_back_one_at_a_time(self):
+        for record_format in ["jsonl", "msgpack"]:
+            with self.subTest(record_format=record_format):
+                path = os.path.join(self.temporary_directory.name, record_format)
+                with RecordWriter(path, record_format) as writer:
+                    for outcome in self.outcomes:
+                        writer.write(outcome)
+
+                with open(path, "rb") as file:
+                    records = read_records(file, record_format)
+                    first = next(records)
+                    self.assertEqual(first["word"], "white")
+                    self.assertEqual(from_json_value(first["results"]), RESULTS)
+                    self.assertEqual(
+                        next(records)["error"],
+                        {"type": "WordNotFoundError", "message": "Did you mean?"},
+                    )
+                    self.assertEqual(list(records), [])
+
+    def test_records_are_deterministic_and_versioned(self):
+        paths = []
+        for meanings in [RESULTS["meanings"], set(reversed(list(RESULTS["meanings"])))]:
+            paths.append(os.path.join(self.temporary_directory.name, str(len(paths))))
+            with RecordWriter(paths[-1]) as writer:
+                writer.write(self.outcomes[0]._replace(results={"meanings": meanings}))
+
+        with open(paths[0], "rb") as first, open(paths[1], "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+        with self.assertRaises(ValueError):
+            list(
+                read_records(io.BytesIO(b'{"version": 0, "word": "white"}\n'), "jsonl")
+            )
+
+    def test_words_get_streamed_without_pages(self):
+        path = os.path.join(self.temporary_directory.name, "words.msgpack")
+
+        with mock.patch.object(
+            result_cache, "analyze_word", lambda word, timings=None: RESULTS
+        ), mock.patch.object(data_bundle, "ensure_data_packages"), mock.patch.object(
+            cli, "generate_html_content"
+        ) as generate_html_content, mock.patch(
+            "sys.stderr"
+        ):
+            counts = cli.get_words_records(
+                ["white", "black"], writer=RecordWriter(path, "msgpack")
+            )
+
+        self.assertEqual(counts, (2, 0))
+        generate_html_content.assert_not_called()
+        with open(path, "rb") as file:
+            self.assertEqual(
+                [record["word"] for record in read_records(file, "msgpack")],
+                ["white", "black"],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import result_cache
+from result_cache import ResultCache, analyze_word_with_cache
+from result_serialization import decode_analysis, encode_analysis
+
+ANALYSIS_RESULTS = {
+    "meanings": {"the quality of being white", "turn white"},
+    "synonyms": {"white", "whiten"},
+    "word_frequencies": {"white": 12, "whiten": 0},
+    "collocations": [(("white", "house"), 3)],
+    "pos_and_transitivity": [("noun", None), ("verb", "transitive")],
+    "hyponyms": ["whiteness.n.01"],
+    "etymology": None,
+    "odd_keys": {("white", "house"): 1, "__set__": 2},
+}
+
+VERSION = {"analyzers": 1, "wordnet": "3.0"}
+
+
+class TestResultSerialization(unittest.TestCase):
+    def test_round_trip_keeps_sets_and_tuples(self):
+        self.assertEqual(
+            decode_analysis(encode_analysis(ANALYSIS_RESULTS)), ANALYSIS_RESULTS
+        )
+
+    def test_sets_are_encoded_deterministically(self):
+        self.assertEqual(
+            encode_analysis({"synonyms": {"b", "a", "c"}}),
+            encode_analysis({"synonyms": {"c", "b", "a"}}),
+        )
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.path = os.path.join(self.temporary_directory.name, "results.sqlite3")
+        self.cache = ResultCache(self.path, version=VERSION)
+
+    def test_cached_results_skip_the_analysis(self):
+        with mock.patch.object(
+            result_cache, "analyze_word", return_value=ANALYSIS_RESULTS
+        ) as analyze_word:
+            first = analyze_word_with_cache("white", self.cache)
+            second = analyze_word_with_cache(" white ", self.cache)
+
+        analyze_word.assert_called_once()
+        self.assertEqual(first, second)
+
+    def test_incomplete_results_are_not_cached(self):
+        incomplete = dict(ANALYSIS_RESULTS, unavailable=["etymology"])
+
+        with mock.patch.object(
+            result_cache, "analyze_word", side_effect=[incomplete, ANALYSIS_RESULTS]
+        ):
+            self.assertEqual(analyze_word_with_cache("white", self.cache), incomplete)
+            self.assertEqual(
+                analyze_word_with_cache("white", self.cache), ANALYSIS_RESULTS
+            )
+
+        self.assertEqual(self.cache.get("white"), ANALYSIS_RESULTS)
+
+    def test_entries_are_keyed_by_version(self):
+        self.cache.put("white", ANALYSIS_RESULTS)
+        other_version = ResultCache(self.path, version=dict(VERSION, wordnet="3.1"))
+
+        self.assertIsNone(other_version.get("white"))
+        self.assertEqual(self.cache.get("white"), ANALYSIS_RESULTS)
+
+    def test_invalidate_and_clear(self):
+        self.cache.put("white", ANALYSIS_RESULTS)
+        self.cache.put("black", ANALYSIS_RESULTS)
+
+        self.cache.invalidate("white")
+        self.assertIsNone(self.cache.get("white"))
+        self.assertEqual(len(self.cache), 1)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for word in ["white", "black", "grey"]:
+            self.cache.put(word, ANALYSIS_RESULTS)
+        self.cache.get("white")
+
+        entry_size = len(
+            self.cache._connect().execute("SELECT payload FROM results").fetchone()[0]
+        )
+        self.cache.max_bytes = 2 * entry_size
+        self.cache.evict()
+
+        self.assertIsNone(self.cache.get("black"))
+        self.assertIsNotNone(self.cache.get("white"))
+        self.assertIsNotNone(self.cache.get("grey"))
+
+    def test_cache_can_be_sent_to_another_process(self):
+        self.cache.put("white", ANALYSIS_RESULTS)
+
+        copy = pickle.loads(pickle.dumps(self.cache))
+
+        self.assertEqual(copy.get("white"), ANALYSIS_RESULTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
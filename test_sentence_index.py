@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sentence_index import load_sentence_index
+
+DOCUMENTS = [
+    (
+        "firefox.txt",
+        [
+            "The White page does not load".split(),
+            "Clicking on a white link crashes the whole browser window again".split(),
+            "white white white".split(),
+        ],
+    ),
+    ("grail.txt", ["KING ARTHUR : Whoa there !".split()]),
+    ("wine.txt", ["A crisp White wine with a long finish".split()]),
+]
+
+
+class TestSentenceIndex(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        patcher = mock.patch.dict(
+            os.environ, {"WORD_INFO_DATA_DIR": self.temporary_directory.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temporary_directory.cleanup)
+        self.index = load_sentence_index("test", {"corpus": "test"}, lambda: DOCUMENTS)
+
+    def test_occurrences_ignore_case_and_keep_the_first_one_per_sentence(self):
+        self.assertEqual(
+            self.index.occurrences("WHITE"),
+            [
+                ("firefox.txt", 0, 1),
+                ("firefox.txt", 1, 3),
+                ("firefox.txt", 2, 0),
+                ("wine.txt", 0, 2),
+            ],
+        )
+        self.assertEqual(self.index.occurrences("black"), [])
+
+    def test_phrases_show_the_context_of_the_word(self):
+        self.assertEqual(
+            self.index.related_phrases("white", 10)[2],
+            "Clicking on a white link crashes the whole browser",
+        )
+
+    def test_phrases_are_spread_across_files(self):
+        self.assertEqual(
+            self.index.related_phrases("white", 2),
+            ["The White page does not load", "A crisp White wine with a long finish"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+
+import utils
+from utils import (
+    WordNotFoundError,
+    check_word_exists,
+    handle_word_not_found,
+    lookup_synsets,
+)
+
+
+class TestLookupSynsets(unittest.TestCase):
+    def setUp(self):
+        lookup_synsets.cache_clear()
+        self.addCleanup(lookup_synsets.cache_clear)
+
+        self.wn = mock.Mock()
+        patcher = mock.patch.object(utils, "get_wordnet", return_value=self.wn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.wn.synsets.side_effect = lambda word: (
+            ["white.n.01", "white.a.01"] if word == "white" else []
+        )
+
+    def test_wordnet_is_consulted_once_per_word(self):
+        @check_word_exists
+        def analyzer(word):
+            return lookup_synsets(word)
+
+        for _ in range(10):
+            self.assertEqual(analyzer("white"), ("white.n.01", "white.a.01"))
+
+        self.wn.synsets.assert_called_once_with("white")
+
+    @mock.patch("utils.get_closest_words", return_value=["white"])
+    def test_misses_are_cached_too(self, get_closest_words):
+        for _ in range(3):
+            with self.assertRaises(WordNotFoundError):
+                handle_word_not_found("whtie")
+
+        self.wn.synsets.assert_called_once_with("whtie")
+        self.assertEqual(get_closest_words.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
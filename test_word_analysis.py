@@ -0,0 +1,138 @@
+import time
+import unittest
+from unittest import mock
+
+import instrumentation
+import word_analysis
+from word_analysis import (
+    Analyzer,
+    AnalyzerUnavailableError,
+    WordAnalysisError,
+    analyze_word,
+    format_analyzer_timings,
+    get_critical_path,
+    is_complete,
+)
+
+
+def slow(value, seconds=0.2):
+    def analyzer(*_):
+        time.sleep(seconds)
+        return value
+
+    return analyzer
+
+
+def fail(_):
+    raise RuntimeError("boom")
+
+
+def time_out(_):
+    raise AnalyzerUnavailableError("etymonline timed out")
+
+
+FAKE_ANALYZERS = (
+    Analyzer("etymology", ("etymology",), slow("from Old English"), (), False),
+    Analyzer("synonyms", ("synonyms",), slow({"white", "snowy"}, 0.05), (), True),
+    Analyzer("meanings", ("meanings",), slow({"a color"}, 0.05), (), True),
+    Analyzer(
+        "frequencies",
+        ("word_frequencies",),
+        lambda synonyms: {synonym: 1 for synonym in synonyms},
+        ("synonyms",),
+        False,
+    ),
+    Analyzer(
+        "relations",
+        ("hyponyms", "hypernyms"),
+        lambda _: {"hyponyms": ["snow"], "hypernyms": ["color"], "meronyms": []},
+        (),
+        True,
+    ),
+)
+
+
+class TestAnalyzeWord(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("word_analysis.handle_word_not_found")
+        self.handle_word_not_found = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("word_analysis.ANALYZERS", FAKE_ANALYZERS)
+    def test_dependencies_receive_the_results_they_need(self):
+        results = analyze_word("white")
+
+        self.assertEqual(results["word_frequencies"], {"white": 1, "snowy": 1})
+        self.assertEqual(results["etymology"], "from Old English")
+        self.assertEqual(results["hypernyms"], ["color"])
+        self.assertNotIn("meronyms", results)
+
+    @mock.patch("word_analysis.ANALYZERS", FAKE_ANALYZERS)
+    def test_network_bound_analyzer_overlaps_with_the_rest(self):
+        timings = {}
+        analyze_word("white", timings=timings)
+
+        self.assertLess(timings["synonyms"].started, timings["etymology"].finished)
+        self.assertLess(timings["meanings"].started, timings["etymology"].finished)
+        self.assertEqual(get_critical_path(timings), ["etymology"])
+        self.assertIn("* etymology", format_analyzer_timings(timings))
+
+    @mock.patch("word_analysis.ANALYZERS", FAKE_ANALYZERS)
+    def test_analyzers_take_turns_while_memory_is_tracked(self):
+        collector = instrumentation.enable(track_memory=True)
+        self.addCleanup(instrumentation.disable)
+
+        timings = {}
+        analyze_word("white", timings=timings)
+
+        spans = sorted(timings.values())
+        for previous, following in zip(spans, spans[1:]):
+            self.assertLessEqual(previous.finished, following.started)
+        self.assertEqual(
+            {name: stats["calls"] for name, stats in collector.stats().items()},
+            dict.fromkeys(timings, 1),
+        )
+
+    @mock.patch("word_analysis.ANALYZERS", FAKE_ANALYZERS)
+    def test_critical_path_follows_dependencies(self):
+        timings = {
+            "etymology": word_analysis.AnalyzerTiming(0.0, 0.1),
+            "synonyms": word_analysis.AnalyzerTiming(0.0, 0.2),
+            "meanings": word_analysis.AnalyzerTiming(0.2, 0.3),
+            "frequencies": word_analysis.AnalyzerTiming(0.2, 0.5),
+        }
+
+        self.assertEqual(get_critical_path(timings), ["synonyms", "frequencies"])
+
+    @mock.patch(
+        "word_analysis.ANALYZERS",
+        FAKE_ANALYZERS + (Analyzer("broken", ("broken",), fail, (), False),),
+    )
+    def test_failures_are_wrapped(self):
+        with self.assertRaises(WordAnalysisError):
+            analyze_word("white")
+
+    @mock.patch(
+        "word_analysis.ANALYZERS",
+        (FAKE_ANALYZERS[0]._replace(function=time_out),) + FAKE_ANALYZERS[1:],
+    )
+    def test_unavailable_data_leaves_the_results_incomplete(self):
+        with self.assertLogs(level="WARNING"):
+            results = analyze_word("white")
+
+        self.assertIsNone(results["etymology"])
+        self.assertEqual(results["synonyms"], {"white", "snowy"})
+        self.assertFalse(is_complete(results))
+
+    def test_missing_word_fails_before_any_analyzer_runs(self):
+        self.handle_word_not_found.side_effect = LookupError("not found")
+
+        with mock.patch("word_analysis.run_analyzers") as run_analyzers:
+            with self.assertRaises(WordAnalysisError):
+                analyze_word("whtie")
+
+        run_analyzers.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
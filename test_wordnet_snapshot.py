@@ -0,0 +1,251 @@
+import os
+import pickle
+import tempfile
+import unittest
+from collections import defaultdict
+from unittest import mock
+
+from nltk.corpus.reader.wordnet import WordNetCorpusReader
+
+import wordnet_traversal
+import wordnet_snapshot
+from wordnet_snapshot import WordNetSnapshot, get_wordnet, write_wordnet_snapshot
+from wordnet_traversal import TRAVERSAL_FIELDS, traverse_word
+
+
+class FakeLemma:
+    def __init__(self, name, synset, frames=()):
+        self._name = name
+        self._synset = synset
+        self._frames = list(frames)
+        self._antonyms = []
+        self._related = []
+
+    def name(self):
+        return self._name
+
+    def synset(self):
+        return self._synset
+
+    def frame_strings(self):
+        return self._frames
+
+    def antonyms(self):
+        return self._antonyms
+
+    def derivationally_related_forms(self):
+        return self._related
+
+
+class FakeSynset:
+    def __init__(self, name, offset, definition, lemmas, frames=()):
+        self._name = name
+        self._offset = offset
+        self._definition = definition
+        self._lemmas = [FakeLemma(lemma, self, frames) for lemma in lemmas]
+        self.relations = defaultdict(list)
+
+    def name(self):
+        return self._name
+
+    def pos(self):
+        return self._name.split(".")[1]
+
+    def offset(self):
+        return self._offset
+
+    def definition(self):
+        return self._definition
+
+    def lemmas(self):
+        return self._lemmas
+
+    def __getattr__(self, relation):
+        if relation in wordnet_snapshot.SYNSET_RELATIONS:
+            return lambda: self.relations[relation]
+        raise AttributeError(relation)
+
+
+class FakeWordNet:
+    """A tiny WordNet, read through the lookup and morphology code of NLTK's reader."""
+
+    MORPHOLOGICAL_SUBSTITUTIONS = WordNetCorpusReader.MORPHOLOGICAL_SUBSTITUTIONS
+    synsets = WordNetCorpusReader.synsets
+    morphy = WordNetCorpusReader.morphy
+    _morphy = WordNetCorpusReader._morphy
+
+    def __init__(self):
+        white = FakeSynset("white.n.01", 100, "the quality of being white", ["white"])
+        color = FakeSynset("achromatic_color.n.01", 200, "a color lacking hue", [])
+        color._lemmas = [FakeLemma("achromatic_color", color)]
+        whiteness = FakeSynset("whiteness.n.01", 300, "whiteness", ["whiteness"])
+        whiten = FakeSynset(
+            "whiten.v.01",
+            100,
+            "turn white",
+            ["whiten", "white"],
+            frames=["Somebody ----s something", "Something ----s"],
+        )
+        white_adjective = FakeSynset("white.a.01", 400, "light in color", ["white"])
+        black = FakeSynset("black.a.01", 500, "dark in color", ["black"])
+        snowy = FakeSynset("snowy.s.01", 600, "white as snow", ["snowy", "snow-white"])
+        good = FakeSynset("good.a.01", 700, "having desirable qualities", ["good"])
+        goose = FakeSynset("goose.n.01", 800, "a waterfowl", ["goose"])
+        glass = FakeSynset("glass.n.01", 900, "a brittle material", ["glass"])
+        glasses = FakeSynset("spectacles.n.01", 1000, "optical instrument", ["glasses"])
+        painting = FakeSynset("painting.n.01", 1100, "graphic art", ["painting"])
+
+        white.relations["hypernyms"] = [color]
+        white.relations["hyponyms"] = [whiteness]
+        white.relations["topic_domains"] = [painting]
+        color.relations["hyponyms"] = [white]
+        whiteness.relations["hypernyms"] = [white]
+        white_adjective.relations["similar_tos"] = [snowy]
+        snowy.relations["similar_tos"] = [white_adjective]
+        white_adjective.lemmas()[0]._antonyms = [black.lemmas()[0]]
+        black.lemmas()[0]._antonyms = [white_adjective.lemmas()[0]]
+        whiten.lemmas()[0]._related = [whiteness.lemmas()[0]]
+
+        self.synset_list = [
+            white,
+            color,
+            whiteness,
+            painting,
+            goose,
+            glass,
+            glasses,
+            whiten,
+            white_adjective,
+            black,
+            snowy,
+            good,
+        ]
+        self.by_offset = {
+            ("a" if synset.pos() == "s" else synset.pos(), synset.offset()): synset
+            for synset in self.synset_list
+        }
+
+        self._lemma_pos_offset_map = defaultdict(dict)
+        for synset in self.synset_list:
+            pos = "a" if synset.pos() == "s" else synset.pos()
+            for lemma in synset.lemmas():
+                offsets = self._lemma_pos_offset_map[lemma.name().lower()]
+                offsets.setdefault(pos, []).append(synset.offset())
+        self._exception_map = {
+            "n": {"geese": ["goose"]},
+            "v": {},
+            "a": {"better": ["good", "well"], "whiter": ["white"]},
+            "r": {},
+        }
+
+    def synset_from_pos_and_offset(self, pos, offset):
+        return self.by_offset[("a" if pos == "s" else pos, offset)]
+
+    def all_synsets(self):
+        return iter(self.synset_list)
+
+    def get_version(self):
+        return "3.0"
+
+
+WORDS = [
+    "white",
+    "White",
+    "whites",
+    "whiter",
+    "whitened",
+    "whitening",
+    "whiteness",
+    "geese",
+    "gooses",
+    "glasses",
+    "better",
+    "snowy",
+    "snow-white",
+    "achromatic_color",
+    "paintings",
+    "unknown",
+]
+
+
+class TestWordNetSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.wordnet = FakeWordNet()
+        write_wordnet_snapshot(cls.directory.name, cls.wordnet, {"test": True})
+        cls.snapshot = WordNetSnapshot(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_words_resolve_to_the_synsets_of_nltks_reader(self):
+        for word in WORDS:
+            for pos in [None, "n", "v", "a", "r"]:
+                with self.subTest(word=word, pos=pos):
+                    self.assertEqual(
+                        [synset.name() for synset in self.snapshot.synsets(word, pos)],
+                        [synset.name() for synset in self.wordnet.synsets(word, pos)],
+                    )
+                    self.assertEqual(
+                        self.snapshot.morphy(word, pos), self.wordnet.morphy(word, pos)
+                    )
+
+    def test_traversals_match_nltks_reader(self):
+        for word in WORDS:
+            with self.subTest(word=word):
+                results = {}
+                for reader in [self.snapshot, self.wordnet]:
+                    with mock.patch.object(
+                        wordnet_traversal, "lookup_synsets", reader.synsets
+                    ):
+                        results[reader] = traverse_word(word, TRAVERSAL_FIELDS)
+
+                self.assertEqual(results[self.snapshot], results[self.wordnet])
+
+    def test_synsets_and_lemmas_behave_like_nltks(self):
+        whiten = self.snapshot.synset("whiten.v.01")
+
+        self.assertEqual(whiten.pos(), "v")
+        self.assertEqual(whiten.offset(), 100)
+        self.assertEqual(whiten.lemma_names(), ["whiten", "white"])
+        self.assertEqual(
+            whiten.lemmas()[0].frame_strings(),
+            ["Somebody ----s something", "Something ----s"],
+        )
+        self.assertEqual(
+            whiten.lemmas()[0].derivationally_related_forms()[0].synset(),
+            self.snapshot.synset("whiteness.n.01"),
+        )
+        self.assertEqual(repr(whiten), "Synset('whiten.v.01')")
+        self.assertEqual(self.snapshot.get_version(), "3.0")
+        with self.assertRaises(ValueError):
+            self.snapshot.synset("unknown.n.01")
+
+    def test_whole_wordnet_can_be_listed(self):
+        self.assertEqual(
+            [synset.name() for synset in self.snapshot.all_synsets()],
+            [synset.name() for synset in self.wordnet.all_synsets()],
+        )
+        self.assertEqual(
+            [synset.name() for synset in self.snapshot.all_synsets("a")],
+            ["white.a.01", "black.a.01", "snowy.s.01", "good.a.01"],
+        )
+        self.assertIn("snow-white", self.snapshot.all_lemma_names())
+
+    def test_snapshot_is_pickled_by_directory(self):
+        copy = pickle.loads(pickle.dumps(self.snapshot))
+
+        self.assertEqual(copy.synsets("geese"), self.snapshot.synsets("geese"))
+
+    def test_reader_is_chosen_by_environment(self):
+        with mock.patch.dict(
+            os.environ, {wordnet_snapshot.WORDNET_READER_ENV_VAR: "other"}
+        ):
+            with self.assertRaises(ValueError):
+                get_wordnet()
+
+
+if __name__ == "__main__":
+    unittest.main()
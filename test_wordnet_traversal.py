@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from wordnet_traversal import traverse_word
+
+
+def make_lemma(name, frames=(), antonyms=(), related=()):
+    lemma = mock.Mock()
+    lemma.name.return_value = name
+    lemma.frame_strings.return_value = list(frames)
+    lemma.antonyms.return_value = list(antonyms)
+    lemma.derivationally_related_forms.return_value = list(related)
+    return lemma
+
+
+def make_synset(name, definition, lemmas, **relations):
+    synset = mock.Mock()
+    synset.name.return_value = name
+    synset.pos.return_value = name.split(".")[1]
+    synset.definition.return_value = definition
+    synset.lemmas.return_value = lemmas
+    for relation in [
+        "hypernyms",
+        "hyponyms",
+        "part_meronyms",
+        "substance_meronyms",
+        "member_meronyms",
+        "similar_tos",
+        "topic_domains",
+    ]:
+        getattr(synset, relation).return_value = relations.get(relation, [])
+    for lemma in lemmas:
+        lemma.synset.return_value = synset
+    return synset
+
+
+def build_synsets():
+    whiteness = make_synset("whiteness.n.01", "the quality of being white", [])
+    noun_lemma = make_lemma("whiteness")
+    whiteness.lemmas.return_value = [noun_lemma]
+    noun_lemma.synset.return_value = whiteness
+
+    color = make_synset("achromatic_color.n.01", "a color lacking hue", [])
+    blacken = make_lemma("blacken")
+    make_synset("blacken.v.01", "make black", [blacken])
+
+    noun = make_synset(
+        "white.n.01",
+        "the quality of being white",
+        [make_lemma("white", related=[noun_lemma]), make_lemma("White")],
+        hypernyms=[color],
+        hyponyms=[whiteness],
+    )
+    verb = make_synset(
+        "whiten.v.01",
+        "turn white",
+        [
+            make_lemma(
+                "whiten",
+                frames=["Somebody ----s something", "Something ----s"],
+                antonyms=[blacken],
+            ),
+            make_lemma("white_out", frames=["Idiom ----s"]),
+        ],
+    )
+    return [noun, verb]
+
+
+class TestTraverseWord(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "wordnet_traversal.lookup_synsets", return_value=build_synsets()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_all_fields_are_filled_in_one_pass(self):
+        results = traverse_word("white")
+
+        self.assertEqual(
+            results["meanings"], {"the quality of being white", "turn white"}
+        )
+        self.assertEqual(results["synonyms"], {"white", "White", "whiten", "white out"})
+        self.assertEqual(results["antonyms"], {"blacken"})
+        self.assertEqual(results["idiomatic_expressions"], {"white out"})
+        self.assertEqual(results["associated_nouns"], {"whiteness"})
+        self.assertEqual(
+            results["pos_and_transitivity"], [("noun", None), ("verb", "transitive")]
+        )
+        self.assertEqual(results["semantic_fields"], ["achromatic color"])
+        self.assertEqual(results["hypernyms"], ["achromatic color.n.01"])
+        self.assertEqual(results["hyponyms"], ["whiteness.n.01"])
+
+    def test_only_requested_fields_are_computed(self):
+        synsets = build_synsets()
+        with mock.patch("wordnet_traversal.lookup_synsets", return_value=synsets):
+            results = traverse_word("white", ("meanings",))
+
+        self.assertEqual(list(results), ["meanings"])
+        for synset in synsets:
+            synset.hyponyms.assert_not_called()
+            for lemma in synset.lemmas():
+                lemma.frame_strings.assert_not_called()
+                lemma.antonyms.assert_not_called()
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            traverse_word("white", ("rhymes",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import time
+import unittest
+from unittest import mock
+
+import etymology_fetcher
+import instrumentation
+import worker_pool
+from word_analysis import WordAnalysisError
+
+
+def fake_analyze_word(word, timings=None):
+    if word.startswith("x"):
+        raise WordAnalysisError(f"Could not analyze {word}")
+    return {"meanings": {word.upper()}}
+
+
+def fake_fetch_etymology(word, timings=None):
+    etymology_fetcher.get_default_fetcher().rate_limiter.wait()
+    return {"fetched_at": time.monotonic()}
+
+
+@unittest.skipUnless(
+    "fork" in multiprocessing.get_all_start_methods(), "Requires the fork start method"
+)
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        for target, replacement in [
+            ("result_cache.analyze_word", fake_analyze_word),
+            ("worker_pool.load_shared_state", mock.Mock()),
+        ]:
+            patcher = mock.patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_outcomes_keep_the_order_of_the_words(self):
+        words = [f"word{index}" for index in range(50)]
+
+        outcomes = list(
+            worker_pool.analyze_words_in_parallel(iter(words), workers=3, chunk_size=4)
+        )
+
+        self.assertEqual([outcome.word for outcome in outcomes], words)
+        self.assertEqual(outcomes[7].results, {"meanings": {"WORD7"}})
+
+    def test_failures_come_back_as_structured_errors(self):
+        outcomes = list(
+            worker_pool.analyze_words_in_parallel(["good", "xbad"], workers=2)
+        )
+
+        self.assertIsNone(outcomes[0].error_type)
+        self.assertIsNone(outcomes[1].results)
+        self.assertEqual(outcomes[1].error_type, "WordAnalysisError")
+        self.assertEqual(outcomes[1].error_message, "Could not analyze xbad")
+
+    def test_workers_share_the_etymology_rate_limit(self):
+        etymology_fetcher.get_default_fetcher.cache_clear()
+        self.addCleanup(etymology_fetcher.get_default_fetcher.cache_clear)
+
+        with mock.patch.dict(
+            os.environ, {etymology_fetcher.ETYMOLOGY_RATE_ENV_VAR: "20"}
+        ), mock.patch("result_cache.analyze_word", fake_fetch_etymology):
+            outcomes = list(
+                worker_pool.analyze_words_in_parallel(
+                    [f"word{index}" for index in range(12)], workers=4, chunk_size=1
+                )
+            )
+
+        times = sorted(outcome.results["fetched_at"] for outcome in outcomes)
+        intervals = [later - earlier for earlier, later in zip(times, times[1:])]
+        # Four workers with a limit each would send four requests at once
+        self.assertGreater(min(intervals), 0.04)
+
+    def test_worker_statistics_are_merged_into_the_parent(self):
+        collector = instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+        words = [f"word{index}" for index in range(20)]
+
+        with mock.patch(
+            "result_cache.analyze_word",
+            instrumentation.instrumented("analyze")(fake_analyze_word),
+        ):
+            list(worker_pool.analyze_words_in_parallel(words, workers=3, chunk_size=2))
+
+        self.assertEqual(collector.stats()["analyze"]["calls"], len(words))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,26 +1,30 @@
 import functools
 
-from nltk.corpus import wordnet as wn
-from nltk.metrics.distance import edit_distance
+from fuzzy_index import get_lemma_index
+from instrumentation import instrumented
+from wordnet_snapshot import get_wordnet
 
-from progress_reporter import progress_wrapper
+# How many words keep their resolved synsets around. A single word analysis consults them from
+# every analyzer, and batch runs move on from one word to the next.
+SYNSET_CACHE_SIZE = 1024
 
 
 class WordNotFoundError(Exception):
     pass
 
 
-@progress_wrapper
-def get_closest_words(word, num_suggestions=3):
-    words = set(
-        lemma.name() for synset in wn.all_synsets() for lemma in synset.lemmas()
-    )
-    distances = sorted(
-        [(w, edit_distance(word, w, transpositions=True)) for w in words],
-        key=lambda x: x[1],
-    )
-    closest_words = [word for word, _ in distances[:num_suggestions]]
-    return closest_words
+@functools.lru_cache(maxsize=SYNSET_CACHE_SIZE)
+def lookup_synsets(word):
+    """Returns the synsets of a word as a tuple. WordNet only gets consulted the first time a
+    word is looked up, and the analyzers share the result, misses included. The synsets come
+    from the WordNet snapshot unless NLTK's reader was selected."""
+
+    return tuple(get_wordnet().synsets(word))
+
+
+@instrumented()
+def get_closest_words(word, num_suggestions=3, max_distance=None):
+    return get_lemma_index().closest(word, num_suggestions, max_distance)
 
 
 def check_word_exists(func):
@@ -33,7 +37,7 @@ def check_word_exists(func):
 
 
 def handle_word_not_found(word):
-    if not wn.synsets(word):
+    if not lookup_synsets(word):
         closest_words = get_closest_words(word)
         suggestions = ", ".join(closest_words)
         raise WordNotFoundError(
@@ -1,31 +1,102 @@
 """This module provides the means to analyze plenty of useful information about a given word.
 
+The analyzers run as a small dependency graph on a pool of threads: most of them only need the
+word itself, while the frequencies and collocations wait for the synonyms. This lets the
+etymology request overlap with the rest of the work. Analyzers that read WordNet's data files
+take turns through a lock, because NLTK's WordNet reader shares one file handle per part of
+speech between threads.
+
 Functions:
-analyze_word(word)
+analyze_word(word, max_workers, timings)
+is_complete(analysis_results)
+load_analyzers()
+get_analysis_version()
+get_critical_path(timings)
+format_analyzer_timings(timings)
 
 Classes:
 WordAnalysisError
+AnalyzerUnavailableError
+Analyzer
+AnalyzerTiming
 
 """
 
-from progress_reporter import progress_wrapper
-from semantic_relations import get_semantic_fields, get_semantic_relations
-from etymology_scraper import get_etymology
-from wordnet_utils import (
-    get_alternative_words,
-    get_associated_nouns_verbs,
-    get_domain_words,
-    get_idiomatic_expressions,
-    get_meanings,
-    get_phrasal_verbs,
-    get_pos_and_transitivity,
-    get_related_phrases_and_expressions,
-    get_synonyms_antonyms,
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from instrumentation import get_instrumentation
+from lazy_import import LazyFunction
+from wordnet_traversal import TRAVERSAL_FIELDS
+
+# The analyzers' modules only get imported when they first run, which keeps NLTK, requests and
+# BeautifulSoup out of the startup of the command line
+get_etymology = LazyFunction("etymology_scraper", "get_etymology")
+traverse_word = LazyFunction("wordnet_traversal", "traverse_word")
+get_word_frequencies = LazyFunction("nltk_helpers", "get_word_frequencies")
+get_collocations = LazyFunction("nltk_helpers", "get_collocations")
+get_morphological_variations = LazyFunction(
+    "nltk_helpers", "get_morphological_variations"
 )
-from nltk_helpers import (
-    get_collocations,
-    get_morphological_variations,
-    get_word_frequencies,
+get_related_phrases_and_expressions = LazyFunction(
+    "wordnet_utils", "get_related_phrases_and_expressions"
+)
+handle_word_not_found = LazyFunction("utils", "handle_word_not_found")
+
+# Bump whenever a change to the analyzers alters the results that they produce
+ANALYZER_VERSION = 2
+
+DEFAULT_ANALYZER_THREADS = 4
+
+# The key of the results under which the names of the analyzers whose data was temporarily
+# out of reach get listed. It's only there when there are some.
+UNAVAILABLE_KEY = "unavailable"
+
+WORDNET_LOCK = threading.Lock()
+
+Analyzer = namedtuple(
+    "Analyzer",
+    ["name", "result_keys", "function", "dependencies", "uses_wordnet"],
+)
+Analyzer.__doc__ = """An analyzer of the graph. It gets called with the results stored under its
+dependencies, or with the word if it has none, and its return value gets stored under its
+result keys. An analyzer that fills several keys returns either a tuple of their values or a
+dictionary of them by key."""
+
+AnalyzerTiming = namedtuple("AnalyzerTiming", ["started", "finished"])
+AnalyzerTiming.__doc__ = """When an analyzer started and finished running, in seconds since the
+analysis of the word started."""
+
+# The etymology goes first so that the HTTP request gets sent as early as possible
+ANALYZERS = (
+    Analyzer("etymology", ("etymology",), get_etymology, (), False),
+    Analyzer("wordnet_traversal", TRAVERSAL_FIELDS, traverse_word, (), True),
+    Analyzer(
+        "word_frequencies",
+        ("word_frequencies",),
+        get_word_frequencies,
+        ("synonyms",),
+        False,
+    ),
+    Analyzer("collocations", ("collocations",), get_collocations, ("synonyms",), False),
+    Analyzer(
+        "morphological_variations",
+        ("morphological_variations",),
+        get_morphological_variations,
+        (),
+        False,
+    ),
+    Analyzer(
+        "related_phrases_and_expressions",
+        ("related_phrases_and_expressions",),
+        get_related_phrases_and_expressions,
+        (),
+        False,
+    ),
 )
 
 
@@ -35,58 +106,218 @@ class WordAnalysisError(Exception):
     pass
 
 
-def analyze_word(word):
+class AnalyzerUnavailableError(Exception):
+    """Raised by an analyzer whose data is temporarily out of reach, such as an etymology
+    that couldn't be fetched. The analysis goes on with None for each of its results, and
+    lists it under UNAVAILABLE_KEY so that the results don't get stored."""
+
+
+def is_complete(analysis_results):
+    """Tells whether every analyzer got its data, which results must before being stored."""
+
+    return UNAVAILABLE_KEY not in analysis_results
+
+
+def call_analyzer(analyzer, arguments):
+    instrumentation = get_instrumentation()
+    if instrumentation is None:
+        return analyzer.function(*arguments)
+
+    return instrumentation.call(analyzer.name, analyzer.function, *arguments)
+
+
+def call_analyzer_or_log(analyzer, arguments):
+    # Returns whether the analyzer got its data along with its result
+    try:
+        return call_analyzer(analyzer, arguments), True
+    except AnalyzerUnavailableError as error:
+        logging.warning(error)
+        result = (
+            None
+            if len(analyzer.result_keys) == 1
+            else (None,) * len(analyzer.result_keys)
+        )
+        return result, False
+
+
+def run_analyzer(analyzer, word, analysis_results, analysis_start):
+    arguments = [analysis_results[key] for key in analyzer.dependencies] or [word]
+
+    if analyzer.uses_wordnet:
+        with WORDNET_LOCK:
+            started = time.perf_counter()
+            result, available = call_analyzer_or_log(analyzer, arguments)
+    else:
+        started = time.perf_counter()
+        result, available = call_analyzer_or_log(analyzer, arguments)
+
+    timing = AnalyzerTiming(
+        started - analysis_start, time.perf_counter() - analysis_start
+    )
+
+    return result, available, timing
+
+
+def store_analyzer_result(analyzer, result, analysis_results):
+    if len(analyzer.result_keys) == 1:
+        analysis_results[analyzer.result_keys[0]] = result
+    elif isinstance(result, dict):
+        analysis_results.update((key, result[key]) for key in analyzer.result_keys)
+    else:
+        analysis_results.update(zip(analyzer.result_keys, result))
+
+
+def run_analyzers(word, analysis_results, max_workers, timings):
+    analysis_start = time.perf_counter()
+    pending = list(ANALYZERS)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while pending or running:
+                for analyzer in [
+                    analyzer
+                    for analyzer in pending
+                    if all(key in analysis_results for key in analyzer.dependencies)
+                ]:
+                    pending.remove(analyzer)
+                    future = executor.submit(
+                        run_analyzer, analyzer, word, analysis_results, analysis_start
+                    )
+                    running[future] = analyzer
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    analyzer = running.pop(future)
+                    result, available, timing = future.result()
+                    store_analyzer_result(analyzer, result, analysis_results)
+                    if not available:
+                        analysis_results.setdefault(UNAVAILABLE_KEY, []).append(
+                            analyzer.name
+                        )
+                    timings[analyzer.name] = timing
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+
+def analyze_word(word, max_workers=DEFAULT_ANALYZER_THREADS, timings=None):
     """Delegates analyzing many aspects of the passed word, and returns the analyses as a dictionary.
     Args:
         word (str): The word to analyze
+        max_workers (int): The number of threads that run analyzers concurrently
+        timings (dict): If passed, it gets filled with the AnalyzerTiming of each analyzer, by name
     Raises:
         WordAnalysisError: If any of the attempts to get information about the passed word fails.
 
     """
     analysis_results = {}
+    timings = {} if timings is None else timings
 
-    try:
-        analysis_results["meanings"] = get_meanings(word)
-        (
-            analysis_results["synonyms"],
-            analysis_results["antonyms"],
-        ) = get_synonyms_antonyms(word)
-        analysis_results["domain_words"] = get_domain_words(word)
-        (
-            analysis_results["associated_nouns"],
-            analysis_results["associated_verbs"],
-        ) = get_associated_nouns_verbs(word)
-        analysis_results["semantic_fields"] = get_semantic_fields(word)
-        (
-            analysis_results["hyponyms"],
-            analysis_results["hypernyms"],
-            analysis_results["meronyms"],
-        ) = get_semantic_relations(word)
-
-        # Get word frequencies for the original word and its synonyms
-        analysis_results["word_frequencies"] = get_word_frequencies(
-            analysis_results["synonyms"]
-        )
+    # The peak memory that tracemalloc reports is that of the whole process, so analyzers
+    # running side by side would count each other's allocations
+    instrumentation = get_instrumentation()
+    if instrumentation is not None and instrumentation.track_memory:
+        max_workers = 1
 
-        analysis_results["phrasal_verbs"] = get_phrasal_verbs(word)
-        analysis_results["collocations"] = get_collocations(
-            analysis_results["synonyms"]
-        )
-        analysis_results["morphological_variations"] = get_morphological_variations(
-            word
-        )
+    try:
+        # Fail fast if WordNet doesn't know the word. This also loads the word's synsets
+        # before any thread starts, so the analyzers' own checks don't touch the data files
+        handle_word_not_found(word)
 
-        analysis_results["etymology"] = get_etymology(word)
-        analysis_results["alternative_words"] = get_alternative_words(word)
-        analysis_results["idiomatic_expressions"] = get_idiomatic_expressions(word)
-        analysis_results["pos_and_transitivity"] = get_pos_and_transitivity(word)
-        analysis_results[
-            "related_phrases_and_expressions"
-        ] = get_related_phrases_and_expressions(word)
+        run_analyzers(word, analysis_results, max_workers, timings)
 
     except Exception as e:
         raise WordAnalysisError(
             f"An error occurred while trying to analyze the word {word}. Exception: {e}"
         )
 
+    logging.debug(
+        "Analyzer timings for %s:\n%s", word, format_analyzer_timings(timings)
+    )
+
     return analysis_results
+
+
+def load_analyzers():
+    """Imports the modules of every analyzer, as the first analysis would. Worker processes
+    forked afterwards then start with them already imported."""
+
+    handle_word_not_found.load()
+    for analyzer in ANALYZERS:
+        if isinstance(analyzer.function, LazyFunction):
+            analyzer.function.load()
+
+
+def get_analysis_version():
+    """Returns what the results of an analysis depend on besides the word itself: the version
+    of the analyzers and the versions of the data they read. Results stored under a different
+    analysis version must not be reused. Offline analyses have their own version, since the
+    words missing from the offline store get no etymology."""
+
+    import nltk
+
+    from corpus_index import CORPUS_INDEX_FORMAT_VERSION, get_corpus_version
+    from etymology_scraper import OFFLINE_ENV_VAR
+    from sentence_index import SENTENCE_INDEX_FORMAT_VERSION
+    from wordnet_snapshot import get_wordnet
+
+    version = {
+        "analyzers": ANALYZER_VERSION,
+        "nltk": nltk.__version__,
+        "wordnet": get_wordnet().get_version(),
+        "corpus_index": CORPUS_INDEX_FORMAT_VERSION,
+        "corpus": get_corpus_version(),
+        "sentence_index": SENTENCE_INDEX_FORMAT_VERSION,
+    }
+    # Only added offline, which keeps the results stored by online runs valid
+    if os.environ.get(OFFLINE_ENV_VAR):
+        version["etymologies"] = "offline"
+
+    return version
+
+
+def get_critical_path(timings):
+    """Returns the names of the analyzers on the critical path of an analysis: the analyzer that
+    finished last, preceded by the chain of dependencies that it had to wait for.
+    Args:
+        timings (dict): The AnalyzerTiming of each analyzer, by name
+    """
+
+    if not timings:
+        return []
+
+    analyzers = {analyzer.name: analyzer for analyzer in ANALYZERS}
+    producers = {
+        key: analyzer.name for analyzer in ANALYZERS for key in analyzer.result_keys
+    }
+
+    path = [max(timings, key=lambda name: timings[name].finished)]
+
+    while analyzers[path[0]].dependencies:
+        dependencies = {producers[key] for key in analyzers[path[0]].dependencies}
+        path.insert(0, max(dependencies, key=lambda name: timings[name].finished))
+
+    return path
+
+
+def format_analyzer_timings(timings):
+    """Formats the timings of an analysis as a table ordered by start time, marking the
+    analyzers on the critical path with an asterisk.
+    Args:
+        timings (dict): The AnalyzerTiming of each analyzer, by name
+    """
+
+    critical_path = set(get_critical_path(timings))
+    lines = []
+
+    for name, timing in sorted(timings.items(), key=lambda item: item[1].started):
+        lines.append(
+            f"{'*' if name in critical_path else ' '} {name:<32}"
+            f" start {timing.started * 1000:8.1f} ms"
+            f"  duration {(timing.finished - timing.started) * 1000:8.1f} ms"
+        )
+
+    return "\n".join(lines)
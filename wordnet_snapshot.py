@@ -0,0 +1,679 @@
+"""This module compiles WordNet into a compact snapshot on disk, and reads it back through
+memory-mapped tables, so that looking up words doesn't need NLTK's reader, which parses the
+WordNet index and exception files into Python objects when it loads and every synset's data
+line the first time it is read.
+
+The snapshot stores every string once, in a single UTF-8 table, and refers to strings,
+synsets and lemmas by their position everywhere else: the synsets and lemmas are packed
+arrays, their relations are offset tables into arrays of targets, and the lemma index and
+the morphological exceptions are sorted tables that get searched by bisection. Opening it
+only maps the files, so it takes milliseconds, and the worker processes of a batch run share
+the mapped pages instead of each holding a copy.
+
+WordNetSnapshot answers the calls of NLTK's reader that the analyzers make, with synsets and
+lemmas that behave like NLTK's. get_wordnet() returns the reader that the analyzers use: the
+snapshot, unless the WORD_INFO_WORDNET_READER environment variable is set to 'nltk'.
+
+Functions:
+read_nltk_lexicon(wordnet, pos)
+write_wordnet_snapshot(directory, wordnet, source)
+get_wordnet_source()
+get_wordnet_snapshot()
+get_wordnet()
+
+Classes:
+StringPool
+StringTable
+SortedTable
+WordNetSnapshot
+SnapshotSynset
+SnapshotLemma
+"""
+
+import functools
+import os
+from array import array
+
+from index_storage import (
+    ensure_index,
+    get_index_directory,
+    map_array,
+    read_manifest,
+    write_array,
+    write_atomically,
+    write_manifest,
+)
+
+WORDNET_SNAPSHOT_FORMAT_VERSION = 2
+WORDNET_SNAPSHOT_DIRECTORY = "wordnet"
+WORDNET_READER_ENV_VAR = "WORD_INFO_WORDNET_READER"
+WORDNET_READERS = ("snapshot", "nltk")
+
+POS_LIST = ("n", "v", "a", "r")
+SYNSET_RELATIONS = (
+    "hypernyms",
+    "hyponyms",
+    "part_meronyms",
+    "substance_meronyms",
+    "member_meronyms",
+    "similar_tos",
+    "topic_domains",
+    "instance_hypernyms",
+    "instance_hyponyms",
+)
+LEMMA_RELATIONS = ("antonyms", "derivationally_related_forms")
+
+STRINGS_FILENAME = "strings.bin"
+STRING_OFFSETS_FILENAME = "string_offsets.bin"
+
+# The array tables of the snapshot and their typecodes. The offset tables have one more
+# entry than the synsets or lemmas they describe, times the number of relations.
+TABLES = {
+    "synset_names": "I",
+    "synset_pos": "B",
+    "synset_offsets": "I",
+    "synset_definitions": "I",
+    "synset_lemma_offsets": "I",
+    "synset_relation_offsets": "I",
+    "synset_relations": "I",
+    "lemma_names": "I",
+    "lemma_synsets": "I",
+    "lemma_relation_offsets": "I",
+    "lemma_relations": "I",
+    "lemma_frame_offsets": "I",
+    "lemma_frames": "I",
+}
+SORTED_TABLES = ["synsets_by_name"]
+SORTED_TABLES += [f"lemmas_{pos}" for pos in POS_LIST]
+SORTED_TABLES += [f"exceptions_{pos}" for pos in POS_LIST]
+
+
+class StringPool:
+    """Interns the strings of a snapshot while it is being built."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def intern(self, string):
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.ids)
+
+        return string_id
+
+    def write(self, directory):
+        encoded = [string.encode("utf-8") for string in self.ids]
+        offsets = array("Q", [0])
+        for string in encoded:
+            offsets.append(offsets[-1] + len(string))
+
+        write_atomically(
+            os.path.join(directory, STRINGS_FILENAME),
+            "wb",
+            lambda file: file.write(b"".join(encoded)),
+        )
+        write_array(os.path.join(directory, STRING_OFFSETS_FILENAME), "Q", offsets)
+
+
+class StringTable:
+    """The strings of a snapshot, read from the mapped UTF-8 table."""
+
+    def __init__(self, directory):
+        self.data = map_array(os.path.join(directory, STRINGS_FILENAME), "B")
+        self.offsets = map_array(os.path.join(directory, STRING_OFFSETS_FILENAME), "Q")
+
+    def get_bytes(self, string_id):
+        return bytes(self.data[self.offsets[string_id] : self.offsets[string_id + 1]])
+
+    def __getitem__(self, string_id):
+        return str(
+            self.data[self.offsets[string_id] : self.offsets[string_id + 1]], "utf-8"
+        )
+
+
+def write_sorted_table(directory, name, entries, pool):
+    """Writes a table that maps strings to lists of integers, sorted by string.
+    Args:
+        directory (str): The directory of the snapshot
+        name (str): The name of the table
+        entries (dict): The integers of each string
+        pool (StringPool): The pool in which the strings get interned
+    """
+
+    keys = sorted(entries)
+    offsets = array("I", [0])
+    values = array("I")
+    for key in keys:
+        values.extend(entries[key])
+        offsets.append(len(values))
+
+    write_array(
+        os.path.join(directory, f"{name}.keys.bin"), "I", map(pool.intern, keys)
+    )
+    write_array(os.path.join(directory, f"{name}.offsets.bin"), "I", offsets)
+    write_array(os.path.join(directory, f"{name}.values.bin"), "I", values)
+
+
+class SortedTable:
+    """A table written by write_sorted_table, searched by bisection. Python sorts strings by
+    code point, which is also the order of their UTF-8 encodings, so the search compares the
+    encoded strings without decoding them."""
+
+    def __init__(self, directory, name, strings):
+        self.strings = strings
+        self.keys = map_array(os.path.join(directory, f"{name}.keys.bin"), "I")
+        self.offsets = map_array(os.path.join(directory, f"{name}.offsets.bin"), "I")
+        self.values = map_array(os.path.join(directory, f"{name}.values.bin"), "I")
+
+    def get(self, key):
+        """Returns the integers of a string, or an empty sequence if it isn't in the table."""
+
+        encoded = key.encode("utf-8")
+        low, high = 0, len(self.keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self.strings.get_bytes(self.keys[middle]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(self.keys) and self.strings.get_bytes(self.keys[low]) == encoded:
+            return self.values[self.offsets[low] : self.offsets[low + 1]]
+
+        return ()
+
+    def __contains__(self, key):
+        return len(self.get(key)) > 0
+
+    def iter_keys(self):
+        return (self.strings[key] for key in self.keys)
+
+    def iter_items(self):
+        """Yields every string of the table with its integers, in the order of the strings."""
+
+        for index, key in enumerate(self.keys):
+            yield self.strings[key], self.values[
+                self.offsets[index] : self.offsets[index + 1]
+            ]
+
+
+def get_synset_key(synset):
+    # Adjective satellites are stored in the adjective data file, and the lemma index lists
+    # them under 'a'
+    pos = synset.pos()
+    return ("a" if pos == "s" else pos, synset.offset())
+
+
+def get_lemma_key(lemma):
+    return lemma.synset().name(), lemma.name()
+
+
+def read_nltk_lexicon(wordnet, pos):
+    """Returns the lemma index and the exception list of a part of speech from NLTK's
+    reader. They're only kept in its internals, which are the only place they can be read in
+    full, so every access to them goes through here.
+    Args:
+        wordnet (WordNetCorpusReader): The NLTK reader
+        pos (str): One of POS_LIST
+    Returns:
+        tuple: The offsets of the synsets of each lemma, and the base forms of each irregular
+        word form
+    Raises:
+        ValueError: If the reader doesn't have these internals, as another version of NLTK
+        might not.
+    """
+
+    # pylint: disable=protected-access
+    try:
+        lemma_pos_offset_map = wordnet._lemma_pos_offset_map
+        exception_map = wordnet._exception_map
+    except AttributeError as error:
+        raise ValueError(
+            "This version of NLTK's WordNet reader doesn't expose its lemma index and "
+            "exception lists."
+        ) from error
+
+    lemma_offsets = {
+        form: offsets[pos]
+        for form, offsets in lemma_pos_offset_map.items()
+        if pos in offsets
+    }
+    return lemma_offsets, exception_map[pos]
+
+
+def write_wordnet_snapshot(directory, wordnet, source):
+    """Compiles WordNet into a snapshot. The lemma index and the exception lists come from
+    the internals of NLTK's reader, through read_nltk_lexicon.
+    Args:
+        directory (str): The empty directory to write the snapshot in
+        wordnet (WordNetCorpusReader): The NLTK reader to read WordNet with
+        source (dict): JSON-serializable description of the WordNet files
+    """
+
+    pool = StringPool()
+    tables = {name: array(typecode) for name, typecode in TABLES.items()}
+    for name in [
+        "synset_lemma_offsets",
+        "synset_relation_offsets",
+        "lemma_relation_offsets",
+        "lemma_frame_offsets",
+    ]:
+        tables[name].append(0)
+
+    synsets = list(wordnet.all_synsets())
+    synset_ids = {get_synset_key(synset): index for index, synset in enumerate(synsets)}
+    lemmas = [lemma for synset in synsets for lemma in synset.lemmas()]
+    lemma_ids = {get_lemma_key(lemma): index for index, lemma in enumerate(lemmas)}
+
+    for synset_id, synset in enumerate(synsets):
+        tables["synset_names"].append(pool.intern(synset.name()))
+        tables["synset_pos"].append(ord(synset.pos()))
+        tables["synset_offsets"].append(synset.offset())
+        tables["synset_definitions"].append(pool.intern(synset.definition()))
+
+        for lemma in synset.lemmas():
+            tables["lemma_names"].append(pool.intern(lemma.name()))
+            tables["lemma_synsets"].append(synset_id)
+        tables["synset_lemma_offsets"].append(len(tables["lemma_names"]))
+
+        for relation in SYNSET_RELATIONS:
+            tables["synset_relations"].extend(
+                synset_ids[get_synset_key(target)]
+                for target in getattr(synset, relation)()
+            )
+            tables["synset_relation_offsets"].append(len(tables["synset_relations"]))
+
+    for lemma in lemmas:
+        for relation in LEMMA_RELATIONS:
+            tables["lemma_relations"].extend(
+                lemma_ids[get_lemma_key(target)]
+                for target in getattr(lemma, relation)()
+            )
+            tables["lemma_relation_offsets"].append(len(tables["lemma_relations"]))
+
+        tables["lemma_frames"].extend(map(pool.intern, lemma.frame_strings()))
+        tables["lemma_frame_offsets"].append(len(tables["lemma_frames"]))
+
+    write_sorted_table(
+        directory,
+        "synsets_by_name",
+        {synset.name(): [index] for index, synset in enumerate(synsets)},
+        pool,
+    )
+    for pos in POS_LIST:
+        lemma_offsets, exceptions = read_nltk_lexicon(wordnet, pos)
+        write_sorted_table(
+            directory,
+            f"lemmas_{pos}",
+            {
+                form: [synset_ids[(pos, offset)] for offset in offsets]
+                for form, offsets in lemma_offsets.items()
+            },
+            pool,
+        )
+        write_sorted_table(
+            directory,
+            f"exceptions_{pos}",
+            {
+                form: [pool.intern(base) for base in bases]
+                for form, bases in exceptions.items()
+            },
+            pool,
+        )
+
+    for name, table in tables.items():
+        write_array(os.path.join(directory, f"{name}.bin"), TABLES[name], table)
+    pool.write(directory)
+
+    write_manifest(
+        directory,
+        {
+            "format_version": WORDNET_SNAPSHOT_FORMAT_VERSION,
+            "source": source,
+            "wordnet_version": wordnet.get_version(),
+            "morphological_substitutions": {
+                pos: [list(rule) for rule in wordnet.MORPHOLOGICAL_SUBSTITUTIONS[pos]]
+                for pos in POS_LIST
+            },
+            "synsets": len(synsets),
+            "lemmas": len(lemmas),
+            "strings": len(pool.ids),
+        },
+    )
+
+
+class WordNetSnapshot:
+    """Reads a WordNet snapshot, through the same calls as NLTK's WordNet reader. Pickling
+    the snapshot only passes its directory, which the copy maps again."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        manifest = read_manifest(directory)
+        self.version = manifest["wordnet_version"]
+        self.substitutions = {
+            pos: [tuple(rule) for rule in rules]
+            for pos, rules in manifest["morphological_substitutions"].items()
+        }
+
+        self.strings = StringTable(directory)
+        self.synset_names = self._map_table("synset_names")
+        self.synset_pos = self._map_table("synset_pos")
+        self.synset_offsets = self._map_table("synset_offsets")
+        self.synset_definitions = self._map_table("synset_definitions")
+        self.synset_lemma_offsets = self._map_table("synset_lemma_offsets")
+        self.synset_relation_offsets = self._map_table("synset_relation_offsets")
+        self.synset_relations = self._map_table("synset_relations")
+        self.lemma_names = self._map_table("lemma_names")
+        self.lemma_synsets = self._map_table("lemma_synsets")
+        self.lemma_relation_offsets = self._map_table("lemma_relation_offsets")
+        self.lemma_relations = self._map_table("lemma_relations")
+        self.lemma_frame_offsets = self._map_table("lemma_frame_offsets")
+        self.lemma_frames = self._map_table("lemma_frames")
+        self.sorted_tables = {
+            name: SortedTable(directory, name, self.strings) for name in SORTED_TABLES
+        }
+
+    def _map_table(self, name):
+        return map_array(os.path.join(self.directory, f"{name}.bin"), TABLES[name])
+
+    def __getstate__(self):
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def get_version(self):
+        return self.version
+
+    def get_synset_relation(self, synset_id, relation_index):
+        index = synset_id * len(SYNSET_RELATIONS) + relation_index
+        targets = self.synset_relations[
+            self.synset_relation_offsets[index] : self.synset_relation_offsets[
+                index + 1
+            ]
+        ]
+        return [SnapshotSynset(self, target) for target in targets]
+
+    def get_lemma_relation(self, lemma_id, relation_index):
+        index = lemma_id * len(LEMMA_RELATIONS) + relation_index
+        targets = self.lemma_relations[
+            self.lemma_relation_offsets[index] : self.lemma_relation_offsets[index + 1]
+        ]
+        return [SnapshotLemma(self, target) for target in targets]
+
+    def _morphy(self, form, pos, check_exceptions=True):
+        """Returns the base forms of a word form in WordNet, for a part of speech. It follows
+        NLTK's reader step by step, so that words resolve to the same synsets."""
+
+        exceptions = self.sorted_tables[f"exceptions_{pos}"]
+        lemmas = self.sorted_tables[f"lemmas_{pos}"]
+        substitutions = self.substitutions[pos]
+
+        def apply_rules(forms):
+            return [
+                form[: -len(old)] + new
+                for form in forms
+                for old, new in substitutions
+                if form.endswith(old)
+            ]
+
+        def filter_forms(forms):
+            return list(dict.fromkeys(form for form in forms if form in lemmas))
+
+        if check_exceptions:
+            bases = exceptions.get(form)
+            if len(bases):
+                return filter_forms([form] + [self.strings[base] for base in bases])
+
+        forms = apply_rules([form])
+        results = filter_forms([form] + forms)
+        if results:
+            return results
+
+        while forms:
+            forms = apply_rules(forms)
+            results = filter_forms(forms)
+            if results:
+                return results
+
+        return []
+
+    def morphy(self, form, pos=None, check_exceptions=True):
+        """Returns the first base form of a word form in WordNet, or None."""
+
+        for each_pos in (POS_LIST if pos is None else (pos,)):
+            forms = self._morphy(form, each_pos, check_exceptions)
+            if forms:
+                return forms[0]
+
+        return None
+
+    def synsets(self, lemma, pos=None, check_exceptions=True):
+        """Returns the synsets of a word, in the order of NLTK's reader."""
+
+        lemma = lemma.lower()
+
+        return [
+            SnapshotSynset(self, synset_id)
+            for each_pos in (POS_LIST if pos is None else pos)
+            for form in self._morphy(lemma, each_pos, check_exceptions)
+            for synset_id in self.sorted_tables[f"lemmas_{each_pos}"].get(form)
+        ]
+
+    def synset(self, name):
+        """Returns the synset with a name such as 'white.n.01'.
+        Raises:
+            ValueError: If there is no such synset.
+        """
+
+        synset_ids = self.sorted_tables["synsets_by_name"].get(name)
+        if not len(synset_ids):
+            raise ValueError(f"No synset named {name!r}")
+
+        return SnapshotSynset(self, synset_ids[0])
+
+    def all_synsets(self, pos=None):
+        """Yields every synset, or the synsets of a part of speech. Adjective satellites
+        count as adjectives, as in NLTK's reader."""
+
+        for synset_id, synset_pos in enumerate(self.synset_pos):
+            synset_pos = chr(synset_pos)
+            if pos is None or pos == synset_pos or (pos == "a" and synset_pos == "s"):
+                yield SnapshotSynset(self, synset_id)
+
+    def exceptions(self, pos):
+        """Returns the exception list of a part of speech: the base forms of each irregular
+        word form, as in NLTK's reader."""
+
+        return {
+            form: [self.strings[base] for base in bases]
+            for form, bases in self.sorted_tables[f"exceptions_{pos}"].iter_items()
+        }
+
+    def all_lemma_names(self, pos=None):
+        """Returns the names in the lemma index, or in the index of a part of speech."""
+
+        names = set()
+        for each_pos in (POS_LIST if pos is None else (pos,)):
+            names.update(self.sorted_tables[f"lemmas_{each_pos}"].iter_keys())
+
+        return sorted(names)
+
+
+class SnapshotSynset:
+    """A synset of a WordNet snapshot, with the methods of NLTK's synsets that the analyzers
+    use."""
+
+    __slots__ = ("snapshot", "id")
+
+    def __init__(self, snapshot, synset_id):
+        self.snapshot = snapshot
+        self.id = synset_id
+
+    def __eq__(self, other):
+        return isinstance(other, SnapshotSynset) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __lt__(self, other):
+        return self.name() < other.name()
+
+    def __repr__(self):
+        return f"Synset({self.name()!r})"
+
+    def name(self):
+        return self.snapshot.strings[self.snapshot.synset_names[self.id]]
+
+    def pos(self):
+        return chr(self.snapshot.synset_pos[self.id])
+
+    def offset(self):
+        return self.snapshot.synset_offsets[self.id]
+
+    def definition(self):
+        return self.snapshot.strings[self.snapshot.synset_definitions[self.id]]
+
+    def lemmas(self):
+        offsets = self.snapshot.synset_lemma_offsets
+        return [
+            SnapshotLemma(self.snapshot, lemma_id)
+            for lemma_id in range(offsets[self.id], offsets[self.id + 1])
+        ]
+
+    def lemma_names(self):
+        return [lemma.name() for lemma in self.lemmas()]
+
+    def hypernyms(self):
+        return self.snapshot.get_synset_relation(self.id, 0)
+
+    def hyponyms(self):
+        return self.snapshot.get_synset_relation(self.id, 1)
+
+    def part_meronyms(self):
+        return self.snapshot.get_synset_relation(self.id, 2)
+
+    def substance_meronyms(self):
+        return self.snapshot.get_synset_relation(self.id, 3)
+
+    def member_meronyms(self):
+        return self.snapshot.get_synset_relation(self.id, 4)
+
+    def similar_tos(self):
+        return self.snapshot.get_synset_relation(self.id, 5)
+
+    def topic_domains(self):
+        return self.snapshot.get_synset_relation(self.id, 6)
+
+    def instance_hypernyms(self):
+        return self.snapshot.get_synset_relation(self.id, 7)
+
+    def instance_hyponyms(self):
+        return self.snapshot.get_synset_relation(self.id, 8)
+
+
+class SnapshotLemma:
+    """A lemma of a WordNet snapshot, with the methods of NLTK's lemmas that the analyzers
+    use."""
+
+    __slots__ = ("snapshot", "id")
+
+    def __init__(self, snapshot, lemma_id):
+        self.snapshot = snapshot
+        self.id = lemma_id
+
+    def __eq__(self, other):
+        return isinstance(other, SnapshotLemma) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Lemma('{self.synset().name()}.{self.name()}')"
+
+    def name(self):
+        return self.snapshot.strings[self.snapshot.lemma_names[self.id]]
+
+    def synset(self):
+        return SnapshotSynset(self.snapshot, self.snapshot.lemma_synsets[self.id])
+
+    def frame_strings(self):
+        offsets = self.snapshot.lemma_frame_offsets
+        return [
+            self.snapshot.strings[string_id]
+            for string_id in self.snapshot.lemma_frames[
+                offsets[self.id] : offsets[self.id + 1]
+            ]
+        ]
+
+    def antonyms(self):
+        return self.snapshot.get_lemma_relation(self.id, 0)
+
+    def derivationally_related_forms(self):
+        return self.snapshot.get_lemma_relation(self.id, 1)
+
+
+def get_wordnet_source():
+    """Describes the installed WordNet files by their names, sizes and modification times,
+    which can be checked without loading NLTK's reader."""
+
+    import nltk
+
+    root = nltk.data.find("corpora/wordnet")
+    if isinstance(root, nltk.data.FileSystemPathPointer):
+        path = root.path
+    else:
+        path = root.zipfile.filename
+
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    else:
+        paths = [path]
+
+    files = []
+    for file_path in paths:
+        stat = os.stat(file_path)
+        files.append([os.path.basename(file_path), stat.st_size, stat.st_mtime_ns])
+
+    return {"nltk_version": nltk.__version__, "files": files}
+
+
+@functools.lru_cache(maxsize=None)
+def get_wordnet_snapshot():
+    """Returns the snapshot of the installed WordNet, compiled on first use."""
+
+    source = get_wordnet_source()
+    directory = get_index_directory(WORDNET_SNAPSHOT_DIRECTORY)
+    expected = {"format_version": WORDNET_SNAPSHOT_FORMAT_VERSION, "source": source}
+
+    def build(build_directory):
+        from nltk.corpus import wordnet as wn
+
+        write_wordnet_snapshot(build_directory, wn, source)
+
+    ensure_index(directory, expected, build)
+
+    return WordNetSnapshot(directory)
+
+
+def get_wordnet():
+    """Returns the WordNet reader that the analyzers use: the snapshot, or NLTK's reader when
+    the WORD_INFO_WORDNET_READER environment variable is set to 'nltk'.
+    Raises:
+        ValueError: If the environment variable names an unknown reader.
+    """
+
+    reader = os.environ.get(WORDNET_READER_ENV_VAR) or "snapshot"
+    if reader not in WORDNET_READERS:
+        raise ValueError(
+            f"{WORDNET_READER_ENV_VAR} must be one of {', '.join(WORDNET_READERS)},"
+            f" not {reader!r}"
+        )
+
+    if reader == "nltk":
+        from nltk.corpus import wordnet as wn
+
+        wn.ensure_loaded()
+        return wn
+
+    return get_wordnet_snapshot()
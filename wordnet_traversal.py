@@ -0,0 +1,188 @@
+"""This module provides a single-pass traversal of the WordNet synsets of a word, which fills
+every requested lexical relation at once instead of each analyzer walking the synsets and
+their lemmas on its own.
+
+Each synset and each lemma gets visited once, the frame strings of a lemma get read once
+for both idioms and transitivity, and the work of the fields nobody asked for is skipped.
+
+Functions:
+traverse_word(word, fields)
+get_pos(synset, pos_map)
+"""
+
+# utils only reads WordNet, and imports NLTK, once a word gets looked up
+from utils import lookup_synsets, replace_underscore_with_space
+
+pos_map = {"n": "noun", "v": "verb", "a": "adjective", "s": "adjective", "r": "adverb"}
+
+SET_FIELDS = (
+    "meanings",
+    "synonyms",
+    "antonyms",
+    "phrasal_verbs",
+    "idiomatic_expressions",
+    "alternative_words",
+    "domain_words",
+    "associated_nouns",
+    "associated_verbs",
+)
+LIST_FIELDS = (
+    "pos_and_transitivity",
+    "semantic_fields",
+    "hyponyms",
+    "hypernyms",
+    "meronyms",
+)
+TRAVERSAL_FIELDS = SET_FIELDS + LIST_FIELDS
+
+# The fields that need to look at every lemma of a synset, and the ones among them that
+# need the lemma's verb frames
+LEMMA_FIELDS = {
+    "synonyms",
+    "antonyms",
+    "phrasal_verbs",
+    "idiomatic_expressions",
+    "associated_nouns",
+    "associated_verbs",
+    "pos_and_transitivity",
+}
+FRAME_FIELDS = {"idiomatic_expressions", "pos_and_transitivity"}
+
+
+def get_pos(synset, pos_map):
+    pos = pos_map.get(synset.pos(), synset.pos())
+    return pos
+
+
+def is_transitive_frame(frame):
+    return "Something" in frame or "somebody" in frame
+
+
+def traverse_word(word, fields=TRAVERSAL_FIELDS):
+    """Walks the synsets of a word and their lemmas once, filling the requested fields.
+    Args:
+        word (str): The word whose synsets get traversed
+        fields (iterable): The names of the fields to compute, out of TRAVERSAL_FIELDS
+
+    Returns:
+        dict: The value of each requested field, by name
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+
+    fields = set(fields)
+    unknown_fields = fields.difference(TRAVERSAL_FIELDS)
+    if unknown_fields:
+        raise ValueError(
+            f"Unknown traversal fields: {', '.join(sorted(unknown_fields))}"
+        )
+
+    results = {field: set() for field in SET_FIELDS if field in fields}
+    results.update({field: [] for field in LIST_FIELDS if field in fields})
+
+    visit_lemmas = bool(fields & LEMMA_FIELDS)
+    read_frames = bool(fields & FRAME_FIELDS)
+
+    for synset in lookup_synsets(word):
+        lemmas = synset.lemmas()
+        pos = get_pos(synset, pos_map)
+        transitivity = "intransitive" if pos == "verb" else None
+
+        if lemmas:
+            visit_synset(synset, fields, results)
+
+        if visit_lemmas:
+            for lemma in lemmas:
+                frames = lemma.frame_strings() if read_frames else ()
+                visit_lemma(lemma, frames, fields, results)
+
+                if pos == "verb" and any(
+                    is_transitive_frame(frame) for frame in frames
+                ):
+                    transitivity = "transitive"
+
+        if "pos_and_transitivity" in fields:
+            results["pos_and_transitivity"].append((pos, transitivity))
+
+        visit_semantic_relations(synset, fields, results)
+
+    return results
+
+
+def visit_synset(synset, fields, results):
+    if "meanings" in fields:
+        results["meanings"].add(synset.definition())
+
+    if "alternative_words" in fields:
+        results["alternative_words"].update(
+            sim_lemma.name()
+            for sim_synset in synset.similar_tos()
+            for sim_lemma in sim_synset.lemmas()
+        )
+
+    if "domain_words" in fields:
+        results["domain_words"].update(
+            replace_underscore_with_space(dom_lemma.name())
+            for domain in synset.topic_domains()
+            for dom_lemma in domain.lemmas()
+        )
+
+
+def visit_lemma(lemma, frames, fields, results):
+    name = lemma.name()
+
+    if "synonyms" in fields:
+        results["synonyms"].add(replace_underscore_with_space(name))
+
+    if "antonyms" in fields:
+        results["antonyms"].update(
+            replace_underscore_with_space(antonym.name())
+            for antonym in lemma.antonyms()
+        )
+
+    if "phrasal_verbs" in fields and " " in name:
+        results["phrasal_verbs"].add(replace_underscore_with_space(name))
+
+    if "idiomatic_expressions" in fields and any("Idiom" in frame for frame in frames):
+        results["idiomatic_expressions"].add(replace_underscore_with_space(name))
+
+    if "associated_nouns" in fields or "associated_verbs" in fields:
+        for related_lemma in lemma.derivationally_related_forms():
+            related_pos = related_lemma.synset().pos()
+            if related_pos == "n" and "associated_nouns" in fields:
+                results["associated_nouns"].add(related_lemma.name())
+            elif related_pos == "v" and "associated_verbs" in fields:
+                results["associated_verbs"].add(related_lemma.name())
+
+
+def visit_semantic_relations(synset, fields, results):
+    if "semantic_fields" in fields or "hypernyms" in fields:
+        hypernyms = synset.hypernyms()
+
+        if "semantic_fields" in fields:
+            results["semantic_fields"].extend(
+                replace_underscore_with_space(hypernym.name().split(".")[0])
+                for hypernym in hypernyms
+            )
+
+        if "hypernyms" in fields:
+            results["hypernyms"].extend(
+                replace_underscore_with_space(hypernym.name()) for hypernym in hypernyms
+            )
+
+    if "hyponyms" in fields:
+        results["hyponyms"].extend(
+            replace_underscore_with_space(hyponym.name())
+            for hyponym in synset.hyponyms()
+        )
+
+    if "meronyms" in fields:
+        for meronyms in (
+            synset.part_meronyms(),
+            synset.substance_meronyms(),
+            synset.member_meronyms(),
+        ):
+            results["meronyms"].extend(
+                replace_underscore_with_space(meronym.name()) for meronym in meronyms
+            )
@@ -0,0 +1,155 @@
+"""This module provides the means to analyze many words in parallel with a pool of worker
+processes. The results come back in the same order as the words were passed.
+
+The WordNet snapshot and the corpus indexes are loaded in the parent process before the
+pool forks, so that the workers share those structures instead of each one loading them
+again. On platforms that can't fork, every worker loads them once when it starts.
+
+Functions:
+load_shared_state()
+start_worker(instrumentation_settings, rate_limit_slot)
+analyze_word_safely(word, cache, report_stats)
+analyze_words_in_parallel(words, workers, chunk_size, cache)
+
+Classes:
+WordAnalysisOutcome
+"""
+
+import functools
+import multiprocessing
+import multiprocessing.util
+import os
+from collections import namedtuple
+
+import instrumentation
+from etymology_fetcher import share_rate_limit
+from result_cache import analyze_word_with_cache
+from word_analysis import load_analyzers
+
+DEFAULT_CHUNK_SIZE = 16
+
+WordAnalysisOutcome = namedtuple(
+    "WordAnalysisOutcome",
+    ["word", "results", "error_type", "error_message", "stats"],
+    defaults=(None,),
+)
+WordAnalysisOutcome.__doc__ = """The analysis results of a word, or the type and message
+of the error that prevented analyzing it. When a worker process analyzed the word with
+instrumentation enabled, the statistics it recorded come along."""
+
+
+def load_shared_state():
+    """Loads the structures that every analysis needs, so that it only happens once per process."""
+
+    from corpus_index import get_corpus_index
+    from morphology_index import get_morphology_index
+    from wordnet_snapshot import get_wordnet
+
+    load_analyzers()
+    get_wordnet()
+    get_corpus_index()
+    get_morphology_index()
+
+
+def start_worker(instrumentation_settings=None, rate_limit_slot=None):
+    """Prepares a worker process: loads the shared structures, makes it share the etymology
+    rate limit with the other workers, and instruments it like its parent, starting from empty
+    statistics."""
+
+    load_shared_state()
+    if rate_limit_slot is not None:
+        share_rate_limit(rate_limit_slot)
+
+    if instrumentation_settings is None:
+        instrumentation.disable()
+        return
+
+    collector = instrumentation.enable(**instrumentation_settings)
+    if collector.profile_directory:
+        multiprocessing.util.Finalize(
+            collector, collector.write_profiles, exitpriority=10
+        )
+
+
+def analyze_word_safely(word, cache=None, report_stats=False):
+    """Analyzes a word, turning any failure into a structured outcome instead of raising.
+    Args:
+        word (str): The word to analyze
+        cache (ResultCache): If passed, the results get read from and stored in this cache
+        report_stats (bool): Whether to hand over the instrumentation statistics recorded
+        since the previous word with the outcome, as worker processes do
+
+    Returns:
+        WordAnalysisOutcome: The results, or the error that occurred
+    """
+
+    try:
+        outcome = WordAnalysisOutcome(
+            word, analyze_word_with_cache(word, cache), None, None
+        )
+    except Exception as exception:  # pylint: disable=broad-except
+        outcome = WordAnalysisOutcome(
+            word, None, type(exception).__name__, str(exception)
+        )
+
+    collector = instrumentation.get_instrumentation()
+    if report_stats and collector is not None:
+        outcome = outcome._replace(stats=collector.drain())
+
+    return outcome
+
+
+def get_pool_context():
+    """Returns the multiprocessing context for the pool, preferring 'fork' because it lets the
+    workers share the already loaded corpora."""
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
+def analyze_words_in_parallel(
+    words, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, cache=None
+):
+    """Analyzes the words passed with a pool of worker processes.
+    Args:
+        words (iterable): The words to analyze. They get consumed lazily.
+        workers (int): The number of worker processes. None uses every available core.
+        chunk_size (int): How many words get sent to a worker at a time
+        cache (ResultCache): If passed, the results get read from and stored in this cache
+
+    Yields:
+        WordAnalysisOutcome: The outcome of each word, in the same order as the words passed
+    """
+
+    context = get_pool_context()
+    if context.get_start_method() == "fork":
+        load_shared_state()
+
+    collector = instrumentation.get_instrumentation()
+    settings = None if collector is None else collector.settings
+
+    # Every worker fetching etymologies on its own would multiply the rate limit
+    rate_limit_slot = context.Value("d", 0.0)
+
+    with context.Pool(
+        workers or os.cpu_count(),
+        initializer=start_worker,
+        initargs=(settings, rate_limit_slot),
+    ) as pool:
+        for outcome in pool.imap(
+            functools.partial(
+                analyze_word_safely, cache=cache, report_stats=collector is not None
+            ),
+            words,
+            chunk_size,
+        ):
+            if outcome.stats:
+                collector.merge(outcome.stats)
+            yield outcome
+
+        # Let the workers exit on their own rather than being terminated, so that they get to
+        # write their profiles
+        pool.close()
+        pool.join()